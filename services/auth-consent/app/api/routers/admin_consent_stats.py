@@ -0,0 +1,70 @@
+from __future__ import annotations
+from collections import Counter
+from datetime import date
+from typing import List, Literal, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from anyio import to_thread
+
+from app.api.schemas.admin import ConsentStatsResponse, ConsentStatsRow
+from app.core.config import settings
+from app.db.shards import router as shards
+from app.models.consent import CONSENT_STATUSES
+from app.repositories.consent_stats import counts
+from app.security.admin import require_admin
+
+router = APIRouter(prefix="/admin", tags=["admin"], dependencies=[Depends(require_admin)])
+
+def _collect(group_by: List[str], filters: dict) -> Counter:
+    # Each shard keeps its own consent_stats; merge the (small) per-shard results
+    merged: Counter = Counter()
+    for shard in shards.shard_ids():
+        db = shards.session(shard)
+        try:
+            merged.update(counts(db, group_by=group_by, **filters))
+        finally:
+            db.close()
+    return merged
+
+@router.get(
+    "/consents/stats",
+    response_model=ConsentStatsResponse,
+    response_model_exclude_unset=True,  # rows only carry their group_by fields
+    summary="Consent counts by tenant, TPP, creation day and status",
+)
+async def consent_stats(
+    group_by: List[Literal["tenant_id", "tpp_client_id", "day", "status"]] = Query(["status"]),
+    tenant_id: Optional[str] = Query(None, description="'' selects consents without a tenant"),
+    tpp_client_id: Optional[str] = None,
+    status_: Optional[Literal[CONSENT_STATUSES]] = Query(None, alias="status"),
+    day_from: Optional[date] = Query(None, alias="from", description="creation day (UTC), inclusive"),
+    day_to: Optional[date] = Query(None, alias="to", description="creation day (UTC), inclusive"),
+    limit: int = Query(1000, gt=0, le=10_000),
+):
+    """
+    Served from trigger-maintained counters (consent_stats), so the cost depends
+    on the number of groups, not on the number of consents. Archived consents
+    are included; `day` is the consent's creation day.
+    """
+    if not settings.USE_ALEMBIC:
+        # Counters and their triggers come from migration 0008
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="not_found")
+    group_by = list(dict.fromkeys(group_by))  # drop repeats, keep order
+    filters = dict(
+        tenant_id=tenant_id, tpp_client_id=tpp_client_id, status=status_, day_from=day_from, day_to=day_to,
+    )
+    merged = await to_thread.run_sync(_collect, group_by, filters)
+
+    rows = []
+    for key, n in sorted(merged.items(), key=lambda kv: (-kv[1], kv[0])):
+        if n == 0:
+            continue
+        fields = dict(zip(group_by, key))
+        if fields.get("tenant_id") == "":
+            fields["tenant_id"] = None
+        rows.append(ConsentStatsRow(count=n, **fields))
+    return ConsentStatsResponse(
+        group_by=group_by,
+        total=sum(r.count for r in rows),
+        rows=rows[:limit],
+        truncated=len(rows) > limit,
+    )
@@ -0,0 +1,30 @@
+from __future__ import annotations
+from typing import Dict
+from fastapi import APIRouter, Depends
+
+from app.api.schemas.admin import FaultDependency, FaultSpecModel
+from app.core.faults import FaultSpec, faults
+from app.security.admin import require_admin
+
+# Only mounted when FAULT_INJECTION_ENABLED (see app.core.faults)
+router = APIRouter(prefix="/admin/faults", tags=["admin"], dependencies=[Depends(require_admin)])
+
+@router.get("", response_model=Dict[str, FaultSpecModel], summary="Active dependency faults")
+async def list_faults():
+    return faults.snapshot()
+
+@router.put("/{dependency}", response_model=Dict[str, FaultSpecModel], summary="Inject latency, errors or hangs")
+async def set_fault(dependency: FaultDependency, spec: FaultSpecModel):
+    """Replaces the dependency's fault; takes effect on the next call in this worker process."""
+    faults.set(dependency, FaultSpec(**spec.model_dump()))
+    return faults.snapshot()
+
+@router.delete("/{dependency}", response_model=Dict[str, FaultSpecModel], summary="Clear one dependency's fault")
+async def clear_fault(dependency: FaultDependency):
+    faults.clear(dependency)
+    return faults.snapshot()
+
+@router.delete("", response_model=Dict[str, FaultSpecModel], summary="Clear all faults")
+async def clear_faults():
+    faults.clear()
+    return faults.snapshot()
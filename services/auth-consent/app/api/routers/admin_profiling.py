@@ -0,0 +1,74 @@
+from __future__ import annotations
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import PlainTextResponse
+
+from app.core import profiling
+from app.core.config import settings
+from app.security.admin import require_admin
+
+router = APIRouter(prefix="/admin", tags=["admin"], dependencies=[Depends(require_admin)])
+
+@router.post("/profile/cpu", response_class=PlainTextResponse, summary="Time-boxed sampling CPU profile")
+async def profile_cpu(
+    seconds: float = Query(10.0, gt=0),
+    hz: float = Query(100.0, gt=0, le=1000),
+):
+    """
+    Samples every thread of this worker for `seconds` and returns collapsed
+    stacks (`frame;frame;... count`), ready for flamegraph.pl or speedscope.
+    Event-loop samples are prefixed with the route being served.
+    """
+    seconds = min(seconds, settings.PROFILING_MAX_SECONDS)
+    try:
+        sampler = await profiling.profile_for(seconds, hz)
+    except RuntimeError:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="profile_in_progress")
+    return PlainTextResponse(
+        sampler.collapsed(),
+        headers={"Content-Disposition": 'attachment; filename="profile.collapsed"'},
+    )
+
+@router.post("/profile/continuous", summary="Start the continuous per-route sampler")
+async def continuous_start(hz: float = Query(None, gt=0, le=100)):
+    sampler = profiling.start_continuous(hz or settings.PROFILING_CONTINUOUS_HZ)
+    return {"running": True, "hz": round(1 / sampler.interval, 2), "samples": sampler.sample_count}
+
+@router.delete("/profile/continuous", summary="Stop the continuous sampler and discard its data")
+async def continuous_stop():
+    profiling.stop_continuous()
+    return {"running": False}
+
+@router.get("/profile/continuous", summary="Continuous samples: per-route totals or collapsed stacks")
+async def continuous_read(
+    route: str | None = Query(None, description="Route template, e.g. /consents/{consent_id}/status"),
+    format: str = Query("summary", pattern="^(summary|collapsed)$"),
+):
+    sampler = profiling.continuous()
+    if sampler is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="not_found")
+    if format == "collapsed":
+        return PlainTextResponse(sampler.collapsed(route))
+    return {"samples": sampler.sample_count, "by_route": sampler.per_route()}
+
+@router.post("/memory/snapshot", summary="Take a tracemalloc baseline snapshot")
+async def memory_snapshot(
+    limit: int = Query(25, gt=0, le=500),
+    frames: int = Query(10, gt=0, le=100),
+):
+    """Starts tracemalloc on first use (allocations are slower while tracing)."""
+    return profiling.memory_snapshot(limit, frames)
+
+@router.get("/memory/diff", summary="Allocation growth since the baseline snapshot")
+async def memory_diff(
+    limit: int = Query(25, gt=0, le=500),
+    group_by: str = Query("lineno", pattern="^(lineno|filename|traceback)$"),
+):
+    diff = profiling.memory_diff(limit, group_by)
+    if diff is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="not_found")
+    return diff
+
+@router.delete("/memory/snapshot", summary="Stop tracemalloc and drop the baseline")
+async def memory_stop():
+    profiling.memory_stop()
+    return {"tracing": False}
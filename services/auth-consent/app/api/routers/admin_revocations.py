@@ -0,0 +1,64 @@
+from __future__ import annotations
+from uuid import UUID
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from sqlalchemy.orm import Session
+
+from app.api.schemas.admin import RevocationJobCreateRequest, RevocationJobResponse
+from app.core.metrics import inc_bulk_revocation_job
+from app.db.deps import get_db
+from app.repositories import revocation_jobs as jobs_repo
+from app.security.admin import require_admin
+
+# Jobs live on the default shard: get_db routes there when there is no consent_id
+router = APIRouter(prefix="/admin", tags=["admin"], dependencies=[Depends(require_admin)])
+
+@router.post(
+    "/revocations",
+    response_model=RevocationJobResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="Enqueue a bulk revocation by PSU, TPP or tenant",
+)
+async def create_revocation_job(
+    payload: RevocationJobCreateRequest,
+    response: Response,
+    db: Session = Depends(get_db),
+    admin = Depends(require_admin),
+):
+    """
+    Revokes every active consent matching `selector` = `value`, in the
+    background (the "revocations" housekeeping job). While a job for the same
+    target is still open, that job is returned with 200 instead.
+    """
+    job, created = jobs_repo.create_job(
+        db,
+        selector=payload.selector,
+        value=payload.value,
+        reason=payload.reason,
+        requested_by=admin.get("sub"),
+    )
+    if not created:
+        response.status_code = status.HTTP_200_OK
+    response.headers["Location"] = f"/admin/revocations/{job.id}"
+    return RevocationJobResponse.from_row(job)
+
+@router.get("/revocations/{job_id}", response_model=RevocationJobResponse, summary="Bulk revocation progress")
+async def get_revocation_job(job_id: UUID, db: Session = Depends(get_db)):
+    job = jobs_repo.get_job(db, job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="not_found")
+    return RevocationJobResponse.from_row(job)
+
+@router.delete(
+    "/revocations/{job_id}",
+    response_model=RevocationJobResponse,
+    summary="Cancel a bulk revocation (already revoked consents stay revoked)",
+)
+async def cancel_revocation_job(job_id: UUID, db: Session = Depends(get_db)):
+    job, cancelled = jobs_repo.cancel_job(db, job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="not_found")
+    if job.status != "CANCELLED":
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="invalid_state")
+    if cancelled:
+        inc_bulk_revocation_job("cancelled")
+    return RevocationJobResponse.from_row(job)
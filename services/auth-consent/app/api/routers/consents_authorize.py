@@ -4,14 +4,22 @@ from fastapi import APIRouter, Depends, Header, HTTPException, Request, Response
 from sqlalchemy.orm import Session
 
 from app.db.deps import get_db
+from app.security import sca_state
 from app.security.jwt import get_current_client
-from app.repositories.consents import get_by_id, set_sca_id_if_pending
+from app.security.ratelimit import rate_limit
+from app.repositories.consents import start_sca_if_pending
+from app.repositories.consent_reads import get_record
 from app.api.schemas.consents import ConsentAuthorizeResponse, NextAction
-from app.services.sca_service import generate_sca_id, build_authorize_url, build_deny_url
+from app.services import sca_providers
 
 router = APIRouter(prefix="/consents", tags=["consents"])
 
-@router.post("/{consent_id}/authorize", response_model=ConsentAuthorizeResponse, summary="Start SCA (stub)")
+@router.post(
+    "/{consent_id}/authorize",
+    response_model=ConsentAuthorizeResponse,
+    summary="Start SCA with the tenant's SCA provider",
+    dependencies=[Depends(rate_limit("authorize"))],
+)
 async def start_sca(
     consent_id: UUID,
     request: Request,
@@ -22,36 +30,36 @@ async def start_sca(
 ):
     correlation_id = UUID(x_request_id) if x_request_id else uuid4()
     response.headers["X-Request-ID"] = str(correlation_id)
-
-    obj = get_by_id(db, consent_id)
-    if not obj:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="not_found")
-
-    # Ownership: TPP + (optional) tenant
-    if obj.tpp_client_id != client["tpp_client_id"]:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="forbidden")
     tenant_id = client.get("tenant_id")
-    if tenant_id is not None and obj.tenant_id is not None and obj.tenant_id != tenant_id:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="forbidden")
-
-    # Only PENDING_SCA can start SCA; idempotent if sca_id already exists
-    if obj.status != "PENDING_SCA":
-        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="invalid_state")
 
-    sca_id = obj.sca_id or generate_sca_id()
-    updated = set_sca_id_if_pending(db, consent_id=consent_id, sca_id=sca_id)
+    # Ownership (TPP + optional tenant) and PENDING_SCA are conditions of the UPDATE itself;
+    # each call starts a fresh session and supersedes the previous one's state.
+    sca_id = sca_state.issue(consent_id)
+    updated = start_sca_if_pending(
+        db, consent_id=consent_id, sca_id=sca_id, tpp_client_id=client["tpp_client_id"], tenant_id=tenant_id,
+    )
     if not updated:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="not_found")
+        # Nothing matched: read once to pick the right error
+        obj = get_record(db, consent_id)
+        if not obj:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="not_found")
+        if obj.tpp_client_id != client["tpp_client_id"]:
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="forbidden")
+        if tenant_id is not None and obj.tenant_id is not None and obj.tenant_id != tenant_id:
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="forbidden")
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="invalid_state")
 
-    # Build an authorize URL that simulates the provider redirect into our callback
-    auth_url = build_authorize_url(str(request.base_url), consent_id, updated.sca_id or sca_id)
-    deny_url = build_deny_url(str(request.base_url), consent_id, updated.sca_id or sca_id)
+    try:
+        provider = sca_providers.for_tenant(updated.tenant_id)
+        initiation = await provider.initiate(consent_id, str(request.base_url), sca_id)
+    except sca_providers.ScaProviderError as exc:
+        raise HTTPException(status_code=exc.status_code, detail=exc.code)
 
     return ConsentAuthorizeResponse(
         id=updated.id,
         status=updated.status,  # still PENDING_SCA
-        sca_id=updated.sca_id or sca_id,
-        next_action=NextAction(authorize_url=auth_url),
-        deny_url=deny_url,
+        sca_id=sca_id,
+        next_action=NextAction(authorize_url=initiation.redirect_url),
+        deny_url=initiation.deny_url,
         correlation_id=correlation_id,
     )
@@ -7,18 +7,23 @@ from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, R
 from starlette.responses import RedirectResponse
 from sqlalchemy.orm import Session
 
+from app.core.config import settings
+from app.core.metrics import inc_sca_callback_rejected
 from app.db.deps import get_db
-from app.repositories.consents import get_by_id, update_status_if_allowed
+from app.repositories.consents import complete_sca
+from app.repositories.consent_reads import get_record, get_status_view
+from app.security import sca_state
+from app.services import sca_providers
 
 router = APIRouter(prefix="/consents", tags=["consents"])
 
-@router.get("/{consent_id}/authorize/callback", summary="SCA callback (stub) – redirects to client")
+@router.get("/{consent_id}/authorize/callback", summary="SCA callback – redirects to client")
 async def authorize_callback(
     consent_id: UUID,
     request: Request,
     response: Response,
     db: Session = Depends(get_db),
-    state: str = Query(..., description="SCA state id that must match stored sca_id"),
+    state: str = Query(..., description="Signed SCA state issued by /authorize (the consent's sca_id)"),
     result: Literal["approved", "denied"] = Query(...),  # <-- replace pattern with Literal
     x_request_id: Optional[str] = Header(None, alias="X-Request-ID"),
 ):
@@ -26,41 +31,55 @@ async def authorize_callback(
     correlation_id = UUID(x_request_id) if x_request_id else uuid4()
     response.headers["X-Request-ID"] = str(correlation_id)
 
-    obj = get_by_id(db, consent_id)
-    if not obj:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="not_found")
-
-    # Validate state param matches stored sca_id
-    if not obj.sca_id or state != obj.sca_id:
+    # Forged, expired or foreign state never reaches Postgres
+    try:
+        sca_state.verify(state, consent_id)
+    except sca_state.InvalidScaState as exc:
+        inc_sca_callback_rejected(exc.reason)
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="invalid_state")
 
-    requested_status = "GRANTED" if result == "approved" else "REJECTED"
-
-    if obj.status == "PENDING_SCA":
-        updated = update_status_if_allowed(
-            db,
-            consent_id=consent_id,
-            allowed_from=("PENDING_SCA",),
-            new_status=requested_status,
-        )
-        if not updated:
+    # Remote providers are asked for the outcome; the redirect's query string is only a claim
+    tenant_id = None
+    if settings.SCA_TENANT_PROVIDERS:
+        # The provider depends on the consent's tenant
+        row = get_status_view(db, consent_id)
+        if not row:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="not_found")
+        tenant_id = row.tenant_id
+        db.rollback()  # release the DB connection during the provider call
+    try:
+        outcome = await sca_providers.for_tenant(tenant_id).confirm(state, result)
+    except sca_providers.ScaProviderError as exc:
+        raise HTTPException(status_code=exc.status_code, detail=exc.code)
+    if outcome not in ("approved", "denied"):
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="invalid_state")
+    requested_status = "GRANTED" if outcome == "approved" else "REJECTED"
+
+    updated = complete_sca(
+        db,
+        consent_id=consent_id,
+        sca_id=state,
+        new_status=requested_status,
+        actor="psu",
+        correlation_id=str(correlation_id),
+    )
+    if updated:
         final_status = updated.status
         redirect_success_url = updated.redirect_success_url
         redirect_failure_url = updated.redirect_failure_url
-    elif obj.status in ("GRANTED", "REJECTED"):
-        # Idempotent replay: only allow same outcome
-        if (obj.status == "GRANTED" and requested_status == "GRANTED") or (
-            obj.status == "REJECTED" and requested_status == "REJECTED"
-        ):
-            final_status = obj.status
-            redirect_success_url = obj.redirect_success_url
-            redirect_failure_url = obj.redirect_failure_url
-        else:
-            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="invalid_state")
     else:
-        # EXPIRED or REVOKED cannot be changed via callback
-        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="invalid_state")
+        # Not PENDING_SCA with this session any more: missing, superseded, or a replay
+        obj = get_record(db, consent_id)
+        if not obj:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="not_found")
+        if obj.sca_id != state:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="invalid_state")
+        # Idempotent replay: only allow same outcome; EXPIRED or REVOKED cannot be changed via callback
+        if obj.status != requested_status:
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="invalid_state")
+        final_status = obj.status
+        redirect_success_url = obj.redirect_success_url
+        redirect_failure_url = obj.redirect_failure_url
 
     # Redirect based on ACTUAL final status
     redirect_to = redirect_success_url if final_status == "GRANTED" else redirect_failure_url
@@ -3,9 +3,10 @@ from uuid import UUID, uuid4
 from fastapi import APIRouter, Depends, Header, HTTPException, Request, Response, status
 from app.api.schemas.consents import ConsentCreateRequest, ConsentCreateResponse
 from app.security.jwt import get_current_client
+from app.security.ratelimit import rate_limit
 from app.services.consent_service import create_consent
 from sqlalchemy.orm import Session
-from app.db.deps import get_db
+from app.db.deps import get_tenant_db
 
 router = APIRouter(prefix="/consents", tags=["consents"])
 
@@ -28,13 +29,14 @@ CREATE_RESPONSES = {
     summary="Create a consent",
     response_model=ConsentCreateResponse,
     responses=CREATE_RESPONSES,
+    dependencies=[Depends(rate_limit("create"))],
 )
 async def create_consent_endpoint(
     request: Request,
     payload: ConsentCreateRequest,
     response: Response, 
     client=Depends(get_current_client),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_tenant_db),
     idempotency_key: str | None = Header(None, alias="Idempotency-Key"),
     x_request_id: str | None = Header(None, alias="X-Request-ID"),
 ):
@@ -5,14 +5,20 @@ from sqlalchemy.orm import Session
 
 from app.db.deps import get_db
 from app.security.jwt import get_current_client
-from app.repositories.consents import get_by_id
+from app.security.ratelimit import rate_limit
+from app.repositories.consent_reads import get_record
 from app.api.schemas.consents import (
     ConsentReadResponse, RedirectURLs, AccountsScope, ConsentLinks, ProviderRefs
 )
 
 router = APIRouter(prefix="/consents", tags=["consents"])
 
-@router.get("/{consent_id}", response_model=ConsentReadResponse, summary="Get consent detail")
+@router.get(
+    "/{consent_id}",
+    response_model=ConsentReadResponse,
+    summary="Get consent detail",
+    dependencies=[Depends(rate_limit("polling"))],
+)
 async def get_consent_detail(
     consent_id: UUID,
     request: Request,
@@ -25,7 +31,7 @@ async def get_consent_detail(
     correlation_id = UUID(x_request_id) if x_request_id else uuid4()
     response.headers["X-Request-ID"] = str(correlation_id)
 
-    obj = get_by_id(db, consent_id)
+    obj = get_record(db, consent_id)
     if not obj:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="not_found")
 
@@ -0,0 +1,53 @@
+from __future__ import annotations
+from uuid import UUID, uuid4
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, Response, status
+from sqlalchemy.orm import Session
+
+from app.db.deps import get_db
+from app.security.jwt import get_current_client
+from app.security.ratelimit import rate_limit
+from app.repositories.consent_reads import get_status_view
+from app.repositories.consent_events import list_for_consent
+from app.api.schemas.consents import ConsentHistoryResponse, ConsentStatusEvent
+
+router = APIRouter(prefix="/consents", tags=["consents"])
+
+@router.get(
+    "/{consent_id}/history",
+    response_model=ConsentHistoryResponse,
+    summary="Get consent status history",
+    dependencies=[Depends(rate_limit("polling"))],
+)
+async def get_consent_history(
+    consent_id: UUID,
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_db),
+    client = Depends(get_current_client),
+    x_request_id: str | None = Header(None, alias="X-Request-ID"),
+):
+    correlation_id = UUID(x_request_id) if x_request_id else uuid4()
+    response.headers["X-Request-ID"] = str(correlation_id)
+
+    obj = get_status_view(db, consent_id)
+    if not obj:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="not_found")
+
+    # Ownership enforcement (TPP + tenant)
+    if obj.tpp_client_id != client["tpp_client_id"]:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="forbidden")
+    tenant_id = client.get("tenant_id")
+    if tenant_id is not None and obj.tenant_id is not None and obj.tenant_id != tenant_id:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="forbidden")
+
+    events = [
+        ConsentStatusEvent(
+            from_status=e.from_status,
+            to_status=e.to_status,
+            actor=e.actor,
+            correlation_id=e.correlation_id,
+            ts=e.ts,
+        )
+        for e in list_for_consent(db, consent_id)
+    ]
+    return ConsentHistoryResponse(id=obj.id, events=events, correlation_id=correlation_id)
@@ -5,13 +5,21 @@ from sqlalchemy.orm import Session
 
 from app.db.deps import get_db
 from app.security.jwt import get_current_client
-from app.repositories.consents import get_by_id, update_status_if_allowed
+from app.security.ratelimit import rate_limit
+from app.repositories.consents import update_status_if_allowed
+from app.repositories.consent_reads import get_status_view
 from app.api.schemas.consents import ConsentStatusResponse
 from app.core.metrics import inc_consents_revoked 
+from app.cache.invalidation import publish_revoked
 
 router = APIRouter(prefix="/consents", tags=["consents"])
 
-@router.post("/{consent_id}/revoke", response_model=ConsentStatusResponse, summary="Revoke a consent")
+@router.post(
+    "/{consent_id}/revoke",
+    response_model=ConsentStatusResponse,
+    summary="Revoke a consent",
+    dependencies=[Depends(rate_limit("revoke"))],
+)
 async def revoke_consent(
     consent_id: UUID,
     request: Request,
@@ -25,7 +33,7 @@ async def revoke_consent(
     response.headers["X-Request-ID"] = str(correlation_id)
 
     # Load + ownership checks
-    obj = get_by_id(db, consent_id)
+    obj = get_status_view(db, consent_id)
     if not obj:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="not_found")
 
@@ -48,6 +56,8 @@ async def revoke_consent(
         consent_id=consent_id,
         allowed_from=("PENDING_SCA", "GRANTED"),
         new_status="REVOKED",
+        actor=f"tpp:{client['tpp_client_id']}",
+        correlation_id=str(correlation_id),
     )
 
     if not updated:
@@ -60,6 +70,7 @@ async def revoke_consent(
 
     # Count a successful revoke exactly once
     inc_consents_revoked()
+    await publish_revoked([updated.id])
     
     return ConsentStatusResponse(
         id=updated.id,
@@ -5,13 +5,19 @@ from sqlalchemy.orm import Session
 
 from app.db.deps import get_db
 from app.security.jwt import get_current_client
-from app.repositories.consents import get_by_id
+from app.security.ratelimit import rate_limit
+from app.repositories.consent_reads import get_status_view
 from app.api.schemas.consents import ConsentStatusResponse
 from app.core.metrics import inc_consents_status_poll
 
 router = APIRouter(prefix="/consents", tags=["consents"])
 
-@router.get("/{consent_id}/status", response_model=ConsentStatusResponse, summary="Get consent status")
+@router.get(
+    "/{consent_id}/status",
+    response_model=ConsentStatusResponse,
+    summary="Get consent status",
+    dependencies=[Depends(rate_limit("polling"))],
+)
 async def get_consent_status(
     consent_id: UUID,
     request: Request,
@@ -26,7 +32,7 @@ async def get_consent_status(
 
     inc_consents_status_poll()
 
-    obj = get_by_id(db, consent_id)
+    obj = get_status_view(db, consent_id)
     if not obj:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="not_found")
 
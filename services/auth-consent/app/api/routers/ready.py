@@ -0,0 +1,14 @@
+from fastapi import APIRouter, Response, status
+
+from app.core.config import settings
+from app.core.readiness import state
+
+router = APIRouter(tags=["health"])
+
+@router.get("/ready")
+def ready(response: Response):
+    # Reads cached warm-up/probe state only; never touches a dependency itself
+    ok = state.is_ready(settings.READINESS_REQUIRED, settings.READINESS_MAX_PROBE_AGE_SECONDS)
+    if not ok:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return {"status": "ready" if ok else "not_ready", **state.snapshot()}
@@ -0,0 +1,58 @@
+from __future__ import annotations
+from typing import List, Literal, Optional
+from uuid import UUID
+from datetime import date, datetime
+from pydantic import BaseModel, Field
+
+RevocationSelector = Literal["psu_id", "tpp_client_id", "tenant_id"]
+RevocationJobStatus = Literal["PENDING", "RUNNING", "COMPLETED", "CANCELLED", "FAILED"]
+
+class RevocationJobCreateRequest(BaseModel):
+    selector: RevocationSelector
+    value: str = Field(min_length=1, max_length=256)
+    reason: Optional[str] = Field(default=None, max_length=500)
+
+class RevocationJobResponse(BaseModel):
+    id: UUID
+    selector: RevocationSelector
+    value: str
+    reason: Optional[str] = None
+    requested_by: Optional[str] = None
+    status: RevocationJobStatus
+    revoked_count: int
+    batches: int
+    attempts: int
+    last_error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    @classmethod
+    def from_row(cls, row) -> "RevocationJobResponse":
+        return cls(**{name: getattr(row, name) for name in cls.model_fields})
+
+ConsentStatsDimension = Literal["tenant_id", "tpp_client_id", "day", "status"]
+
+class ConsentStatsRow(BaseModel):
+    tenant_id: Optional[str] = None
+    tpp_client_id: Optional[str] = None
+    day: Optional[date] = None
+    status: Optional[str] = None
+    count: int
+
+class ConsentStatsResponse(BaseModel):
+    group_by: List[ConsentStatsDimension]
+    total: int
+    rows: List[ConsentStatsRow]
+    truncated: bool = False
+
+FaultDependency = Literal["redis", "db", "oidc"]
+
+class FaultSpecModel(BaseModel):
+    latency_ms: float = Field(default=0.0, ge=0, le=60_000)
+    distribution: Literal["fixed", "uniform", "exponential"] = "fixed"
+    tail_rate: float = Field(default=0.0, ge=0, le=1)
+    tail_ms: float = Field(default=0.0, ge=0, le=60_000)
+    error_rate: float = Field(default=0.0, ge=0, le=1)
+    hang_rate: float = Field(default=0.0, ge=0, le=1)
+    hang_seconds: Optional[float] = Field(default=None, ge=0, le=600)
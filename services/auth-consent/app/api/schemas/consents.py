@@ -64,6 +64,18 @@ class ConsentStatusResponse(BaseModel):
     correlation_id: UUID
 
 
+class ConsentStatusEvent(BaseModel):
+    from_status: Optional[Literal["PENDING_SCA", "GRANTED", "REJECTED", "EXPIRED", "REVOKED"]] = None
+    to_status: Literal["PENDING_SCA", "GRANTED", "REJECTED", "EXPIRED", "REVOKED"]
+    actor: str
+    correlation_id: Optional[str] = None
+    ts: datetime
+
+class ConsentHistoryResponse(BaseModel):
+    id: UUID
+    events: List[ConsentStatusEvent]
+    correlation_id: UUID
+
 class ProviderRefs(BaseModel):
     sca_id: Optional[str] = None
 
@@ -0,0 +1,31 @@
+"""
+Announces revoked consent ids on a Redis pub/sub channel
+(CONSENT_INVALIDATION_CHANNEL) so components that cache consent state outside
+this service (gateways, resource servers) can drop them immediately instead of
+waiting for their TTL. Message: {"event": "consent.revoked", "ids": [...]}.
+
+Best effort: a failed publish is logged, never raised; consumers must still
+bound their cache TTLs.
+"""
+from __future__ import annotations
+import json
+import logging
+from typing import Iterable
+
+from app.core.config import settings
+
+_MAX_IDS_PER_MESSAGE = 500
+
+async def publish_revoked(consent_ids: Iterable) -> None:
+    channel = settings.CONSENT_INVALIDATION_CHANNEL
+    ids = [str(i) for i in consent_ids]
+    if not channel or not ids:
+        return
+    from app.cache.redis_client import get_redis
+    try:
+        r = get_redis()
+        for start in range(0, len(ids), _MAX_IDS_PER_MESSAGE):
+            chunk = ids[start:start + _MAX_IDS_PER_MESSAGE]
+            await r.publish(channel, json.dumps({"event": "consent.revoked", "ids": chunk}))
+    except Exception as exc:
+        logging.getLogger("invalidation").warning("invalidation_publish_failed count=%d error=%s", len(ids), exc)
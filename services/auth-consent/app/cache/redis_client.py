@@ -1,16 +1,186 @@
+"""
+Shared Redis client.
+
+REDIS_URL selects the deployment shape:
+    redis://host:6379/0, rediss://..., unix://...    single node (pooled)
+    redis+sentinel://s1:26379,s2:26379/mymaster/0    Sentinel-managed primary
+    redis+cluster://n1:6379,n2:6379                   Redis Cluster
+
+Single-node connections come from a bounded, instrumented
+BlockingConnectionPool: callers wait up to REDIS_POOL_TIMEOUT_SECONDS for a
+free connection instead of opening unbounded sockets under load.
+"""
 from __future__ import annotations
-from typing import Optional
-from redis.asyncio import from_url, Redis
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlsplit
+
 from app.core.config import settings
 
-_client: Optional[Redis] = None
+if TYPE_CHECKING:
+    from redis.asyncio import Redis
+
+_client: Optional["Redis"] = None
+
+def _parse_hosts(netloc: str, default_port: int) -> List[Tuple[str, int]]:
+    hosts = []
+    for part in netloc.rsplit("@", 1)[-1].split(","):
+        host, _, port = part.partition(":")
+        hosts.append((host, int(port or default_port)))
+    return hosts
+
+def _common_kwargs() -> Dict[str, Any]:
+    from redis.asyncio.retry import Retry
+    from redis.backoff import ExponentialBackoff
+    from redis.exceptions import ConnectionError, TimeoutError
+
+    return {
+        "encoding": "utf-8",
+        "decode_responses": True,  # store/read JSON strings
+        "socket_timeout": settings.REDIS_SOCKET_TIMEOUT_SECONDS,
+        "socket_connect_timeout": settings.REDIS_CONNECT_TIMEOUT_SECONDS,
+        "health_check_interval": settings.REDIS_HEALTH_CHECK_SECONDS,
+        "retry": Retry(ExponentialBackoff(cap=0.5, base=0.01), settings.REDIS_RETRY_ATTEMPTS),
+        "retry_on_error": [ConnectionError, TimeoutError],
+    }
+
+def _credentials(parts) -> Dict[str, Any]:
+    return {"username": parts.username or None, "password": parts.password or None}
+
+def _build_client() -> "Redis":
+    url = settings.REDIS_URL
+    parts = urlsplit(url)
+
+    if parts.scheme == "redis+cluster":
+        from redis.asyncio.cluster import ClusterNode, RedisCluster
+        return RedisCluster(
+            startup_nodes=[ClusterNode(h, p) for h, p in _parse_hosts(parts.netloc, 6379)],
+            max_connections=settings.REDIS_MAX_CONNECTIONS,  # per node
+            **_credentials(parts),
+            **_common_kwargs(),
+        )
+
+    if parts.scheme == "redis+sentinel":
+        from redis.asyncio.sentinel import Sentinel
+        path = [p for p in parts.path.split("/") if p]
+        service = path[0] if path else settings.REDIS_SENTINEL_SERVICE
+        db = int(path[1]) if len(path) > 1 else 0
+        sentinel = Sentinel(
+            _parse_hosts(parts.netloc, 26379),
+            sentinel_kwargs={"socket_timeout": settings.REDIS_SOCKET_TIMEOUT_SECONDS},
+        )
+        return sentinel.master_for(
+            service,
+            db=db,
+            max_connections=settings.REDIS_MAX_CONNECTIONS,
+            **_credentials(parts),
+            **_common_kwargs(),
+        )
+
+    from redis.asyncio import Redis
+    pool = _instrumented_pool_class().from_url(
+        url,
+        max_connections=settings.REDIS_MAX_CONNECTIONS,
+        timeout=settings.REDIS_POOL_TIMEOUT_SECONDS,
+        **_common_kwargs(),
+    )
+    return Redis(connection_pool=pool)
+
+def _instrumented_pool_class():
+    from redis.asyncio import BlockingConnectionPool
+    from redis.exceptions import ConnectionError
+    from app.core.metrics import inc_redis_pool_timeout, observe_redis_pool_wait, set_redis_pool_state
 
-def get_redis() -> Redis:
+    class InstrumentedBlockingPool(BlockingConnectionPool):
+        """Exports in-use/idle connection counts and time spent waiting for a connection."""
+
+        def _report(self) -> None:
+            set_redis_pool_state(len(self._in_use_connections), len(self._available_connections), self.max_connections)
+
+        async def get_connection(self, *args, **kwargs):
+            start = time.perf_counter()
+            try:
+                conn = await super().get_connection(*args, **kwargs)
+            except ConnectionError:
+                if time.perf_counter() - start >= (self.timeout or 0):
+                    inc_redis_pool_timeout()
+                raise
+            observe_redis_pool_wait(time.perf_counter() - start)
+            self._report()
+            return conn
+
+        async def release(self, connection) -> None:
+            await super().release(connection)
+            self._report()
+
+    return InstrumentedBlockingPool
+
+def get_redis() -> "Redis":
     global _client
     if _client is None:
-        _client = from_url(
-            settings.REDIS_URL,
-            encoding="utf-8",
-            decode_responses=True,  # store/read JSON strings
-        )
+        # Imported on first use: processes that never touch Redis don't load it
+        _client = _build_client()
+        if settings.FAULT_INJECTION_ENABLED:
+            from app.core.faults import wrap_redis
+            _client = wrap_redis(_client)
     return _client
+
+# ---- Batching helpers -------------------------------------------------------
+
+async def get_many(keys: Iterable[str]) -> List[Optional[str]]:
+    """Values for `keys` in order, in one round trip (MGET; split per slot on Cluster)."""
+    keys = list(keys)
+    if not keys:
+        return []
+    r = get_redis()
+    if hasattr(r, "mget_nonatomic"):  # RedisCluster: keys may live on different nodes
+        return await r.mget_nonatomic(keys)
+    return await r.mget(keys)
+
+async def set_many(items: Dict[str, str], ex: Optional[int] = None) -> None:
+    """SET every item with an optional TTL, pipelined (no MULTI) into one round trip."""
+    if not items:
+        return
+    async with get_redis().pipeline(transaction=False) as pipe:
+        for key, value in items.items():
+            pipe.set(key, value, ex=ex)
+        await pipe.execute()
+
+# ---- Client-side cache ------------------------------------------------------
+
+class LocalCache:
+    """
+    Small in-process TTL cache for hot, read-mostly Redis values.
+
+    redis.asyncio has no RESP3 client tracking (server-assisted invalidation is
+    sync-client only), so entries are never invalidated early: only cache
+    values that are immutable once written, and keep the TTL short.
+    """
+
+    def __init__(self, max_entries: int = 10_000, ttl_seconds: float = 60.0) -> None:
+        self.max_entries = max_entries
+        self.ttl = ttl_seconds
+        self._data: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[Any]:
+        item = self._data.get(key)
+        if item is None:
+            return None
+        expires, value = item
+        if expires < time.monotonic():
+            self._data.pop(key, None)
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def put(self, key: str, value: Any) -> None:
+        if self.max_entries <= 0:
+            return
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        self._data.clear()
@@ -5,8 +5,12 @@ from contextvars import ContextVar
 
 _correlation_id: ContextVar[Optional[str]] = ContextVar("correlation_id", default=None)
 
+# Inbound ids end up in logs, response headers and metric exemplars (at most
+# 128 characters, label name included); anything longer or unprintable is replaced
+MAX_CORRELATION_ID_LENGTH = 100
+
 def set_correlation_id(value: Optional[str]) -> str:
-    if not value:
+    if not value or len(value) > MAX_CORRELATION_ID_LENGTH or not (value.isascii() and value.isprintable()):
         value = str(uuid.uuid4())
     _correlation_id.set(value)
     return value
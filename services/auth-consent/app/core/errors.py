@@ -18,6 +18,13 @@ _MESSAGES = {
     "idempotency_conflict": "The Idempotency-Key conflicts with a prior request.",
     "invalid_state": "The resource is not in a valid state for this operation.",
     "missing Idempotency-Key": "Idempotency-Key header is required.",
+    "rate_limited": "Too many requests; retry after the indicated delay.",
+    "overloaded": "The service is temporarily overloaded; retry after the indicated delay.",
+    "insufficient_permissions": "The access token lacks a required role.",
+    "profile_in_progress": "Another profiling session is already running.",
+    "sca_provider_unavailable": "The SCA provider is unavailable; retry later.",
+    "sca_provider_timeout": "The SCA provider did not respond in time; retry later.",
+    "sca_provider_rejected": "The SCA provider rejected the request.",
 }
 
 def _normalize_detail(detail: Any) -> str:
@@ -38,7 +45,8 @@ def _build_error(code: str, status_code: int, message: Optional[str] = None) ->
 async def http_exception_handler(request: Request, exc: StarletteHTTPException):
     code = _normalize_detail(exc.detail)
     payload = _build_error(code, exc.status_code)
-    return JSONResponse(status_code=exc.status_code, content=payload)
+    # Keep headers such as Retry-After / WWW-Authenticate set by the raiser
+    return JSONResponse(status_code=exc.status_code, content=payload, headers=getattr(exc, "headers", None))
 
 async def validation_exception_handler(request: Request, exc: RequestValidationError):
     payload = {
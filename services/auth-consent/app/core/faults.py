@@ -0,0 +1,203 @@
+"""
+Dependency fault injection, for resilience tests and benchmarks only.
+
+With FAULT_INJECTION_ENABLED, calls to each dependency pass through an
+injection point that can add latency, fail, or hang:
+
+    redis   every command and pipeline of the shared client (app.cache.redis_client)
+    db      every statement on every SQLAlchemy engine (before_cursor_execute)
+    oidc    every request of the shared HTTP client (OIDC discovery, JWKS)
+
+Faults are configured per dependency with FAULTS at startup or at runtime via
+/admin/faults, and raise the exception the real dependency would (redis
+ConnectionError/TimeoutError, SQLAlchemy OperationalError, httpx
+ConnectError/ReadTimeout), so timeouts, fallbacks and load shedding see
+exactly what they would in an incident. A hang sleeps for `hang_seconds`
+(default: the client's own timeout) and then raises the timeout error.
+
+When disabled nothing is installed and the clients are built unwrapped.
+"""
+from __future__ import annotations
+import asyncio
+import random
+import time
+from dataclasses import asdict, dataclass, fields
+from typing import Callable, Dict, Optional
+
+from app.core.config import settings
+
+DEPENDENCIES = ("redis", "db", "oidc")
+
+@dataclass
+class FaultSpec:
+    latency_ms: float = 0.0
+    distribution: str = "fixed"   # fixed | uniform (0..2x mean) | exponential (mean)
+    tail_rate: float = 0.0        # share of calls that take tail_ms instead
+    tail_ms: float = 0.0
+    error_rate: float = 0.0
+    hang_rate: float = 0.0
+    hang_seconds: Optional[float] = None
+
+    def delay(self) -> float:
+        if self.tail_rate and random.random() < self.tail_rate:
+            return self.tail_ms / 1000
+        mean = self.latency_ms / 1000
+        if self.distribution == "uniform":
+            return random.uniform(0, 2 * mean)
+        if self.distribution == "exponential":
+            return random.expovariate(1 / mean) if mean > 0 else 0.0
+        return mean
+
+    def decide(self) -> str:
+        """What this call does: "hang", "error" or "pass" (after delay())."""
+        roll = random.random()
+        if roll < self.hang_rate:
+            return "hang"
+        if roll < self.hang_rate + self.error_rate:
+            return "error"
+        return "pass"
+
+class FaultInjector:
+    def __init__(self) -> None:
+        self._specs: Dict[str, FaultSpec] = {}
+
+    def get(self, dependency: str) -> Optional[FaultSpec]:
+        return self._specs.get(dependency)
+
+    def set(self, dependency: str, spec: FaultSpec) -> None:
+        if dependency not in DEPENDENCIES:
+            raise ValueError(f"unknown dependency {dependency!r}")
+        if spec.distribution not in ("fixed", "uniform", "exponential"):
+            raise ValueError(f"unknown distribution {spec.distribution!r}")
+        self._specs[dependency] = spec
+
+    def clear(self, dependency: Optional[str] = None) -> None:
+        if dependency is None:
+            self._specs.clear()
+        else:
+            self._specs.pop(dependency, None)
+
+    def snapshot(self) -> Dict[str, dict]:
+        return {dep: asdict(spec) for dep, spec in self._specs.items()}
+
+    async def apply(self, dependency: str, error: Callable[[], Exception], timeout: Callable[[], Exception], hang_default: float) -> None:
+        spec = self._specs.get(dependency)
+        if spec is None:
+            return
+        delay, action = spec.delay(), spec.decide()
+        if delay:
+            await asyncio.sleep(delay)
+        self._finish(dependency, spec, action, error, timeout)
+        if action == "hang":
+            await asyncio.sleep(spec.hang_seconds if spec.hang_seconds is not None else hang_default)
+            raise timeout()
+
+    def apply_sync(self, dependency: str, error: Callable[[], Exception], timeout: Callable[[], Exception], hang_default: float) -> None:
+        # Sync drivers block their thread (or the event loop, if called there) exactly like a slow server
+        spec = self._specs.get(dependency)
+        if spec is None:
+            return
+        delay, action = spec.delay(), spec.decide()
+        if delay:
+            time.sleep(delay)
+        self._finish(dependency, spec, action, error, timeout)
+        if action == "hang":
+            time.sleep(spec.hang_seconds if spec.hang_seconds is not None else hang_default)
+            raise timeout()
+
+    @staticmethod
+    def _finish(dependency: str, spec: FaultSpec, action: str, error, timeout) -> None:
+        from app.core.metrics import inc_fault_injected
+        if spec.latency_ms or spec.tail_rate:
+            inc_fault_injected(dependency, "latency")
+        if action != "pass":
+            inc_fault_injected(dependency, action)
+        if action == "error":
+            raise error()
+
+faults = FaultInjector()
+
+def enabled() -> bool:
+    return settings.FAULT_INJECTION_ENABLED
+
+def spec_from_dict(data: dict) -> FaultSpec:
+    known = {f.name for f in fields(FaultSpec)}
+    unknown = set(data) - known
+    if unknown:
+        raise ValueError(f"unknown fault settings: {sorted(unknown)}")
+    return FaultSpec(**data)
+
+def install() -> None:
+    """Load FAULTS and hook the SQLAlchemy engines (Redis and HTTP are wrapped when their clients are built)."""
+    if not enabled():
+        return
+    for dependency, data in settings.FAULTS.items():
+        faults.set(dependency, spec_from_dict(data))
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+    if not event.contains(Engine, "before_cursor_execute", _db_fault):
+        event.listen(Engine, "before_cursor_execute", _db_fault)
+
+# ---- Injection points -----------------------------------------------------------
+
+def _db_fault(conn, cursor, statement, parameters, context, executemany) -> None:
+    from sqlalchemy.exc import OperationalError
+    faults.apply_sync(
+        "db",
+        lambda: OperationalError(statement, parameters, ConnectionError("injected fault: server closed the connection")),
+        lambda: OperationalError(statement, parameters, TimeoutError("injected fault: canceling statement due to statement timeout")),
+        hang_default=30.0,
+    )
+
+def wrap_redis(client):
+    """Route the client's commands and pipelines through the "redis" injection point."""
+    from redis.exceptions import ConnectionError, TimeoutError
+
+    async def inject():
+        await faults.apply(
+            "redis",
+            lambda: ConnectionError("injected fault: connection refused"),
+            lambda: TimeoutError("injected fault: timeout reading from socket"),
+            hang_default=settings.REDIS_SOCKET_TIMEOUT_SECONDS,
+        )
+
+    execute_command = client.execute_command
+    pipeline = client.pipeline
+
+    async def faulty_execute_command(*args, **options):
+        await inject()
+        return await execute_command(*args, **options)
+
+    def faulty_pipeline(*args, **kwargs):
+        pipe = pipeline(*args, **kwargs)
+        execute = pipe.execute
+
+        async def faulty_execute(*a, **kw):
+            await inject()
+            return await execute(*a, **kw)
+
+        pipe.execute = faulty_execute
+        return pipe
+
+    client.execute_command = faulty_execute_command
+    client.pipeline = faulty_pipeline
+    return client
+
+def http_transport(dependency: str, inner, timeout_seconds: float):
+    """httpx transport that passes each request through the `dependency` injection point."""
+    import httpx
+
+    class FaultyTransport(httpx.AsyncBaseTransport):
+        async def handle_async_request(self, request):
+            await faults.apply(
+                dependency,
+                lambda: httpx.ConnectError("injected fault: connection refused", request=request),
+                lambda: httpx.ReadTimeout("injected fault: read timed out", request=request),
+                hang_default=timeout_seconds,
+            )
+            return await inner.handle_async_request(request)
+
+        async def aclose(self) -> None:
+            await inner.aclose()
+
+    return FaultyTransport()
@@ -0,0 +1,38 @@
+"""
+Process-wide httpx.AsyncClient for outbound calls on request paths (OIDC
+discovery, JWKS), so they reuse pooled keep-alive connections instead of a
+TCP + TLS handshake per call. httpx is imported on first use.
+
+The webhook dispatcher keeps its own client: its pool limits and timeouts are
+sized for fan-out delivery, not for the IdP.
+"""
+from __future__ import annotations
+from typing import TYPE_CHECKING, Optional
+
+from app.core.config import settings
+
+if TYPE_CHECKING:
+    import httpx
+
+_client: Optional["httpx.AsyncClient"] = None
+
+def get_http_client() -> "httpx.AsyncClient":
+    global _client
+    if _client is None or _client.is_closed:
+        import httpx
+        limits = httpx.Limits(
+            max_connections=settings.HTTP_CLIENT_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.HTTP_CLIENT_MAX_CONNECTIONS,
+        )
+        transport = None
+        if settings.FAULT_INJECTION_ENABLED:
+            from app.core.faults import http_transport
+            transport = http_transport("oidc", httpx.AsyncHTTPTransport(limits=limits), settings.HTTP_CLIENT_TIMEOUT_SECONDS)
+        _client = httpx.AsyncClient(timeout=settings.HTTP_CLIENT_TIMEOUT_SECONDS, limits=limits, transport=transport)
+    return _client
+
+async def close_http_client() -> None:
+    global _client
+    client, _client = _client, None
+    if client is not None:
+        await client.aclose()
@@ -0,0 +1,99 @@
+"""
+Event-loop lag monitor.
+
+A heartbeat task sleeps for `interval` and records how late it woke up: that
+delay is how long every other coroutine on the loop waited too. Lags go to the
+event_loop_lag_seconds histogram; those over `warn_seconds` are also counted
+and logged.
+
+With capture_stacks (LOOP_LAG_CAPTURE_STACKS, for debugging) a watchdog thread
+notices a heartbeat that is overdue by `warn_seconds` *while* the loop is still
+blocked and logs the loop thread's stack and the running task, i.e. the
+offending call itself rather than whoever ran next.
+"""
+from __future__ import annotations
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from typing import Optional
+
+from app.core.metrics import observe_loop_lag
+
+_STACK_LIMIT = 40
+
+class LoopLagMonitor:
+    def __init__(self, interval_seconds: float = 0.25, warn_seconds: float = 0.1, capture_stacks: bool = False) -> None:
+        self.interval = interval_seconds
+        self.warn = warn_seconds
+        self.capture_stacks = capture_stacks
+        self._task: asyncio.Task | None = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._beat = time.monotonic()
+        self._reported = False
+        self._watchdog: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    async def start(self) -> None:
+        if self._task:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._beat = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.create_task(self._run(), name="loop-lag-monitor")
+        if self.capture_stacks:
+            self._watchdog = threading.Thread(target=self._watch, name="loop-lag-watchdog", daemon=True)
+            self._watchdog.start()
+
+    async def stop(self) -> None:
+        self._stop.set()
+        if self._watchdog:
+            self._watchdog.join(timeout=2)
+            self._watchdog = None
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            finally:
+                self._task = None
+
+    async def _run(self) -> None:
+        log = logging.getLogger("loop_monitor")
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - start - self.interval)
+            self._beat = time.monotonic()
+            self._reported = False
+            blocked = lag >= self.warn
+            observe_loop_lag(lag, blocked)
+            if blocked:
+                log.warning("event_loop_lag lag_ms=%.1f", lag * 1000)
+
+    def _watch(self) -> None:
+        log = logging.getLogger("loop_monitor")
+        while not self._stop.wait(self.warn / 2):
+            overdue = time.monotonic() - self._beat - self.interval
+            if overdue < self.warn or self._reported:
+                continue
+            self._reported = True  # once per stall; the next heartbeat re-arms it
+            frame = sys._current_frames().get(self._loop_thread_id)
+            stack = "".join(traceback.format_stack(frame, limit=_STACK_LIMIT)) if frame else "<no frame>"
+            try:
+                task = asyncio.current_task(self._loop)
+            except RuntimeError:
+                task = None
+            log.warning(
+                "event_loop_blocked blocked_ms=%.0f task=%s coro=%s\n%s",
+                overdue * 1000,
+                task.get_name() if task else None,
+                getattr(task.get_coro(), "__qualname__", None) if task else None,
+                stack,
+            )
@@ -1,13 +1,23 @@
 from __future__ import annotations
 
+import asyncio
 import time
-from typing import Iterable
+from typing import Dict, Iterable, Tuple
 
 from fastapi import APIRouter, Request, Response
 from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.responses import PlainTextResponse
 
-from prometheus_client import Counter, Histogram, generate_latest, CONTENT_TYPE_LATEST
+from prometheus_client import REGISTRY, Counter, Gauge, Histogram, generate_latest, CONTENT_TYPE_LATEST
+from prometheus_client.openmetrics.exposition import (
+    CONTENT_TYPE_LATEST as OPENMETRICS_CONTENT_TYPE,
+    generate_latest as generate_openmetrics,
+)
+
+from app.core.config import settings
+from app.utils.topk import TopKLabels
+
+# Label for requests that matched no route (scanners, typos): raw paths would be unbounded
+UNMATCHED_ROUTE = "__unmatched__"
 
 # Metric objects (singletons)
 # Business counters
@@ -24,11 +34,172 @@ consents_status_poll_total = Counter(
     "Total number of consent status polls"
 )
 
-# Request latency histogram (seconds), labeled by route template and status code
+rate_limited_total = Counter(
+    "rate_limited_total",
+    "Requests rejected with 429 by the per-TPP rate limiter",
+    labelnames=("route_class",),
+)
+
+# Admission control (load shedding)
+admission_concurrency_limit = Gauge(
+    "admission_concurrency_limit",
+    "Current adaptive concurrency limit"
+)
+admission_inflight = Gauge(
+    "admission_inflight",
+    "Requests currently admitted and in flight"
+)
+admission_shed_total = Counter(
+    "admission_shed_total",
+    "Requests rejected with 503 by admission control",
+    labelnames=("priority",),
+)
+
+# Redis connection pool
+redis_pool_connections = Gauge(
+    "redis_pool_connections",
+    "Redis pool connections by state (in_use, idle, max)",
+    labelnames=("state",),
+)
+redis_pool_wait_seconds = Histogram(
+    "redis_pool_wait_seconds",
+    "Time spent waiting to check out a Redis connection",
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+redis_pool_timeouts_total = Counter(
+    "redis_pool_timeouts_total",
+    "Redis connection checkouts that gave up waiting for a free connection",
+)
+
+# Webhook outbox delivery
+webhook_deliveries_total = Counter(
+    "webhook_deliveries_total",
+    "Webhook outbox rows processed, by outcome (delivered, retry, dead, discarded)",
+    labelnames=("outcome",),
+)
+webhook_delivery_latency_seconds = Histogram(
+    "webhook_delivery_latency_seconds",
+    "Latency of a single webhook POST in seconds",
+)
+webhook_outbox_pending = Gauge(
+    "webhook_outbox_pending",
+    "Number of webhook outbox rows waiting for delivery"
+)
+webhook_outbox_lag_seconds = Gauge(
+    "webhook_outbox_lag_seconds",
+    "Age in seconds of the oldest undelivered webhook outbox row"
+)
+
+# Expiry reminder emails (app/housekeeping/reminders.py)
+expiry_reminders_total = Counter(
+    "expiry_reminders_total",
+    "Consent expiry reminders processed, by outcome (sent, retry, dead, discarded)",
+    labelnames=("outcome",),
+)
+expiry_reminder_emails_total = Counter(
+    "expiry_reminder_emails_total",
+    "Per-PSU reminder digest emails, by outcome (sent, retry, dead)",
+    labelnames=("outcome",),
+)
+expiry_reminder_send_seconds = Histogram(
+    "expiry_reminder_send_seconds",
+    "Time to hand one digest to the SMTP relay, pool and rate-limit waits included",
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+expiry_reminders_backlog = Gauge(
+    "expiry_reminders_backlog",
+    "Consents inside the reminder window not reminded yet"
+)
+expiry_reminder_lag_seconds = Gauge(
+    "expiry_reminder_lag_seconds",
+    "How long the oldest not-yet-reminded consent has been inside the reminder window"
+)
+
+# Bulk revocation jobs
+bulk_revocation_revoked_total = Counter(
+    "bulk_revocation_revoked_total",
+    "Consents revoked by bulk revocation jobs",
+    labelnames=("selector",),
+)
+bulk_revocation_batch_seconds = Histogram(
+    "bulk_revocation_batch_seconds",
+    "Duration of one bulk revocation batch transaction",
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+bulk_revocation_jobs_total = Counter(
+    "bulk_revocation_jobs_total",
+    "Bulk revocation jobs finished, by outcome (completed, cancelled, failed)",
+    labelnames=("outcome",),
+)
+
+# Consent counts by current status (from consent_stats; status is the only label)
+consents_by_status = Gauge(
+    "consents_by_status",
+    "Consents by current status, all tenants and TPPs, archived included",
+    labelnames=("status",),
+)
+
+# Event loop health (app/core/loop_monitor.py)
+event_loop_lag_seconds = Histogram(
+    "event_loop_lag_seconds",
+    "How late the loop monitor's heartbeat woke up (time other coroutines also waited)",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+event_loop_blocked_total = Counter(
+    "event_loop_blocked_total",
+    "Heartbeats delayed by more than LOOP_LAG_WARN_SECONDS",
+)
+
+# External SCA providers (app/services/sca_providers.py)
+sca_provider_latency_seconds = Histogram(
+    "sca_provider_latency_seconds",
+    "SCA provider call latency including hedging, by outcome (ok, rejected, timeout, error, cancelled, circuit_open)",
+    labelnames=("provider", "operation", "outcome"),
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+sca_provider_hedges_total = Counter(
+    "sca_provider_hedges_total",
+    "Hedged duplicate requests sent to an SCA provider",
+    labelnames=("provider",),
+)
+sca_provider_circuit_open = Gauge(
+    "sca_provider_circuit_open",
+    "1 while the provider's circuit breaker rejects calls (open), 0.5 half-open, 0 closed",
+    labelnames=("provider",),
+)
+sca_callback_rejected_total = Counter(
+    "sca_callback_rejected_total",
+    "SCA callbacks rejected before any DB access, by reason (malformed, bad_signature, expired, ...)",
+    labelnames=("reason",),
+)
+
+# Fault injection (app/core/faults.py; test/bench builds only)
+faults_injected_total = Counter(
+    "faults_injected_total",
+    "Injected dependency faults, by dependency and kind (latency, error, hang)",
+    labelnames=("dependency", "kind"),
+)
+
+# Request latency histogram (seconds), labeled by route template and status code.
+# Slow requests carry their correlation id as an exemplar (OpenMetrics scrapes only).
 request_latency_seconds = Histogram(
     "request_latency_seconds",
     "HTTP request latency in seconds",
     labelnames=("route", "status_code"),
+    buckets=settings.METRICS_LATENCY_BUCKETS,
+)
+
+# Per-TPP traffic; only the METRICS_TPP_TOP_K busiest TPPs get their own label, the rest are "other"
+tpp_requests_total = Counter(
+    "tpp_requests_total",
+    "Requests by authenticated TPP (top K, others aggregated) and status class",
+    labelnames=("tpp_client_id", "status_class"),
+)
+tpp_request_latency_seconds = Histogram(
+    "tpp_request_latency_seconds",
+    "Request latency by authenticated TPP (top K, others aggregated)",
+    labelnames=("tpp_client_id",),
+    buckets=settings.METRICS_LATENCY_BUCKETS,
 )
 
 # Public helpers to increment business metrics
@@ -41,11 +212,112 @@ def inc_consents_revoked() -> None:
 def inc_consents_status_poll() -> None:
     consents_status_poll_total.inc()
 
+def inc_rate_limited(route_class: str) -> None:
+    rate_limited_total.labels(route_class=route_class).inc()
+
+def inc_admission_shed(priority: str) -> None:
+    admission_shed_total.labels(priority=priority).inc()
+
+def set_admission_state(limit: float, inflight: int) -> None:
+    admission_concurrency_limit.set(limit)
+    admission_inflight.set(inflight)
+
+def set_redis_pool_state(in_use: int, idle: int, max_connections: int) -> None:
+    redis_pool_connections.labels(state="in_use").set(in_use)
+    redis_pool_connections.labels(state="idle").set(idle)
+    redis_pool_connections.labels(state="max").set(max_connections)
+
+def observe_redis_pool_wait(seconds: float) -> None:
+    redis_pool_wait_seconds.observe(seconds)
+
+def inc_redis_pool_timeout() -> None:
+    redis_pool_timeouts_total.inc()
+
+def inc_webhook_delivery(outcome: str) -> None:
+    webhook_deliveries_total.labels(outcome=outcome).inc()
+
+def observe_webhook_delivery_latency(seconds: float) -> None:
+    webhook_delivery_latency_seconds.observe(seconds)
+
+def set_webhook_backlog(pending: int, lag_seconds: float) -> None:
+    webhook_outbox_pending.set(pending)
+    webhook_outbox_lag_seconds.set(lag_seconds)
+
+def inc_expiry_reminders(outcome: str, count: int = 1) -> None:
+    expiry_reminders_total.labels(outcome=outcome).inc(count)
+
+def inc_expiry_reminder_email(outcome: str) -> None:
+    expiry_reminder_emails_total.labels(outcome=outcome).inc()
+
+def observe_expiry_reminder_send(seconds: float) -> None:
+    expiry_reminder_send_seconds.observe(seconds)
+
+def set_expiry_reminder_backlog(pending: int, lag_seconds: float) -> None:
+    expiry_reminders_backlog.set(pending)
+    expiry_reminder_lag_seconds.set(lag_seconds)
+
+def observe_bulk_revocation_batch(selector: str, revoked: int, seconds: float) -> None:
+    bulk_revocation_batch_seconds.observe(seconds)
+    if revoked:
+        bulk_revocation_revoked_total.labels(selector=selector).inc(revoked)
+        consents_revoked_total.inc(revoked)
+
+def inc_bulk_revocation_job(outcome: str, count: int = 1) -> None:
+    bulk_revocation_jobs_total.labels(outcome=outcome).inc(count)
+
+def set_consents_by_status(counts: dict) -> None:
+    for status, count in counts.items():
+        consents_by_status.labels(status=status).set(count)
+
+def observe_loop_lag(seconds: float, blocked: bool) -> None:
+    event_loop_lag_seconds.observe(seconds)
+    if blocked:
+        event_loop_blocked_total.inc()
+
+def observe_sca_provider_call(provider: str, operation: str, outcome: str, seconds: float) -> None:
+    sca_provider_latency_seconds.labels(provider=provider, operation=operation, outcome=outcome).observe(seconds)
+
+def inc_sca_provider_hedge(provider: str) -> None:
+    sca_provider_hedges_total.labels(provider=provider).inc()
+
+def set_sca_provider_circuit(provider: str, state: str) -> None:
+    value = {"closed": 0.0, "half_open": 0.5, "open": 1.0}[state]
+    sca_provider_circuit_open.labels(provider=provider).set(value)
+
+def inc_sca_callback_rejected(reason: str) -> None:
+    sca_callback_rejected_total.labels(reason=reason).inc()
+
+def inc_fault_injected(dependency: str, kind: str) -> None:
+    faults_injected_total.labels(dependency=dependency, kind=kind).inc()
+
+def _forget_tpp(tpp_client_id: str) -> None:
+    # Dropped out of the top K: its series go, later traffic counts as "other"
+    for status_class in ("1xx", "2xx", "3xx", "4xx", "5xx"):
+        try:
+            tpp_requests_total.remove(tpp_client_id, status_class)
+        except KeyError:
+            pass
+    try:
+        tpp_request_latency_seconds.remove(tpp_client_id)
+    except KeyError:
+        pass
+
+# prometheus_client caps exemplar labels at 128 characters, names and values together
+_EXEMPLAR_MAX_VALUE_LENGTH = 128 - len("correlation_id")
+
 # Middleware for request timing
 class MetricsMiddleware(BaseHTTPMiddleware):
-    def __init__(self, app, exclude_routes: Iterable[str] | None = None):
+    def __init__(
+        self,
+        app,
+        exclude_routes: Iterable[str] | None = None,
+        exemplar_min_seconds: float | None = None,
+        tpp_top_k: int = 0,
+    ):
         super().__init__(app)
         self.exclude_routes = set(exclude_routes or [])
+        self.exemplar_min_seconds = exemplar_min_seconds
+        self.tpps = TopKLabels(tpp_top_k, on_evict=_forget_tpp) if tpp_top_k > 0 else None
 
     async def dispatch(self, request: Request, call_next):
         # Skip by raw path if configured (avoid measuring /metrics and /health)
@@ -56,32 +328,81 @@ class MetricsMiddleware(BaseHTTPMiddleware):
         start = time.perf_counter()
         try:
             response: Response = await call_next(request)
-            status_code = str(response.status_code)
         except Exception:
             # Count exceptions as 500 for latency observation, then re-raise
-            status_code = "500"
-            duration = time.perf_counter() - start
-            route_tmpl = self._resolve_route_template(request)
-            request_latency_seconds.labels(route=route_tmpl, status_code=status_code).observe(duration)
+            self._observe(request, "500", time.perf_counter() - start)
             raise
+        self._observe(request, str(response.status_code), time.perf_counter() - start)
+        return response
 
-        duration = time.perf_counter() - start
+    def _observe(self, request: Request, status_code: str, duration: float) -> None:
         route_tmpl = self._resolve_route_template(request)
-        request_latency_seconds.labels(route=route_tmpl, status_code=status_code).observe(duration)
-        return response
+        exemplar = None
+        if self.exemplar_min_seconds is not None and duration >= self.exemplar_min_seconds:
+            cid = getattr(request.state, "correlation_id", None)
+            if cid and len(cid) <= _EXEMPLAR_MAX_VALUE_LENGTH:
+                exemplar = {"correlation_id": cid}
+        histogram = request_latency_seconds.labels(route=route_tmpl, status_code=status_code)
+        try:
+            histogram.observe(duration, exemplar)
+        except ValueError:
+            # A rejected exemplar must never turn into the request's response
+            histogram.observe(duration)
+        tpp = getattr(request.state, "tpp_client_id", None)
+        if self.tpps is not None and tpp:
+            label = self.tpps.label(tpp)
+            tpp_requests_total.labels(tpp_client_id=label, status_class=f"{status_code[0]}xx").inc()
+            tpp_request_latency_seconds.labels(tpp_client_id=label).observe(duration)
 
     @staticmethod
     def _resolve_route_template(request: Request) -> str:
-        # Prefer the route path template (low-cardinality), fallback to raw path when unknown (404)
-        route = request.scope.get("route")
-        if route and getattr(route, "path", None):
-            return route.path
-        return request.url.path  # fallback (rare)
+        return resolve_route_template(request.scope)
+
+def resolve_route_template(scope) -> str:
+    # Route path template (low-cardinality); every unmatched path shares one bucket
+    route = scope.get("route")
+    if route and getattr(route, "path", None):
+        return route.path
+    return UNMATCHED_ROUTE
+
+class ExpositionCache:
+    """
+    Rendered /metrics output, reused for `ttl_seconds`. Rendering walks the whole
+    registry, so scrapers arriving together (HA Prometheus pairs, ad-hoc curls)
+    share one render; it runs in a worker thread, off the event loop.
+    """
+
+    def __init__(self, registry=REGISTRY, ttl_seconds: float = 1.0) -> None:
+        self.registry = registry
+        self.ttl = ttl_seconds
+        self._rendered: Dict[bool, Tuple[float, bytes]] = {}
+        self._locks: Dict[bool, asyncio.Lock] = {}
+        self.renders = 0
+
+    async def get(self, openmetrics: bool = False) -> bytes:
+        cached = self._rendered.get(openmetrics)
+        if cached and time.monotonic() - cached[0] < self.ttl:
+            return cached[1]
+        lock = self._locks.setdefault(openmetrics, asyncio.Lock())
+        async with lock:
+            cached = self._rendered.get(openmetrics)  # rendered while we waited
+            if cached and time.monotonic() - cached[0] < self.ttl:
+                return cached[1]
+            from anyio import to_thread
+            render = generate_openmetrics if openmetrics else generate_latest
+            data = await to_thread.run_sync(render, self.registry)
+            self.renders += 1
+            self._rendered[openmetrics] = (time.monotonic(), data)
+            return data
+
+_exposition = ExpositionCache(ttl_seconds=settings.METRICS_CACHE_SECONDS)
 
 # /metrics router
 router = APIRouter()
 
 @router.get("/metrics", include_in_schema=False)
-async def metrics_endpoint():
-    data = generate_latest()  # Prometheus exposition text
-    return PlainTextResponse(content=data.decode("utf-8"), media_type=CONTENT_TYPE_LATEST)
+async def metrics_endpoint(request: Request):
+    # Exemplars only exist in the OpenMetrics format, which Prometheus asks for when they're enabled
+    openmetrics = "application/openmetrics-text" in request.headers.get("accept", "")
+    data = await _exposition.get(openmetrics)
+    return Response(content=data, media_type=OPENMETRICS_CONTENT_TYPE if openmetrics else CONTENT_TYPE_LATEST)
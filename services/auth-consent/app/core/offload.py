@@ -0,0 +1,36 @@
+"""
+Keeping blocking work off the event loop.
+
+Policy:
+- Network I/O on request paths uses async clients (app.core.http for HTTP,
+  redis.asyncio); sync clients such as urllib, requests or PyJWKClient don't
+  belong there.
+- Blocking calls in background jobs go through anyio.to_thread.run_sync.
+- CPU-heavy work (JWT signature verification) goes through run_cpu(): worker
+  threads under a dedicated limit of CPU_OFFLOAD_THREADS, so a token burst
+  can neither stall the loop nor take the default thread pool that sync
+  routes and DB work use.
+
+app.core.loop_monitor measures how well this holds (event_loop_lag_seconds).
+"""
+from __future__ import annotations
+import functools
+from typing import Any, Callable, Optional, TypeVar
+
+from anyio import CapacityLimiter, to_thread
+
+from app.core.config import settings
+
+T = TypeVar("T")
+
+_cpu_limiter: Optional[CapacityLimiter] = None
+
+def _limiter() -> CapacityLimiter:
+    global _cpu_limiter
+    if _cpu_limiter is None:
+        _cpu_limiter = CapacityLimiter(settings.CPU_OFFLOAD_THREADS)
+    return _cpu_limiter
+
+async def run_cpu(fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run CPU-bound `fn` in a worker thread, at most CPU_OFFLOAD_THREADS at a time."""
+    return await to_thread.run_sync(functools.partial(fn, *args, **kwargs), limiter=_limiter())
@@ -0,0 +1,233 @@
+"""
+In-process sampling profiler and memory snapshots for /admin/profile/* and /admin/memory/*.
+
+The sampler is a daemon thread that reads sys._current_frames() at a fixed
+rate and aggregates "collapsed" stacks (root;...;leaf count), the input
+format of flamegraph.pl, speedscope and inferno. No third-party profiler is
+needed.
+
+In continuous mode each sample taken on the event-loop thread is attributed
+to the route template of the request whose task is running at that moment
+(registered by ProfilingMiddleware), so hot routes get their own flamegraph.
+"""
+from __future__ import annotations
+import asyncio
+import sys
+import threading
+import time
+import tracemalloc
+import weakref
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.metrics import resolve_route_template
+
+_MAX_DEPTH = 64
+_MAX_STACKS = 20_000           # distinct stacks kept in continuous mode before folding
+_TRUNCATED = "[truncated]"
+
+# asyncio task -> ASGI scope of the request it is serving (continuous mode only)
+_task_scopes: "weakref.WeakKeyDictionary[asyncio.Task, Scope]" = weakref.WeakKeyDictionary()
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    module = frame.f_globals.get("__name__", "?")
+    return f"{module}:{code.co_name}"
+
+def _collapse(frame) -> str:
+    parts: List[str] = []
+    while frame is not None and len(parts) < _MAX_DEPTH:
+        parts.append(_frame_label(frame))
+        frame = frame.f_back
+    parts.reverse()
+    return ";".join(parts)
+
+class StackSampler:
+    """
+    Samples every thread's stack `hz` times per second.
+
+    With `loop` set, samples of the loop's thread are prefixed with the route
+    template of the request being served (or "[idle]"/"[background]").
+    """
+
+    def __init__(self, hz: float = 100.0, loop: Optional[asyncio.AbstractEventLoop] = None) -> None:
+        self.interval = 1.0 / hz
+        self.loop = loop
+        self.samples: Counter = Counter()
+        self.sample_count = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._loop_thread_id: Optional[int] = threading.get_ident() if loop else None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=2)
+            self._thread = None
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        names = {}
+        while not self._stop.wait(self.interval):
+            if len(names) != threading.active_count():
+                names = {t.ident: t.name for t in threading.enumerate()}
+            for tid, frame in sys._current_frames().items():
+                if tid == own:
+                    continue
+                stack = _collapse(frame)
+                if tid == self._loop_thread_id:
+                    prefix = self._current_route()
+                else:
+                    prefix = f"[thread {names.get(tid, tid)}]"
+                key = f"{prefix};{stack}"
+                if len(self.samples) >= _MAX_STACKS and key not in self.samples:
+                    key = f"{prefix};{_TRUNCATED}"
+                self.samples[key] += 1
+            self.sample_count += 1
+
+    def _current_route(self) -> str:
+        try:
+            task = asyncio.current_task(self.loop)
+        except RuntimeError:
+            task = None
+        if task is None:
+            return "[idle]"
+        scope = _task_scopes.get(task)
+        if scope is None:
+            return "[background]"
+        return resolve_route_template(scope)
+
+    def collapsed(self, route: Optional[str] = None) -> str:
+        lines = []
+        for stack, count in self.samples.most_common():
+            if route is not None and not stack.startswith(route + ";"):
+                continue
+            lines.append(f"{stack} {count}")
+        return "\n".join(lines) + "\n"
+
+    def per_route(self) -> Dict[str, int]:
+        totals: Counter = Counter()
+        for stack, count in self.samples.items():
+            totals[stack.split(";", 1)[0]] += count
+        return dict(totals.most_common())
+
+# ---- On-demand and continuous sessions ----------------------------------------
+
+_profile_lock = asyncio.Lock()
+_continuous: Optional[StackSampler] = None
+
+async def profile_for(seconds: float, hz: float) -> StackSampler:
+    """Run a time-boxed sampling session; raises RuntimeError if one is already running."""
+    if _profile_lock.locked():
+        raise RuntimeError("profile_in_progress")
+    async with _profile_lock:
+        sampler = StackSampler(hz=hz, loop=asyncio.get_running_loop())
+        sampler.start()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            sampler.stop()
+        return sampler
+
+def start_continuous(hz: float) -> StackSampler:
+    global _continuous
+    if _continuous is None:
+        _continuous = StackSampler(hz=hz, loop=asyncio.get_running_loop())
+        _continuous.start()
+    return _continuous
+
+def stop_continuous() -> Optional[StackSampler]:
+    global _continuous
+    sampler, _continuous = _continuous, None
+    if sampler:
+        sampler.stop()
+    return sampler
+
+def continuous() -> Optional[StackSampler]:
+    return _continuous
+
+class ProfilingMiddleware:
+    """
+    Innermost ASGI middleware: remembers which request scope each task serves,
+    so continuous samples can be attributed to a route. Costs one dict write
+    per request, and nothing when continuous mode is off.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if _continuous is None or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        task = asyncio.current_task()
+        if task is not None:
+            _task_scopes[task] = scope
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            if task is not None:
+                _task_scopes.pop(task, None)
+
+# ---- tracemalloc ----------------------------------------------------------------
+
+_baseline: Optional[tracemalloc.Snapshot] = None
+_FILTERS = [
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+]
+
+def _take_snapshot(frames: int) -> tracemalloc.Snapshot:
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(frames)
+    return tracemalloc.take_snapshot().filter_traces(_FILTERS)
+
+def _stat_dict(stat) -> Dict[str, Any]:
+    out = {
+        "where": [f"{f.filename}:{f.lineno}" for f in stat.traceback],
+        "size_bytes": stat.size,
+        "count": stat.count,
+    }
+    if hasattr(stat, "size_diff"):
+        out["size_diff_bytes"] = stat.size_diff
+        out["count_diff"] = stat.count_diff
+    return out
+
+def memory_snapshot(limit: int, frames: int) -> Dict[str, Any]:
+    """Start tracing if needed, store a baseline snapshot and return its top allocation sites."""
+    global _baseline
+    _baseline = _take_snapshot(frames)
+    current, peak = tracemalloc.get_traced_memory()
+    return {
+        "taken_at": time.time(),
+        "traced_current_bytes": current,
+        "traced_peak_bytes": peak,
+        "top": [_stat_dict(s) for s in _baseline.statistics("lineno")[:limit]],
+    }
+
+def memory_diff(limit: int, group_by: str = "lineno") -> Optional[Dict[str, Any]]:
+    """Allocation growth since the baseline snapshot, or None without a baseline."""
+    if _baseline is None or not tracemalloc.is_tracing():
+        return None
+    snap = tracemalloc.take_snapshot().filter_traces(_FILTERS)
+    stats = snap.compare_to(_baseline, group_by)
+    current, peak = tracemalloc.get_traced_memory()
+    return {
+        "traced_current_bytes": current,
+        "traced_peak_bytes": peak,
+        "top": [_stat_dict(s) for s in stats[:limit]],
+    }
+
+def memory_stop() -> None:
+    global _baseline
+    _baseline = None
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
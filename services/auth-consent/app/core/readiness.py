@@ -0,0 +1,58 @@
+"""
+Process-wide readiness state: whether startup warm-up finished, and the last
+result of each background dependency probe. /ready only reads this.
+"""
+from __future__ import annotations
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, Optional
+
+@dataclass
+class ProbeResult:
+    ok: bool
+    latency_ms: float
+    checked_at: float
+    error: Optional[str] = None
+
+@dataclass
+class ReadinessState:
+    warmed_up: bool = False
+    warmup_started_at: Optional[float] = None
+    warmup_finished_at: Optional[float] = None
+    warmup_steps: Dict[str, Any] = field(default_factory=dict)
+    probes: Dict[str, ProbeResult] = field(default_factory=dict)
+
+    def record_probe(self, name: str, ok: bool, latency_ms: float, error: Optional[str] = None) -> None:
+        self.probes[name] = ProbeResult(ok=ok, latency_ms=latency_ms, checked_at=time.time(), error=error)
+
+    def is_ready(self, required: Iterable[str], max_age_seconds: float) -> bool:
+        if not self.warmed_up:
+            return False
+        now = time.time()
+        for name in required:
+            p = self.probes.get(name)
+            if p is None or not p.ok or now - p.checked_at > max_age_seconds:
+                return False
+        return True
+
+    def snapshot(self) -> Dict[str, Any]:
+        now = time.time()
+        return {
+            "warmed_up": self.warmed_up,
+            "warmup_seconds": (
+                round(self.warmup_finished_at - self.warmup_started_at, 3)
+                if self.warmup_started_at and self.warmup_finished_at else None
+            ),
+            "warmup": self.warmup_steps,
+            "dependencies": {
+                name: {
+                    "ok": p.ok,
+                    "latency_ms": round(p.latency_ms, 2),
+                    "age_seconds": round(now - p.checked_at, 1),
+                    **({"error": p.error} if p.error else {}),
+                }
+                for name, p in self.probes.items()
+            },
+        }
+
+state = ReadinessState()
@@ -0,0 +1,136 @@
+"""
+Pooled SMTP delivery for background jobs (aiosmtplib, imported on first use).
+
+Up to `size` SMTP sessions are opened lazily and reused for many messages,
+so a batch costs one TCP/TLS handshake, EHLO and AUTH per session rather than
+per message. A session is recycled after `max_messages_per_connection`
+messages (relays cap transactions per session) and dropped on any connection
+error; the next send opens a fresh one. aiosmtplib runs MAIL/RCPT/DATA in
+lock-step, so throughput comes from the sessions sending concurrently; a token
+bucket keeps the overall rate within what the relay accepts.
+"""
+from __future__ import annotations
+import asyncio
+import logging
+import time
+from email.message import EmailMessage
+from typing import TYPE_CHECKING, List, Optional
+
+if TYPE_CHECKING:
+    import aiosmtplib
+
+log = logging.getLogger("smtp")
+
+class _TokenBucket:
+    def __init__(self, rate: float, burst: float) -> None:
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        # One waiter at a time: the others queue on the lock in arrival order
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+class _Session:
+    def __init__(self) -> None:
+        self.client: Optional["aiosmtplib.SMTP"] = None
+        self.sent = 0
+
+class SmtpPool:
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        *,
+        size: int = 4,
+        username: Optional[str] = None,
+        password: Optional[str] = None,
+        use_tls: bool = False,
+        start_tls: bool = False,
+        timeout_seconds: float = 10.0,
+        max_messages_per_connection: int = 100,
+        rate_per_second: Optional[float] = None,
+    ) -> None:
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.start_tls = start_tls
+        self.timeout = timeout_seconds
+        self.max_messages = max_messages_per_connection
+        self.connections_opened = 0
+        self._limiter = _TokenBucket(rate_per_second, burst=max(1.0, rate_per_second)) if rate_per_second else None
+        self._sessions: List[_Session] = [_Session() for _ in range(size)]
+        self._idle: asyncio.Queue[_Session] = asyncio.Queue()
+        for s in self._sessions:
+            self._idle.put_nowait(s)
+
+    async def send(self, message: EmailMessage) -> None:
+        """Send one message; aiosmtplib's SMTPException subclasses propagate."""
+        if self._limiter:
+            await self._limiter.acquire()
+        session = await self._idle.get()
+        try:
+            if session.client is None or not session.client.is_connected:
+                session.client = await self._connect()
+                session.sent = 0
+            try:
+                await session.client.send_message(message)
+            except OSError:
+                # Disconnects and timeouts (aiosmtplib's are OSErrors too): the session is unusable
+                await self._discard(session)
+                raise
+            session.sent += 1
+            if session.sent >= self.max_messages:
+                await self._discard(session)
+        finally:
+            self._idle.put_nowait(session)
+
+    async def _connect(self) -> "aiosmtplib.SMTP":
+        import aiosmtplib
+        client = aiosmtplib.SMTP(
+            hostname=self.host,
+            port=self.port,
+            timeout=self.timeout,
+            use_tls=self.use_tls,
+            start_tls=self.start_tls,
+            username=self.username,
+            password=self.password,
+        )
+        await client.connect()
+        self.connections_opened += 1
+        log.info("smtp_connected host=%s port=%d opened=%d", self.host, self.port, self.connections_opened)
+        return client
+
+    async def _discard(self, session: _Session) -> None:
+        client, session.client = session.client, None
+        if client is None or not client.is_connected:
+            return
+        try:
+            await client.quit()
+        except Exception:
+            client.close()
+
+    async def close(self) -> None:
+        for s in self._sessions:
+            await self._discard(s)
+
+def is_permanent(exc: BaseException) -> bool:
+    """A 5xx answer (bad recipient, message refused): retrying the same message won't help."""
+    import aiosmtplib
+    if isinstance(exc, aiosmtplib.SMTPRecipientsRefused):
+        return all(getattr(e, "code", 0) >= 500 for e in exc.recipients)
+    if isinstance(exc, aiosmtplib.SMTPResponseException):
+        return exc.code >= 500
+    return False
@@ -0,0 +1,158 @@
+"""
+Startup warm-up: pay first-request costs before the pod reports ready.
+
+Opens DB and Redis connections up front, preloads JWKS signing keys, executes
+the prebuilt read statements once, and runs every route's request/response
+validation and serialization on a sample payload. Each step is bounded and
+best-effort: a failing step is logged and recorded, never fatal.
+"""
+from __future__ import annotations
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict
+from uuid import uuid4
+
+from anyio import to_thread
+from fastapi import FastAPI
+from fastapi.routing import APIRoute
+
+from app.api.schemas.consents import (
+    ConsentAuthorizeResponse,
+    ConsentCreateRequest,
+    ConsentCreateResponse,
+    ConsentHistoryResponse,
+    ConsentReadResponse,
+    ConsentStatusResponse,
+)
+from app.cache.redis_client import get_redis
+from app.core.config import settings
+from app.core.readiness import state
+from app.db.shards import router as shards
+
+log = logging.getLogger("warmup")
+
+def _samples() -> Dict[type, Dict[str, Any]]:
+    now = datetime.now(timezone.utc)
+    cid = uuid4()
+    links = {"self": f"/consents/{cid}", "status": f"/consents/{cid}/status", "revoke": f"/consents/{cid}/revoke"}
+    next_action = {"type": "SCA_REDIRECT", "authorize_url": "https://sca.example/authorize"}
+    redirect_urls = {"success_url": "https://tpp.example/ok", "failure_url": "https://tpp.example/ko"}
+    return {
+        ConsentCreateRequest: {"permissions": ["accounts:read"], "redirect_urls": redirect_urls},
+        ConsentCreateResponse: {
+            "id": cid, "status": "PENDING_SCA", "type": "AIS", "permissions": ["accounts:read"],
+            "expires_at": now, "next_action": next_action, "links": links, "correlation_id": cid,
+        },
+        ConsentStatusResponse: {"id": cid, "status": "GRANTED", "expires_at": now, "correlation_id": cid},
+        ConsentReadResponse: {
+            "id": cid, "status": "GRANTED", "type": "AIS", "permissions": ["accounts:read"],
+            "expires_at": now, "recurring": True, "redirect_urls": redirect_urls,
+            "accounts": {"ids": ["acc-1"]}, "provider_refs": {"sca_id": "sca-1"}, "links": links,
+            "created_at": now, "updated_at": now, "correlation_id": cid,
+        },
+        ConsentAuthorizeResponse: {
+            "id": cid, "status": "PENDING_SCA", "sca_id": "sca-1", "next_action": next_action,
+            "deny_url": "https://sca.example/deny", "correlation_id": cid,
+        },
+        ConsentHistoryResponse: {
+            "id": cid,
+            "events": [{"from_status": None, "to_status": "PENDING_SCA", "actor": "tpp:warmup", "ts": now}],
+            "correlation_id": cid,
+        },
+    }
+
+def _open_db_connections(count: int) -> int:
+    # Hold them all at once so each pool actually creates `count` distinct connections
+    conns = []
+    try:
+        for shard in shards.shard_ids():
+            engine = shards.engine(shard)
+            per_shard = min(count, engine.pool.size()) if hasattr(engine.pool, "size") else count
+            for _ in range(per_shard):
+                conn = engine.connect()
+                conns.append(conn)
+                conn.exec_driver_sql("SELECT 1")
+    finally:
+        for conn in conns:
+            conn.close()
+    return len(conns)
+
+def _prime_read_statements() -> None:
+    # Compile the prebuilt Core statements into the SQL cache (lookups for a random id)
+    from app.repositories.consent_reads import get_record, get_status_view
+    db = shards.session()
+    try:
+        missing = uuid4()
+        get_status_view(db, missing)
+        get_record(db, missing)
+    finally:
+        db.close()
+
+async def _open_redis_connections(count: int) -> int:
+    # Concurrent commands each check out their own pooled connection
+    r = get_redis()
+    await asyncio.gather(*(r.ping() for _ in range(count)))
+    return count
+
+def _iter_api_routes(routes):
+    for route in routes:
+        if isinstance(route, APIRoute):
+            yield route
+        elif hasattr(route, "original_router"):  # newer FastAPI wraps included routers
+            yield from _iter_api_routes(route.original_router.routes)
+        elif hasattr(route, "routes"):
+            yield from _iter_api_routes(route.routes)
+
+def _dry_run_serialization(app: FastAPI) -> int:
+    samples = _samples()
+    done = 0
+    for route in _iter_api_routes(app.routes):
+        body_field = route.body_field
+        if body_field is not None:
+            sample = samples.get(getattr(body_field.field_info, "annotation", None))
+            if sample is not None:
+                body_field.validate(sample, {}, loc=("body",))
+                done += 1
+        if route.response_field is not None:
+            sample = samples.get(route.response_model)
+            if sample is not None:
+                value, errors = route.response_field.validate(sample, {}, loc=("response",))
+                if errors:
+                    raise ValueError(f"sample for {route.response_model.__name__} is invalid: {errors}")
+                route.response_field.serialize(value, mode="json")
+                done += 1
+    app.openapi()  # /docs and /openapi.json build this lazily otherwise
+    return done
+
+async def _step(name: str, coro) -> None:
+    start = time.perf_counter()
+    try:
+        result = await asyncio.wait_for(coro, timeout=settings.WARMUP_TIMEOUT_SECONDS)
+        state.warmup_steps[name] = {"ok": True, "result": result, "ms": round((time.perf_counter() - start) * 1000, 1)}
+    except Exception as e:
+        log.warning("warmup_step_failed step=%s error=%s", name, e)
+        state.warmup_steps[name] = {"ok": False, "error": type(e).__name__}
+
+async def warm_up(app: FastAPI) -> None:
+    state.warmup_started_at = time.time()
+    steps = [
+        _step("db_connections", to_thread.run_sync(_open_db_connections, settings.WARMUP_DB_CONNECTIONS)),
+        _step("redis_connections", _open_redis_connections(settings.WARMUP_REDIS_CONNECTIONS)),
+        _step("serialization", to_thread.run_sync(_dry_run_serialization, app)),
+    ]
+    if not settings.SKIP_JWT:
+        from app.security.jwt import preload_signing_keys
+        steps.append(_step("signing_keys", preload_signing_keys()))
+    await asyncio.gather(*steps)
+    # Separate step: needs the DB connections above, and the schema to exist
+    await _step("read_statements", to_thread.run_sync(_prime_read_statements))
+
+    state.warmup_finished_at = time.time()
+    state.warmed_up = True
+    log.info(
+        "warmup_complete seconds=%.3f failed=%s",
+        state.warmup_finished_at - state.warmup_started_at,
+        [n for n, s in state.warmup_steps.items() if not s["ok"]],
+    )
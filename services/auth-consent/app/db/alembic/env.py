@@ -10,16 +10,27 @@ from app.db.base import Base
 
 # import models so metadata is populated
 import app.models.consent  # noqa: F401
+import app.models.consent_event  # noqa: F401
+import app.models.webhook_outbox  # noqa: F401
+import app.models.revocation_job  # noqa: F401
+import app.models.expiry_reminder  # noqa: F401
 
 # this is the Alembic Config object
 config = context.config
 
-# set DB url from our settings (env), not alembic.ini
-config.set_main_option("sqlalchemy.url", settings.DATABASE_URL)
+# set DB url from our settings (env), not alembic.ini.
+# Each shard is migrated separately: `alembic -x shard=N upgrade head` (default 0 = DATABASE_URL),
+# or `python -m app.worker migrate` for all of them.
+_shard = int(context.get_x_argument(as_dictionary=True).get("shard", 0))
+if _shard:
+    config.set_main_option("sqlalchemy.url", settings.DATABASE_SHARDS[_shard])
+else:
+    config.set_main_option("sqlalchemy.url", settings.DATABASE_URL)
 
 # Interpret config file for Python logging.
+# (keeping loggers that already exist: app.db.migrations reports progress on "migrations")
 if config.config_file_name is not None:
-    fileConfig(config.config_file_name)
+    fileConfig(config.config_file_name, disable_existing_loggers=False)
 
 # target metadata for 'autogenerate'
 target_metadata = Base.metadata
@@ -1,5 +1,6 @@
 """add helpful indexes to consents"""
-from alembic import op
+
+from app.db.migrations import create_index_concurrently, drop_index_concurrently, outside_transaction
 
 # revision identifiers.
 revision = "0002_consents_indexes"
@@ -7,17 +8,21 @@ down_revision = "0001_baseline"
 branch_labels = None
 depends_on = None
 
+_INDEXES = (
+    ("idx_consents_tenant", "tenant_id"),
+    ("idx_consents_created_at", "created_at"),
+    ("idx_consents_status", "status"),
+    ("idx_consents_expires_at", "expires_at"),
+    ("idx_consents_tpp_client", "tpp_client_id"),
+)
+
 def upgrade() -> None:
-    # Use raw SQL so we can leverage Postgres IF NOT EXISTS (safe on existing dev DBs)
-    op.execute('CREATE INDEX IF NOT EXISTS idx_consents_tenant       ON consents (tenant_id)')
-    op.execute('CREATE INDEX IF NOT EXISTS idx_consents_created_at   ON consents (created_at)')
-    op.execute('CREATE INDEX IF NOT EXISTS idx_consents_status       ON consents (status)')
-    op.execute('CREATE INDEX IF NOT EXISTS idx_consents_expires_at   ON consents (expires_at)')
-    op.execute('CREATE INDEX IF NOT EXISTS idx_consents_tpp_client   ON consents (tpp_client_id)')
+    # CONCURRENTLY: writes to consents carry on while each index builds (skipped if it already exists)
+    with outside_transaction() as conn:
+        for name, column in _INDEXES:
+            create_index_concurrently(conn, name, "consents", column)
 
 def downgrade() -> None:
-    op.execute('DROP INDEX IF EXISTS idx_consents_tpp_client')
-    op.execute('DROP INDEX IF EXISTS idx_consents_expires_at')
-    op.execute('DROP INDEX IF EXISTS idx_consents_status')
-    op.execute('DROP INDEX IF EXISTS idx_consents_created_at')
-    op.execute('DROP INDEX IF EXISTS idx_consents_tenant')
+    with outside_transaction() as conn:
+        for name, _ in reversed(_INDEXES):
+            drop_index_concurrently(conn, name)
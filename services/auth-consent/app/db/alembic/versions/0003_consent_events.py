@@ -0,0 +1,49 @@
+"""consent_events: append-only status history, range-partitioned by month"""
+from alembic import op
+
+# revision identifiers.
+revision = "0003_consent_events"
+down_revision = "0002_consents_indexes"
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS consent_events (
+            id              BIGSERIAL,
+            ts              TIMESTAMPTZ NOT NULL DEFAULT now(),
+            consent_id      UUID NOT NULL,
+            from_status     VARCHAR(20),
+            to_status       VARCHAR(20) NOT NULL,
+            actor           TEXT NOT NULL,
+            correlation_id  TEXT,
+            PRIMARY KEY (id, ts)
+        ) PARTITION BY RANGE (ts)
+    """)
+    # Catch-all so inserts never fail if the maintainer falls behind
+    op.execute("CREATE TABLE IF NOT EXISTS consent_events_default PARTITION OF consent_events DEFAULT")
+    # Partitioned index: created on every current and future partition
+    op.execute("CREATE INDEX IF NOT EXISTS idx_consent_events_consent_ts ON consent_events (consent_id, ts)")
+
+    # Monthly partition helper, called by the housekeeping maintainer
+    op.execute("""
+        CREATE OR REPLACE FUNCTION consent_events_ensure_partition(p_month date) RETURNS void AS $$
+        DECLARE
+            start_d date := date_trunc('month', p_month)::date;
+            end_d   date := (date_trunc('month', p_month) + interval '1 month')::date;
+        BEGIN
+            EXECUTE format(
+                'CREATE TABLE IF NOT EXISTS %I PARTITION OF consent_events FOR VALUES FROM (%L) TO (%L)',
+                'consent_events_' || to_char(start_d, 'YYYYMM'), start_d, end_d
+            );
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        SELECT consent_events_ensure_partition((date_trunc('month', now()) + make_interval(months => m))::date)
+        FROM generate_series(0, 2) AS m
+    """)
+
+def downgrade() -> None:
+    op.execute("DROP FUNCTION IF EXISTS consent_events_ensure_partition(date)")
+    op.execute("DROP TABLE IF EXISTS consent_events")
@@ -0,0 +1,34 @@
+"""webhook_outbox: transactional outbox for consent status webhooks"""
+from alembic import op
+
+# revision identifiers.
+revision = "0004_webhook_outbox"
+down_revision = "0003_consent_events"
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS webhook_outbox (
+            id              BIGSERIAL PRIMARY KEY,
+            consent_id      UUID NOT NULL,
+            tpp_client_id   TEXT NOT NULL,
+            tenant_id       TEXT,
+            event_type      VARCHAR(64) NOT NULL,
+            payload         JSONB NOT NULL,
+            status          VARCHAR(16) NOT NULL DEFAULT 'PENDING',
+            attempts        INTEGER NOT NULL DEFAULT 0,
+            last_error      TEXT,
+            created_at      TIMESTAMPTZ NOT NULL DEFAULT now(),
+            available_at    TIMESTAMPTZ NOT NULL DEFAULT now(),
+            delivered_at    TIMESTAMPTZ
+        )
+    """)
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS idx_webhook_outbox_pending "
+        "ON webhook_outbox (available_at) WHERE status = 'PENDING'"
+    )
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS idx_webhook_outbox_pending")
+    op.execute("DROP TABLE IF EXISTS webhook_outbox")
@@ -0,0 +1,69 @@
+"""hot/cold split: partial indexes on consents + partitioned consents_archive"""
+from alembic import op
+
+from app.db.migrations import create_index_concurrently, drop_index_concurrently, outside_transaction
+
+# revision identifiers.
+revision = "0005_consents_archive"
+down_revision = "0004_webhook_outbox"
+branch_labels = None
+depends_on = None
+
+_COLUMNS = (
+    "id, tenant_id, tpp_client_id, psu_id, type, permissions, status, recurring, "
+    "expires_at, redirect_success_url, redirect_failure_url, accounts_scope, sca_id, "
+    "created_at, updated_at, created_by_ip, metadata, version"
+)
+
+def upgrade() -> None:
+    with outside_transaction() as conn:
+        # Partial indexes only cover the rows their queries can match
+        create_index_concurrently(conn, "idx_consents_expires_active", "consents", "expires_at",
+                                  where="status IN ('PENDING_SCA','GRANTED')")
+        create_index_concurrently(conn, "idx_consents_terminal_updated", "consents", "updated_at",
+                                  where="status IN ('REJECTED','EXPIRED','REVOKED')")
+        # Full-table single-column indexes they replace (plus create_all's ix_* duplicates)
+        for name in ("idx_consents_status", "idx_consents_expires_at", "ix_consents_status",
+                     "ix_consents_expires_at", "ix_consents_tpp_client_id"):
+            drop_index_concurrently(conn, name)
+
+    # Cold storage for terminal consents, partitioned by creation month
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS consents_archive (
+            LIKE consents INCLUDING DEFAULTS,
+            archived_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+            PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+    """)
+    op.execute("CREATE TABLE IF NOT EXISTS consents_archive_default PARTITION OF consents_archive DEFAULT")
+    op.execute("CREATE INDEX IF NOT EXISTS idx_consents_archive_tpp_client ON consents_archive (tpp_client_id)")
+    op.execute("""
+        CREATE OR REPLACE FUNCTION consents_archive_ensure_partition(p_month date) RETURNS void AS $$
+        DECLARE
+            start_d date := date_trunc('month', p_month)::date;
+            end_d   date := (date_trunc('month', p_month) + interval '1 month')::date;
+        BEGIN
+            EXECUTE format(
+                'CREATE TABLE IF NOT EXISTS %I PARTITION OF consents_archive FOR VALUES FROM (%L) TO (%L)',
+                'consents_archive_' || to_char(start_d, 'YYYYMM'), start_d, end_d
+            );
+        END
+        $$ LANGUAGE plpgsql
+    """)
+
+    # One place to read a consent regardless of where it lives
+    op.execute(f"""
+        CREATE OR REPLACE VIEW consents_all AS
+            SELECT {_COLUMNS} FROM consents
+            UNION ALL
+            SELECT {_COLUMNS} FROM consents_archive
+    """)
+
+def downgrade() -> None:
+    op.execute("DROP VIEW IF EXISTS consents_all")
+    op.execute("DROP FUNCTION IF EXISTS consents_archive_ensure_partition(date)")
+    op.execute("DROP TABLE IF EXISTS consents_archive")
+    op.execute('CREATE INDEX IF NOT EXISTS idx_consents_status ON consents (status)')
+    op.execute('CREATE INDEX IF NOT EXISTS idx_consents_expires_at ON consents (expires_at)')
+    op.execute('DROP INDEX IF EXISTS idx_consents_terminal_updated')
+    op.execute('DROP INDEX IF EXISTS idx_consents_expires_active')
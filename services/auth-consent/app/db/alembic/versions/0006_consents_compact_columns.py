@@ -0,0 +1,188 @@
+"""compact consent row: permissions bitmask, enum status/type
+
+Expand step only: `permissions` (JSONB) stays, kept in sync with
+permissions_mask by a trigger, so pods still running the previous release can
+read and write it during a rolling deploy. 0010 drops it.
+
+Runs online (see app.db.migrations): permissions_mask is added nullable and
+filled by a batched backfill. An in-place ALTER COLUMN ... TYPE would rewrite
+both tables under ACCESS EXCLUSIVE, so status and type are retyped through
+shadow columns instead: status_new/type_new are added, kept current by a
+trigger and filled by the same backfill (every row is written once, in
+batches), the partial indexes are built concurrently on them, and one short
+transaction swaps them in by renaming. The downgrade does the same in
+reverse.
+"""
+from alembic import op
+
+from app.db.migrations import (
+    add_column,
+    backfill,
+    create_index_concurrently,
+    execute_ddl,
+    outside_transaction,
+    set_not_null,
+)
+
+# revision identifiers.
+revision = "0006_consents_compact_columns"
+down_revision = "0005_consents_archive"
+branch_labels = None
+depends_on = None
+
+# Must match app.utils.permissions.PERMISSION_BITS
+_PERMISSION_BITS = {"accounts:read": 1, "balances:read": 2, "transactions:read": 4}
+
+_TABLES = ("consents", "consents_archive")
+
+# Partial indexes on consents over the retyped status: (name, column, statuses)
+_PARTIAL_INDEXES = (
+    ("idx_consents_expires_active", "expires_at", "'PENDING_SCA','GRANTED'"),
+    ("idx_consents_terminal_updated", "updated_at", "'REJECTED','EXPIRED','REVOKED'"),
+)
+
+_OLD_VIEW_COLUMNS = (
+    "id, tenant_id, tpp_client_id, psu_id, type, permissions, status, recurring, "
+    "expires_at, redirect_success_url, redirect_failure_url, accounts_scope, sca_id, "
+    "created_at, updated_at, created_by_ip, metadata, version"
+)
+
+_VIEW_COLUMNS = (
+    "id, tenant_id, tpp_client_id, psu_id, type, permissions_mask, "
+    "consent_permissions_json(permissions_mask) AS permissions, status, recurring, "
+    "expires_at, redirect_success_url, redirect_failure_url, accounts_scope, sca_id, "
+    "created_at, updated_at, created_by_ip, metadata, version"
+)
+
+def _create_functions() -> None:
+    # bit_or over distinct names: a permission listed twice must not carry into the next bit
+    whens = " ".join(f"WHEN '{name}' THEN {bit}" for name, bit in _PERMISSION_BITS.items())
+    op.execute(f"""
+        CREATE OR REPLACE FUNCTION consent_permissions_mask(perms jsonb) RETURNS smallint
+        LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $$
+            SELECT COALESCE(bit_or(CASE p {whens} ELSE 0 END), 0)::smallint
+            FROM (SELECT DISTINCT jsonb_array_elements_text(perms) AS p) AS d
+        $$
+    """)
+    # JSON rendering of the bitmask for SQL consumers that expect the old column
+    items = " ".join(
+        f"CASE WHEN mask & {bit} <> 0 THEN '[\"{name}\"]'::jsonb ELSE '[]'::jsonb END ||"
+        for name, bit in _PERMISSION_BITS.items()
+    )
+    op.execute(f"""
+        CREATE OR REPLACE FUNCTION consent_permissions_json(mask smallint) RETURNS jsonb
+        LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $$
+            SELECT {items} '[]'::jsonb
+        $$
+    """)
+    # Until 0010: old code writes only permissions, new code only permissions_mask
+    op.execute("""
+        CREATE OR REPLACE FUNCTION consents_permissions_sync() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                IF NEW.permissions_mask IS NULL THEN
+                    NEW.permissions_mask := consent_permissions_mask(NEW.permissions);
+                ELSIF NEW.permissions IS NULL THEN
+                    NEW.permissions := consent_permissions_json(NEW.permissions_mask);
+                END IF;
+            ELSIF OLD.permissions_mask IS NOT NULL  -- not the backfill: it derives the mask from permissions
+                  AND NEW.permissions_mask IS DISTINCT FROM OLD.permissions_mask THEN
+                NEW.permissions := consent_permissions_json(NEW.permissions_mask);
+            ELSIF NEW.permissions IS DISTINCT FROM OLD.permissions THEN
+                NEW.permissions_mask := consent_permissions_mask(NEW.permissions);
+            END IF;
+            RETURN NEW;
+        END $$
+    """)
+
+def _view_sql(columns: str) -> str:
+    return f"""
+        CREATE VIEW consents_all AS
+            SELECT {columns} FROM consents
+            UNION ALL
+            SELECT {columns} FROM consents_archive
+    """
+
+def _retype(status_type: str, type_type: str, *, view_columns: str, drop_mask: bool) -> None:
+    """
+    status/type to the given types via shadow columns: add, sync by trigger,
+    backfill, SET NOT NULL, index concurrently, then swap in one transaction.
+    """
+    # Until the swap, writers only know status/type; the trigger copies them over
+    op.execute(f"""
+        CREATE OR REPLACE FUNCTION consents_retype_sync() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            NEW.status_new := NEW.status::{status_type};
+            NEW.type_new := NEW.type::{type_type};
+            RETURN NEW;
+        END $$
+    """)
+    with outside_transaction() as conn:
+        # consents_archive is partitioned: ALTERs (and row triggers) on the parent cascade to partitions
+        for table in _TABLES:
+            add_column(conn, table, f"status_new {status_type}")
+            add_column(conn, table, f"type_new {type_type}")
+            execute_ddl(conn, f"DROP TRIGGER IF EXISTS consents_retype_sync ON {table}")
+            execute_ddl(conn, f"""
+                CREATE TRIGGER consents_retype_sync BEFORE INSERT OR UPDATE ON {table}
+                FOR EACH ROW EXECUTE FUNCTION consents_retype_sync()
+            """)
+            backfill(
+                conn, table,
+                set_sql=f"status_new = status::{status_type}, type_new = type::{type_type}",
+                where_sql="status_new IS NULL OR type_new IS NULL",
+            )
+            set_not_null(conn, table, "status_new")
+            set_not_null(conn, table, "type_new")
+        for name, column, statuses in _PARTIAL_INDEXES:
+            create_index_concurrently(conn, f"{name}_new", "consents", column,
+                                      where=f"status_new IN ({statuses})")
+
+        # The swap: catalog-only statements, sent as one query so they commit together
+        swap = ["DROP VIEW IF EXISTS consents_all"]
+        for table in _TABLES:
+            swap.append(f"DROP TRIGGER consents_retype_sync ON {table}")
+            if drop_mask:
+                swap.append(f"DROP TRIGGER IF EXISTS consents_permissions_sync ON {table}")
+            # Dropping status also drops the partial indexes built on it
+            swap.append(
+                f"ALTER TABLE {table} "
+                + ("DROP COLUMN permissions_mask, " if drop_mask else "")
+                + "DROP COLUMN status, DROP COLUMN type"
+            )
+            swap.append(f"ALTER TABLE {table} RENAME COLUMN status_new TO status")
+            swap.append(f"ALTER TABLE {table} RENAME COLUMN type_new TO type")
+        for name, _, _ in _PARTIAL_INDEXES:
+            swap.append(f"ALTER INDEX {name}_new RENAME TO {name}")
+        swap.append(_view_sql(view_columns))
+        execute_ddl(conn, ";\n".join(swap))
+    op.execute("DROP FUNCTION IF EXISTS consents_retype_sync()")
+
+def upgrade() -> None:
+    op.execute("CREATE TYPE consent_status AS ENUM ('PENDING_SCA','GRANTED','REJECTED','EXPIRED','REVOKED')")
+    op.execute("CREATE TYPE consent_type AS ENUM ('AIS')")
+    _create_functions()
+
+    with outside_transaction() as conn:
+        for table in _TABLES:
+            add_column(conn, table, "permissions_mask smallint")
+            execute_ddl(conn, f"DROP TRIGGER IF EXISTS consents_permissions_sync ON {table}")
+            execute_ddl(conn, f"""
+                CREATE TRIGGER consents_permissions_sync BEFORE INSERT OR UPDATE ON {table}
+                FOR EACH ROW EXECUTE FUNCTION consents_permissions_sync()
+            """)
+            backfill(conn, table, set_sql="permissions_mask = consent_permissions_mask(permissions)",
+                     where_sql="permissions_mask IS NULL")
+            set_not_null(conn, table, "permissions_mask")
+
+    _retype("consent_status", "consent_type", view_columns=_VIEW_COLUMNS, drop_mask=False)
+
+def downgrade() -> None:
+    # permissions is still there (restored by 0010's downgrade) and in sync; the
+    # swap drops permissions_mask along with the enum columns
+    _retype("varchar(20)", "varchar(16)", view_columns=_OLD_VIEW_COLUMNS, drop_mask=True)
+    op.execute("DROP FUNCTION IF EXISTS consents_permissions_sync()")
+    op.execute("DROP FUNCTION IF EXISTS consent_permissions_json(smallint)")
+    op.execute("DROP FUNCTION IF EXISTS consent_permissions_mask(jsonb)")
+    op.execute("DROP TYPE IF EXISTS consent_status")
+    op.execute("DROP TYPE IF EXISTS consent_type")
@@ -0,0 +1,44 @@
+"""revocation_jobs: admin bulk revocation by PSU, TPP or tenant"""
+from alembic import op
+
+from app.db.migrations import create_index_concurrently, outside_transaction
+
+# revision identifiers.
+revision = "0007_revocation_jobs"
+down_revision = "0006_consents_compact_columns"
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS revocation_jobs (
+            id              UUID PRIMARY KEY,
+            selector        VARCHAR(16) NOT NULL CHECK (selector IN ('psu_id','tpp_client_id','tenant_id')),
+            value           TEXT NOT NULL,
+            reason          TEXT,
+            requested_by    TEXT,
+            status          VARCHAR(16) NOT NULL DEFAULT 'PENDING',
+            revoked_count   BIGINT NOT NULL DEFAULT 0,
+            batches         INTEGER NOT NULL DEFAULT 0,
+            attempts        INTEGER NOT NULL DEFAULT 0,
+            last_error      TEXT,
+            lease_until     TIMESTAMPTZ,
+            created_at      TIMESTAMPTZ NOT NULL DEFAULT now(),
+            started_at      TIMESTAMPTZ,
+            finished_at     TIMESTAMPTZ
+        )
+    """)
+    # At most one open job per target; also what the worker scans
+    op.execute(
+        "CREATE UNIQUE INDEX IF NOT EXISTS uq_revocation_jobs_open ON revocation_jobs (selector, value) "
+        "WHERE status IN ('PENDING','RUNNING')"
+    )
+    # Bulk revocation by PSU; tpp_client_id and tenant_id are indexed already
+    with outside_transaction() as conn:
+        create_index_concurrently(conn, "idx_consents_psu_active", "consents", "psu_id",
+                                  where="status IN ('PENDING_SCA','GRANTED') AND psu_id IS NOT NULL")
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS idx_consents_psu_active")
+    op.execute("DROP INDEX IF EXISTS uq_revocation_jobs_open")
+    op.execute("DROP TABLE IF EXISTS revocation_jobs")
@@ -0,0 +1,100 @@
+"""consent_stats: trigger-maintained consent counts by tenant, TPP, creation day and status"""
+from alembic import op
+
+# revision identifiers.
+revision = "0008_consent_stats"
+down_revision = "0007_revocation_jobs"
+branch_labels = None
+depends_on = None
+
+# Counters are split over this many slots per group; concurrent writers pick
+# different slots instead of queueing on one hot row. Readers sum the slots.
+_SLOTS = 8
+
+_GROUP = "COALESCE({r}.tenant_id, ''), {r}.tpp_client_id, ({r}.created_at AT TIME ZONE 'UTC')::date"
+
+def upgrade() -> None:
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS consent_stats (
+            tenant_key      TEXT NOT NULL,          -- '' for consents without a tenant
+            tpp_client_id   TEXT NOT NULL,
+            day             DATE NOT NULL,          -- creation day (UTC)
+            status          TEXT NOT NULL,
+            slot            SMALLINT NOT NULL,
+            n               BIGINT NOT NULL,
+            PRIMARY KEY (tenant_key, tpp_client_id, day, status, slot)
+        )
+    """)
+    op.execute("CREATE INDEX IF NOT EXISTS idx_consent_stats_tpp_day ON consent_stats (tpp_client_id, day)")
+    op.execute("CREATE INDEX IF NOT EXISTS idx_consent_stats_day ON consent_stats (day)")
+
+    # Statement-level triggers with transition tables: one upsert per group per
+    # statement, so a 1000-row expiry batch costs a handful of row updates, not 2000.
+    # Rows are upserted in key order so concurrent statements can't deadlock.
+    op.execute(f"""
+        CREATE OR REPLACE FUNCTION consent_stats_on_insert() RETURNS trigger LANGUAGE plpgsql AS $$
+        DECLARE
+            s smallint := floor(random() * {_SLOTS});
+        BEGIN
+            INSERT INTO consent_stats AS cs (tenant_key, tpp_client_id, day, status, slot, n)
+            SELECT {_GROUP.format(r="r")}, r.status::text, s, count(*)
+            FROM new_rows r
+            GROUP BY 1, 2, 3, 4
+            ORDER BY 1, 2, 3, 4
+            ON CONFLICT (tenant_key, tpp_client_id, day, status, slot) DO UPDATE SET n = cs.n + EXCLUDED.n;
+            RETURN NULL;
+        END $$
+    """)
+    op.execute(f"""
+        CREATE OR REPLACE FUNCTION consent_stats_on_update() RETURNS trigger LANGUAGE plpgsql AS $$
+        DECLARE
+            s smallint := floor(random() * {_SLOTS});
+        BEGIN
+            INSERT INTO consent_stats AS cs (tenant_key, tpp_client_id, day, status, slot, n)
+            SELECT k1, k2, k3, k4, s, sum(d)
+            FROM (
+                SELECT {_GROUP.format(r="o")}, o.status::text, -1
+                FROM old_rows o JOIN new_rows r ON r.id = o.id
+                WHERE o.status IS DISTINCT FROM r.status
+                UNION ALL
+                SELECT {_GROUP.format(r="o")}, r.status::text, 1
+                FROM old_rows o JOIN new_rows r ON r.id = o.id
+                WHERE o.status IS DISTINCT FROM r.status
+            ) AS delta (k1, k2, k3, k4, d)
+            GROUP BY 1, 2, 3, 4
+            HAVING sum(d) <> 0
+            ORDER BY 1, 2, 3, 4
+            ON CONFLICT (tenant_key, tpp_client_id, day, status, slot) DO UPDATE SET n = cs.n + EXCLUDED.n;
+            RETURN NULL;
+        END $$
+    """)
+    # No DELETE trigger: archival moves consents to cold storage, they still count
+    op.execute("""
+        CREATE TRIGGER consent_stats_insert AFTER INSERT ON consents
+        REFERENCING NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION consent_stats_on_insert()
+    """)
+    op.execute("""
+        CREATE TRIGGER consent_stats_update AFTER UPDATE ON consents
+        REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION consent_stats_on_update()
+    """)
+
+    # Backfill from both tiers (slot 0)
+    op.execute("""
+        INSERT INTO consent_stats (tenant_key, tpp_client_id, day, status, slot, n)
+        SELECT COALESCE(tenant_id, ''), tpp_client_id, (created_at AT TIME ZONE 'UTC')::date, status::text, 0, count(*)
+        FROM (
+            SELECT tenant_id, tpp_client_id, created_at, status::text AS status FROM consents
+            UNION ALL
+            SELECT tenant_id, tpp_client_id, created_at, status::text FROM consents_archive
+        ) AS allc
+        GROUP BY 1, 2, 3, 4
+    """)
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS consent_stats_update ON consents")
+    op.execute("DROP TRIGGER IF EXISTS consent_stats_insert ON consents")
+    op.execute("DROP FUNCTION IF EXISTS consent_stats_on_update()")
+    op.execute("DROP FUNCTION IF EXISTS consent_stats_on_insert()")
+    op.execute("DROP TABLE IF EXISTS consent_stats")
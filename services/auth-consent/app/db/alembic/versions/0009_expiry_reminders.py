@@ -0,0 +1,34 @@
+"""expiry_reminders: per-consent dedup markers for expiry reminder emails"""
+from alembic import op
+
+# revision identifiers.
+revision = "0009_expiry_reminders"
+down_revision = "0008_consent_stats"
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS expiry_reminders (
+            consent_id      UUID NOT NULL,
+            expires_at      TIMESTAMPTZ NOT NULL,   -- a renewed consent (new expiry) gets a new reminder
+            tenant_id       TEXT,
+            psu_id          TEXT NOT NULL,
+            tpp_client_id   TEXT NOT NULL,
+            status          VARCHAR(16) NOT NULL DEFAULT 'PENDING',
+            attempts        INTEGER NOT NULL DEFAULT 0,
+            last_error      TEXT,
+            available_at    TIMESTAMPTZ NOT NULL DEFAULT now(),
+            created_at      TIMESTAMPTZ NOT NULL DEFAULT now(),
+            sent_at         TIMESTAMPTZ,
+            PRIMARY KEY (consent_id, expires_at)
+        )
+    """)
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS idx_expiry_reminders_pending "
+        "ON expiry_reminders (available_at) WHERE status = 'PENDING'"
+    )
+    op.execute("CREATE INDEX IF NOT EXISTS idx_expiry_reminders_expires ON expiry_reminders (expires_at)")
+
+def downgrade() -> None:
+    op.execute("DROP TABLE IF EXISTS expiry_reminders")
@@ -0,0 +1,35 @@
+"""contract: drop consents.permissions (JSONB), superseded by permissions_mask in 0006
+
+Only safe once no pod runs code from before 0006: when rolling out from
+before 0006, deploy and `migrate` to 0009 first, and upgrade to head in the
+following release.
+"""
+from app.db.migrations import add_column, backfill, execute_ddl, outside_transaction, set_not_null
+
+# revision identifiers.
+revision = "0010_drop_consents_permissions"
+down_revision = "0009_expiry_reminders"
+branch_labels = None
+depends_on = None
+
+_TABLES = ("consents", "consents_archive")
+
+def upgrade() -> None:
+    with outside_transaction() as conn:
+        for table in _TABLES:
+            # consents_permissions_sync() itself stays for the downgrade; 0006's downgrade drops it
+            execute_ddl(conn, f"DROP TRIGGER IF EXISTS consents_permissions_sync ON {table}")
+            execute_ddl(conn, f"ALTER TABLE {table} DROP COLUMN IF EXISTS permissions")
+
+def downgrade() -> None:
+    with outside_transaction() as conn:
+        for table in _TABLES:
+            add_column(conn, table, "permissions jsonb")
+            execute_ddl(conn, f"DROP TRIGGER IF EXISTS consents_permissions_sync ON {table}")
+            execute_ddl(conn, f"""
+                CREATE TRIGGER consents_permissions_sync BEFORE INSERT OR UPDATE ON {table}
+                FOR EACH ROW EXECUTE FUNCTION consents_permissions_sync()
+            """)
+            backfill(conn, table, set_sql="permissions = consent_permissions_json(permissions_mask)",
+                     where_sql="permissions IS NULL")
+            set_not_null(conn, table, "permissions")
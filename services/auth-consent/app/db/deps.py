@@ -1,8 +1,27 @@
+from uuid import UUID
+from fastapi import Depends, Request
 from sqlalchemy.orm import Session
-from app.db.session import SessionLocal
+from app.db.shards import router as shards
+from app.security.jwt import get_current_client
 
-def get_db():
-    db: Session = SessionLocal()
+def get_db(request: Request):
+    # Routes addressing one consent go to the shard encoded in its id
+    raw = request.path_params.get("consent_id")
+    shard = 0
+    if raw:
+        try:
+            shard = shards.shard_for_consent(UUID(str(raw)))
+        except ValueError:
+            pass  # path validation rejects it with 422 anyway
+    db: Session = shards.session(shard)
+    try:
+        yield db
+    finally:
+        db.close()
+
+def get_tenant_db(client=Depends(get_current_client)):
+    # New consents are written to the caller's tenant shard
+    db: Session = shards.session(shards.shard_for_tenant(client.get("tenant_id")))
     try:
         yield db
     finally:
@@ -1,6 +1,14 @@
 from app.db.base import Base
-from app.db.session import engine
+from app.db.migrations import migration_lock
+from app.db.shards import router as shards
 import app.models.consent
+import app.models.consent_event
+import app.models.expiry_reminder
+import app.models.revocation_job
+import app.models.webhook_outbox
 
 def init_db() -> None:
-    Base.metadata.create_all(bind=engine)
+    for shard in shards.shard_ids():
+        # Replicas starting together would race on CREATE TYPE / CREATE TABLE
+        with migration_lock(shards.engine(shard)):
+            Base.metadata.create_all(bind=shards.engine(shard))
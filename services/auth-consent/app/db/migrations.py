@@ -0,0 +1,232 @@
+"""
+Online schema changes and the single-runner migration entry point.
+
+Index builds use CREATE/DROP INDEX CONCURRENTLY: only a SHARE UPDATE EXCLUSIVE
+lock, so reads and writes carry on during the build. They can't run inside a
+transaction, so migrations call them in `outside_transaction()` (alembic's
+autocommit block; it commits whatever the migration did before it):
+
+    from app.db.migrations import create_index_concurrently, outside_transaction
+
+    def upgrade() -> None:
+        with outside_transaction() as conn:
+            create_index_concurrently(conn, "idx_consents_psu_active", "consents", "psu_id",
+                                      where="status IN ('PENDING_SCA','GRANTED')")
+
+Other DDL that needs ACCESS EXCLUSIVE (ADD COLUMN, ...) goes through
+execute_ddl: a short lock_timeout and retries, so the ALTER never sits in
+the lock queue blocking every query behind a long-running transaction.
+backfill() updates in primary-key batches, each its own transaction, with a
+pause between batches and progress in the log; set_not_null() then adds the
+constraint without a locked full-table scan. A column type change that would
+rewrite the table is done the same way: a shadow column kept current by a
+trigger, backfilled, then swapped in by renaming (see 0006).
+
+upgrade_all() holds a Postgres advisory lock on each database while it
+migrates it: when several instances start at once, exactly one migrates and
+the others wait for it, then find nothing left to do.
+"""
+from __future__ import annotations
+import argparse
+import logging
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import OperationalError
+
+from app.core.config import settings
+
+log = logging.getLogger("migrations")
+
+LOCK_NAME = "auth-consent:migrations"
+_LOCK_NOT_AVAILABLE = "55P03"
+
+@contextmanager
+def outside_transaction() -> Iterator[Connection]:
+    """Inside an alembic migration: the bind, in autocommit mode, for the block."""
+    from alembic import op
+    with op.get_context().autocommit_block():
+        yield op.get_bind()
+
+# ---- Indexes --------------------------------------------------------------------
+
+def _index_valid(conn: Connection, name: str) -> Optional[bool]:
+    """True/False for an existing index (False: left over by an interrupted build), None if missing."""
+    return conn.execute(text("""
+        SELECT x.indisvalid FROM pg_index x JOIN pg_class i ON i.oid = x.indexrelid
+        WHERE i.relname = :name AND i.relnamespace = current_schema()::regnamespace
+    """), {"name": name}).scalar()
+
+def create_index_concurrently(
+    conn: Connection,
+    name: str,
+    table: str,
+    columns: str,
+    *,
+    where: Optional[str] = None,
+    unique: bool = False,
+) -> None:
+    """CREATE INDEX CONCURRENTLY, skipped if a valid index of that name exists. `conn` must be autocommit."""
+    valid = _index_valid(conn, name)
+    if valid:
+        return
+    if valid is False:
+        # An interrupted concurrent build leaves an invalid index that is still maintained on every write
+        log.warning("index_invalid_rebuilding name=%s", name)
+        conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+    sql = f"CREATE {'UNIQUE ' if unique else ''}INDEX CONCURRENTLY {name} ON {table} ({columns})"
+    if where:
+        sql += f" WHERE {where}"
+    start = time.perf_counter()
+    conn.execute(text(sql))
+    log.info("index_built name=%s seconds=%.1f", name, time.perf_counter() - start)
+
+def drop_index_concurrently(conn: Connection, name: str) -> None:
+    conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+
+# ---- DDL and backfills ----------------------------------------------------------
+
+def execute_ddl(conn: Connection, sql: str, *, lock_timeout_ms: Optional[int] = None, attempts: Optional[int] = None) -> None:
+    """
+    Run DDL that needs a strong lock with a short lock_timeout, retrying with
+    backoff when the lock isn't granted in time. `conn` must be autocommit.
+    """
+    lock_timeout_ms = lock_timeout_ms or settings.MIGRATION_DDL_LOCK_TIMEOUT_MS
+    attempts = attempts or settings.MIGRATION_DDL_ATTEMPTS
+    conn.execute(text(f"SET lock_timeout = {int(lock_timeout_ms)}"))
+    try:
+        for attempt in range(1, attempts + 1):
+            try:
+                conn.execute(text(sql))
+                return
+            except OperationalError as e:
+                if getattr(e.orig, "pgcode", None) != _LOCK_NOT_AVAILABLE or attempt == attempts:
+                    raise
+                log.warning("ddl_lock_timeout attempt=%d sql=%s", attempt, sql)
+                time.sleep(min(0.2 * 2 ** attempt, 5.0))
+    finally:
+        conn.execute(text("RESET lock_timeout"))
+
+def add_column(conn: Connection, table: str, column_def: str) -> None:
+    """ADD COLUMN IF NOT EXISTS (metadata-only for nullable columns or constant defaults)."""
+    execute_ddl(conn, f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS {column_def}")
+
+def set_not_null(conn: Connection, table: str, column: str) -> None:
+    """
+    SET NOT NULL without scanning the table under ACCESS EXCLUSIVE: a NOT VALID
+    check constraint is validated first (SHARE UPDATE EXCLUSIVE, writes carry
+    on), and Postgres then takes it as proof instead of scanning.
+    """
+    check = f"{table}_{column}_not_null"
+    execute_ddl(conn, f"ALTER TABLE {table} ADD CONSTRAINT {check} CHECK ({column} IS NOT NULL) NOT VALID")
+    conn.execute(text(f"ALTER TABLE {table} VALIDATE CONSTRAINT {check}"))
+    execute_ddl(conn, f"ALTER TABLE {table} ALTER COLUMN {column} SET NOT NULL")
+    execute_ddl(conn, f"ALTER TABLE {table} DROP CONSTRAINT {check}")
+
+def backfill(
+    conn: Connection,
+    table: str,
+    *,
+    set_sql: str,
+    where_sql: str = "TRUE",
+    key: str = "id",
+    batch_size: Optional[int] = None,
+    pause_seconds: Optional[float] = None,
+    params: Optional[Dict[str, Any]] = None,
+    report_every_seconds: float = 10.0,
+) -> int:
+    """
+    UPDATE table SET <set_sql> WHERE <where_sql>, walking `key` in batches of
+    `batch_size` keys, one transaction per batch (`conn` must be autocommit).
+    Each batch is a bounded range of the key index however few rows match,
+    so batch time stays flat; restarting simply redoes rows that still match.
+    Returns the number of rows updated.
+    """
+    batch_size = batch_size or settings.MIGRATION_BACKFILL_BATCH_SIZE
+    pause_seconds = settings.MIGRATION_BACKFILL_PAUSE_SECONDS if pause_seconds is None else pause_seconds
+    estimate = conn.execute(text("SELECT reltuples::bigint FROM pg_class WHERE oid = CAST(:t AS regclass)"), {"t": table}).scalar()
+
+    def batch_stmt(bounded: bool):
+        return text(f"""
+            WITH batch AS (
+                SELECT {key} AS k FROM {table}
+                {f"WHERE {key} > :last" if bounded else ""}
+                ORDER BY {key} LIMIT :batch
+            ),
+            upd AS (
+                UPDATE {table} SET {set_sql}
+                FROM batch WHERE {table}.{key} = batch.k AND ({where_sql})
+                RETURNING 1
+            )
+            SELECT (SELECT count(*) FROM batch), (SELECT k FROM batch ORDER BY k DESC LIMIT 1), (SELECT count(*) FROM upd)
+        """)
+
+    first, rest = batch_stmt(False), batch_stmt(True)
+    last = None
+    scanned = updated = 0
+    start = reported = time.monotonic()
+    while True:
+        values = {**(params or {}), "batch": batch_size}
+        if last is not None:
+            values["last"] = last
+        n, last_in_batch, n_updated = conn.execute(first if last is None else rest, values).one()
+        scanned += n
+        updated += n_updated
+        if n < batch_size:
+            break
+        last = last_in_batch
+        now = time.monotonic()
+        if now - reported >= report_every_seconds:
+            reported = now
+            rate = scanned / (now - start)
+            log.info(
+                "backfill_progress table=%s scanned=%d updated=%d pct=%.1f rows_per_s=%.0f eta_s=%.0f",
+                table, scanned, updated, 100 * scanned / max(estimate, scanned, 1), rate,
+                max(estimate - scanned, 0) / rate if rate else 0,
+            )
+        if pause_seconds:
+            time.sleep(pause_seconds)
+    log.info("backfill_done table=%s scanned=%d updated=%d seconds=%.1f", table, scanned, updated, time.monotonic() - start)
+    return updated
+
+# ---- Runner ---------------------------------------------------------------------
+
+@contextmanager
+def migration_lock(engine: Engine, timeout_seconds: Optional[float] = None) -> Iterator[None]:
+    """
+    Hold the migration advisory lock on this database for the block, waiting
+    up to `timeout_seconds` for another instance to finish. A session-level
+    lock: released on exit, or by Postgres if this process dies.
+    """
+    timeout_seconds = settings.MIGRATION_LOCK_TIMEOUT_SECONDS if timeout_seconds is None else timeout_seconds
+    with engine.connect() as conn:
+        conn = conn.execution_options(isolation_level="AUTOCOMMIT")
+        deadline = time.monotonic() + timeout_seconds
+        waiting_since = None
+        while not conn.execute(text("SELECT pg_try_advisory_lock(hashtext(:name))"), {"name": LOCK_NAME}).scalar():
+            if waiting_since is None:
+                waiting_since = time.monotonic()
+                log.info("migration_lock_wait url=%s", engine.url.render_as_string(hide_password=True))
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"migration lock still held by another instance after {timeout_seconds}s")
+            time.sleep(1.0)
+        if waiting_since is not None:
+            log.info("migration_lock_acquired waited_s=%.1f", time.monotonic() - waiting_since)
+        try:
+            yield
+        finally:
+            conn.execute(text("SELECT pg_advisory_unlock(hashtext(:name))"), {"name": LOCK_NAME})
+
+def upgrade_all(revision: str = "head") -> None:
+    """alembic upgrade on every shard (shard 0 is DATABASE_URL), one instance at a time per database."""
+    from alembic import command
+    from alembic.config import Config
+    from app.db.shards import router as shards
+    for shard in shards.shard_ids():
+        with migration_lock(shards.engine(shard)):
+            log.info("migrating shard=%d", shard)
+            cfg = Config("alembic.ini", cmd_opts=argparse.Namespace(x=[f"shard={shard}"]))
+            command.upgrade(cfg, revision)
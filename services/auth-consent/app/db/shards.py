@@ -0,0 +1,85 @@
+"""
+Tenant-aware sharding of consent storage.
+
+Shard 0 is the default database (DATABASE_URL, i.e. app.db.session.engine);
+DATABASE_SHARDS adds more ({shard_number: url}, 1..255) and TENANT_SHARDS
+places tenants on them ({tenant_id: shard_number}). Tenants not listed, and
+requests without a tenant, stay on shard 0.
+
+Consent ids carry their shard, so a lookup by id never needs a directory
+round trip: new ids are time-ordered UUIDv7s whose last byte is the shard
+number (see new_consent_id). Version-4 ids predate sharding and always live on
+shard 0; version-8 ids (random, shard in the last byte) were issued before v7. Moving a tenant to another shard only affects consents created
+afterwards; existing ids keep resolving to where they were written.
+"""
+from __future__ import annotations
+from typing import Dict, List, Optional
+from uuid import UUID
+
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.core.config import settings
+from app.db.session import engine as default_engine
+from app.utils.ids import uuid7
+
+DEFAULT_SHARD = 0
+
+def new_consent_id(shard: int = DEFAULT_SHARD) -> UUID:
+    """Monotonic UUIDv7 (inserts append to the primary key index) with the shard number in the last byte."""
+    return uuid7(tail=shard)
+
+def shard_of(consent_id: UUID) -> int:
+    """Shard encoded in a consent id; pre-sharding (v4) ids live on the default shard."""
+    if consent_id.version == 4:
+        return DEFAULT_SHARD
+    return consent_id.bytes[15]
+
+class ShardRouter:
+    def __init__(self, shard_urls: Dict[int, str], tenant_shards: Dict[str, int]) -> None:
+        unknown = {t: s for t, s in tenant_shards.items() if s != DEFAULT_SHARD and s not in shard_urls}
+        if unknown:
+            raise ValueError(f"TENANT_SHARDS references undefined shards: {unknown}")
+        if any(not 0 < s < 256 for s in shard_urls):
+            raise ValueError("DATABASE_SHARDS keys must be 1..255 (0 is DATABASE_URL)")
+        self._urls = dict(shard_urls)
+        self._tenants = dict(tenant_shards)
+        self._engines: Dict[int, Engine] = {DEFAULT_SHARD: default_engine}
+        self._sessions: Dict[int, sessionmaker] = {}
+
+    def shard_ids(self) -> List[int]:
+        return [DEFAULT_SHARD, *sorted(self._urls)]
+
+    def shard_for_tenant(self, tenant_id: Optional[str]) -> int:
+        if tenant_id is None:
+            return DEFAULT_SHARD
+        return self._tenants.get(tenant_id, DEFAULT_SHARD)
+
+    def shard_for_consent(self, consent_id: UUID) -> int:
+        shard = shard_of(consent_id)
+        # Unknown shard numbers can only come from foreign/forged ids; they won't be found anywhere
+        return shard if shard in self._urls else DEFAULT_SHARD
+
+    def engine(self, shard: int) -> Engine:
+        eng = self._engines.get(shard)
+        if eng is None:
+            eng = self._engines[shard] = create_engine(self._urls[shard], pool_pre_ping=True, future=True)
+        return eng
+
+    def session(self, shard: int = DEFAULT_SHARD) -> Session:
+        maker = self._sessions.get(shard)
+        if maker is None:
+            maker = self._sessions[shard] = sessionmaker(
+                bind=self.engine(shard), autocommit=False, autoflush=False, future=True,
+                info={"shard": shard},
+            )
+        return maker()
+
+    def url(self, shard: int) -> str:
+        return settings.DATABASE_URL if shard == DEFAULT_SHARD else self._urls[shard]
+
+router = ShardRouter(settings.DATABASE_SHARDS, settings.TENANT_SHARDS)
+
+def session_shard(db: Session) -> int:
+    return db.info.get("shard", DEFAULT_SHARD)
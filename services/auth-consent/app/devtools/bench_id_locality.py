@@ -0,0 +1,91 @@
+"""
+Insert locality of random (v4) vs time-ordered (v7) primary keys: insert rate,
+WAL volume, primary key index size and buffer reads on a synthetic table.
+
+    python -m app.devtools.bench_id_locality --rows 2000000 --batch 1000
+
+Creates bench_ids_v4 / bench_ids_v7 (consents-like rows, uuid primary key) in
+DATABASE_URL, fills them in batches, reports, and drops them unless --keep.
+Make --rows large enough that the index outgrows shared_buffers: that is
+where random keys start reading (and dirtying) a different leaf page per row.
+"""
+from __future__ import annotations
+import argparse
+import time
+import uuid
+from typing import Callable
+
+from sqlalchemy import text
+
+from app.db.session import engine
+from app.utils.ids import uuid7
+
+_DDL = """
+CREATE TABLE {table} (
+    id uuid PRIMARY KEY,
+    tpp_client_id text NOT NULL,
+    status text NOT NULL,
+    created_at timestamptz NOT NULL DEFAULT now(),
+    payload text
+)
+"""
+
+def _fill(table: str, make_id: Callable[[], uuid.UUID], rows: int, batch: int) -> dict:
+    with engine.connect() as conn:
+        conn.execute(text(f"DROP TABLE IF EXISTS {table}"))
+        conn.execute(text(_DDL.format(table=table)))
+        conn.commit()
+        wal_start = conn.execute(text("SELECT pg_current_wal_insert_lsn()")).scalar()
+        insert = text(f"INSERT INTO {table} (id, tpp_client_id, status, payload) VALUES (:id, :tpp, 'PENDING_SCA', :p)")
+        start = time.perf_counter()
+        done = 0
+        while done < rows:
+            n = min(batch, rows - done)
+            conn.execute(insert, [{"id": make_id(), "tpp": f"tpp-{i % 50}", "p": "x" * 64} for i in range(n)])
+            conn.commit()
+            done += n
+        elapsed = time.perf_counter() - start
+        if _has_force_flush(conn):
+            conn.execute(text("SELECT pg_stat_force_next_flush()"))
+        wal = conn.execute(text("SELECT pg_wal_lsn_diff(pg_current_wal_insert_lsn(), :lsn)"), {"lsn": wal_start}).scalar()
+        stats = conn.execute(text(
+            "SELECT pg_relation_size(:idx) AS idx_bytes, pg_relation_size(:tbl) AS tbl_bytes, "
+            "       coalesce(idx_blks_read, 0) AS idx_read, coalesce(idx_blks_hit, 0) AS idx_hit "
+            "FROM pg_statio_user_indexes WHERE indexrelname = :idx"
+        ), {"idx": f"{table}_pkey", "tbl": table}).one()
+    return {
+        "rows_per_s": rows / elapsed,
+        "wal_mib": float(wal) / 2**20,
+        "index_mib": stats.idx_bytes / 2**20,
+        "table_mib": stats.tbl_bytes / 2**20,
+        "index_read": stats.idx_read,
+        "index_hit": stats.idx_hit,
+    }
+
+def _has_force_flush(conn) -> bool:
+    # pg_stat_force_next_flush exists from PostgreSQL 15; older servers flush stats on their own schedule
+    return conn.execute(text("SELECT to_regproc('pg_stat_force_next_flush') IS NOT NULL")).scalar()
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--rows", type=int, default=500_000)
+    ap.add_argument("--batch", type=int, default=1000)
+    ap.add_argument("--keep", action="store_true", help="keep the tables for inspection")
+    args = ap.parse_args()
+
+    results = {}
+    for kind, make_id in (("v4", uuid.uuid4), ("v7", uuid7)):
+        results[kind] = _fill(f"bench_ids_{kind}", make_id, args.rows, args.batch)
+
+    print(f"{'':<4} {'rows/s':>10} {'WAL MiB':>9} {'pkey MiB':>9} {'heap MiB':>9} {'pkey blks read':>15} {'hit':>12}")
+    for kind, r in results.items():
+        print(f"{kind:<4} {r['rows_per_s']:>10.0f} {r['wal_mib']:>9.1f} {r['index_mib']:>9.1f} "
+              f"{r['table_mib']:>9.1f} {r['index_read']:>15} {r['index_hit']:>12}")
+
+    if not args.keep:
+        with engine.begin() as conn:
+            for kind in results:
+                conn.execute(text(f"DROP TABLE IF EXISTS bench_ids_{kind}"))
+
+if __name__ == "__main__":
+    main()
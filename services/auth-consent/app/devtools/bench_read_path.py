@@ -0,0 +1,76 @@
+"""
+Compare the ORM read path (Session.get) with the Core read path in
+app.repositories.consent_reads: wall time and allocated memory per lookup.
+
+    python -m app.devtools.bench_read_path --iterations 5000
+
+Runs against DATABASE_URL and needs at least one row in `consents`.
+"""
+from __future__ import annotations
+import argparse
+import time
+import tracemalloc
+from typing import Callable
+
+from sqlalchemy import text
+
+from app.db.session import SessionLocal
+from app.models.consent import Consent
+from app.repositories.consent_reads import get_record, get_status_view
+
+def _orm_lookup(db, consent_id):
+    obj = db.get(Consent, consent_id)
+    # Same fields the status route reads
+    return obj.status, obj.expires_at, obj.tpp_client_id, obj.tenant_id
+
+def _run(name: str, fn: Callable, consent_ids, iterations: int) -> None:
+    # One short-lived session per request, like get_db
+    def one(i):
+        db = SessionLocal()
+        try:
+            fn(db, consent_ids[i % len(consent_ids)])
+        finally:
+            db.close()
+
+    for i in range(min(200, iterations)):  # warm pool + statement cache
+        one(i)
+
+    start = time.perf_counter()
+    cpu = time.process_time()
+    for i in range(iterations):
+        one(i)
+    wall = time.perf_counter() - start
+    cpu = time.process_time() - cpu
+
+    tracemalloc.start()
+    sample = min(500, iterations)
+    for i in range(sample):
+        one(i)
+    _, peak = tracemalloc.get_traced_memory()
+    snap = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    allocated = sum(s.size for s in snap.statistics("filename"))
+
+    print(
+        f"{name:<18} {iterations / wall:>9.0f} req/s  "
+        f"cpu/req={cpu / iterations * 1e6:>7.1f}us  "
+        f"peak={peak / 1024:>7.1f}KiB  retained={allocated / sample:>7.0f}B/req"
+    )
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--iterations", type=int, default=5000)
+    ap.add_argument("--ids", type=int, default=1000, help="distinct consent ids to cycle through")
+    args = ap.parse_args()
+
+    with SessionLocal() as db:
+        ids = list(db.execute(text("SELECT id FROM consents LIMIT :n"), {"n": args.ids}).scalars())
+    if not ids:
+        raise SystemExit("no consents in the database; seed some first")
+
+    _run("orm Session.get", _orm_lookup, ids, args.iterations)
+    _run("core status view", get_status_view, ids, args.iterations)
+    _run("core record", get_record, ids, args.iterations)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+Resilience scenarios: run a consent workload while a dependency is degraded
+through the fault injection layer (app/core/faults.py), and report throughput,
+tail latency and error/shed rates per scenario.
+
+    # in-process (needs DATABASE_URL; Redis optional, its absence is a scenario too)
+    python -m app.devtools.fault_scenarios --duration 10 --concurrency 12
+
+    # against a running instance started with FAULT_INJECTION_ENABLED=true, ADMIN_ENABLED=true
+    python -m app.devtools.fault_scenarios --base-url http://localhost:8000 \\
+        --token "$TPP_TOKEN" --admin-token "$ADMIN_TOKEN" --scenario redis_hang --scenario db_stall
+
+Each virtual client loops: create a consent, poll its status --polls times,
+start SCA, complete the callback. Faults are set with PUT /admin/faults/{dep}
+before each scenario and cleared after it. Against a multi-worker server only
+the worker that handles the admin call is degraded; use one worker.
+
+In-process, the DB pool (5 + 10 overflow) is checked out synchronously on the
+event loop: concurrency above it, or faults that hold connections longer,
+can stall the whole loop on pool checkout. That is the production behaviour
+too, so it shows up in the numbers rather than being worked around.
+
+oidc_* scenarios only matter with token validation on (SKIP_JWT=false and
+real --token values): the OIDC client is only used to fetch signing keys.
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import time
+import uuid
+from collections import Counter, defaultdict
+from contextlib import AsyncExitStack
+from typing import Dict, List
+
+import httpx
+
+SCENARIOS: Dict[str, Dict[str, dict]] = {
+    "baseline": {},
+    "redis_slow": {"redis": {"latency_ms": 20, "distribution": "exponential", "tail_rate": 0.01, "tail_ms": 400}},
+    "redis_errors": {"redis": {"error_rate": 0.5}},
+    "redis_down": {"redis": {"error_rate": 1.0}},
+    "redis_hang": {"redis": {"hang_rate": 0.2}},
+    "db_slow": {"db": {"latency_ms": 10, "distribution": "exponential", "tail_rate": 0.01, "tail_ms": 500}},
+    "db_errors": {"db": {"error_rate": 0.05}},
+    "db_stall": {"db": {"hang_rate": 0.02, "hang_seconds": 2.0}},
+    "oidc_timeout": {"oidc": {"hang_rate": 1.0}},
+}
+
+_BODY = {
+    "permissions": ["accounts:read", "balances:read"],
+    "redirect_urls": {"success_url": "https://tpp.example/ok", "failure_url": "https://tpp.example/no"},
+}
+
+def _pct(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+class Workload:
+    def __init__(self, client: httpx.AsyncClient, headers: dict, polls: int) -> None:
+        self.client = client
+        self.headers = headers
+        self.polls = polls
+        self.latency: Dict[str, List[float]] = defaultdict(list)
+        self.codes: Counter = Counter()
+        self.transport_errors = 0
+
+    async def _call(self, op: str, method: str, url: str, **kwargs):
+        start = time.perf_counter()
+        try:
+            r = await self.client.request(method, url, headers={**self.headers, **kwargs.pop("headers", {})}, **kwargs)
+        except httpx.HTTPError:
+            self.transport_errors += 1
+            return None
+        self.latency[op].append((time.perf_counter() - start) * 1000)
+        self.codes[r.status_code] += 1
+        return r
+
+    async def client_loop(self, stop_at: float) -> None:
+        while time.monotonic() < stop_at:
+            r = await self._call("create", "POST", "/consents", json=_BODY, headers={"Idempotency-Key": str(uuid.uuid4())})
+            if r is None or r.status_code != 201:
+                await asyncio.sleep(0.05)
+                continue
+            cid = r.json()["id"]
+            for _ in range(self.polls):
+                await self._call("status", "GET", f"/consents/{cid}/status")
+            r = await self._call("authorize", "POST", f"/consents/{cid}/authorize")
+            if r is not None and r.status_code == 200:
+                state = r.json()["sca_id"]
+                await self._call("callback", "GET", f"/consents/{cid}/authorize/callback",
+                                 params={"state": state, "result": "approved"})
+
+def _report(name: str, w: Workload, elapsed: float) -> None:
+    total = sum(w.codes.values()) + w.transport_errors
+    errors = sum(n for code, n in w.codes.items() if code >= 500 and code != 503) + w.transport_errors
+    shed = w.codes.get(503, 0) + w.codes.get(429, 0)
+    print(f"\n== {name}: {total / elapsed:7.1f} req/s  errors {100 * errors / max(total, 1):5.1f}%  "
+          f"shed/limited {100 * shed / max(total, 1):5.1f}%  codes {dict(sorted(w.codes.items()))}")
+    for op in ("create", "status", "authorize", "callback"):
+        lat = w.latency.get(op, [])
+        print(f"   {op:<10} n={len(lat):<6} p50 {_pct(lat, 0.5):7.1f}  p99 {_pct(lat, 0.99):7.1f}  max {_pct(lat, 1.0):7.1f} ms")
+
+async def _main(args) -> None:
+    async with AsyncExitStack() as stack:
+        if args.base_url:
+            client = await stack.enter_async_context(httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout))
+        else:
+            from app.core.config import settings
+            settings.FAULT_INJECTION_ENABLED = True
+            settings.ADMIN_ENABLED = True
+            # One bench "TPP" would be throttled long before anything else; keep the limiter's
+            # Redis traffic but not its 429s
+            settings.RATE_LIMITS = {cls: {"rate": 1e6, "burst": 1e6} for cls in settings.RATE_LIMITS}
+            from app.main import create_app
+            app = create_app()
+            await stack.enter_async_context(app.router.lifespan_context(app))
+            # Unhandled exceptions become 500s, as behind a real server
+            transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+            client = await stack.enter_async_context(
+                httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=args.timeout)
+            )
+        admin = {"Authorization": f"Bearer {args.admin_token}"} if args.admin_token else {}
+        headers = {"Authorization": f"Bearer {args.token}"} if args.token else {}
+
+        for name in args.scenario or list(SCENARIOS):
+            await client.delete("/admin/faults", headers=admin)
+            for dep, spec in SCENARIOS[name].items():
+                r = await client.put(f"/admin/faults/{dep}", json=spec, headers=admin)
+                r.raise_for_status()
+            w = Workload(client, headers, args.polls)
+            start = time.monotonic()
+            await asyncio.gather(*(w.client_loop(start + args.duration) for _ in range(args.concurrency)))
+            _report(name, w, time.monotonic() - start)
+        await client.delete("/admin/faults", headers=admin)
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--base-url", default=None, help="running instance; default: in-process app")
+    ap.add_argument("--scenario", action="append", choices=sorted(SCENARIOS), help="repeatable; default: all")
+    ap.add_argument("--duration", type=float, default=10.0, help="seconds per scenario")
+    ap.add_argument("--concurrency", type=int, default=12)
+    ap.add_argument("--polls", type=int, default=4, help="status polls per consent")
+    ap.add_argument("--timeout", type=float, default=30.0)
+    ap.add_argument("--token", default=None, help="TPP bearer token (not needed with SKIP_JWT)")
+    ap.add_argument("--admin-token", default=None, help="bearer token with an ADMIN_ROLES role")
+    asyncio.run(_main(ap.parse_args()))
+
+if __name__ == "__main__":
+    main()
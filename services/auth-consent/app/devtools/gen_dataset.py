@@ -0,0 +1,468 @@
+"""
+Synthetic consents at scale: generate configurable volumes across tenants,
+TPPs, statuses and expiry distributions, stream them into Postgres with COPY
+from parallel workers, and write the matching Redis idempotency entries.
+
+    python -m app.devtools.gen_dataset --rows 100000000 --workers 16 --seed 7 \\
+        --tenants 20 --tpps 500 --days 365 --archive
+
+Rows are generated in chunks of --chunk-rows; chunk i is seeded from
+(--seed, i) and covers its slice of the creation window, so the same
+arguments (and --now, printed at start) produce the same rows whatever
+--workers is. created_at ascends across the whole set and ids are
+version-7 UUIDs built from it, with the shard in the last byte (same layout as
+app.utils.ids / app.db.shards), so index locality matches production.
+
+Into empty tables (or with --truncate) indexes and primary keys are dropped
+first and rebuilt in parallel after the load; appending to a populated table
+keeps them. The consent_stats insert trigger is disabled during the load;
+each chunk upserts its own counts in the transaction that copies its rows.
+Tenants are routed to their
+shard via TENANT_SHARDS.
+
+Shapes of the data:
+  --status-mix   weights per status, for consents still within their lifetime;
+                 past expires_at an active pick becomes EXPIRED, except
+                 --overdue of them (the sweeper's backlog)
+  --expiry-default-share
+                 share created without expiration_at (MAX_EXPIRY_DAYS); the
+                 rest ask for 1..MAX_EXPIRY_DAYS days, uniformly
+  --archive      terminal consents older than ARCHIVE_RETENTION_DAYS go to
+                 consents_archive, as the archiver would have moved them
+  Redis          consents created within the idempotency TTL get a FINAL entry
+                 with the create response and the remaining TTL
+
+consent_events is not populated.
+"""
+from __future__ import annotations
+import argparse
+import base64
+import io
+import json
+import multiprocessing
+import random
+import time
+import uuid
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import NullPool
+
+from app.core.config import settings
+from app.db.shards import router
+from app.models.consent import ACTIVE_STATUSES, CONSENT_STATUSES, TERMINAL_STATUSES, Consent
+from app.services.consent_service import MAX_EXPIRY_DAYS
+from app.utils.hashutils import canonical_sha256
+from app.utils.idempotency import IDEMPOTENCY_TTL_SECONDS
+from app.utils.permissions import PERMISSION_BITS, decode_permissions
+
+_DAY_MS = 86_400_000
+_FLUSH_ROWS = 50_000
+_COLUMNS = [c.name for c in Consent.__table__.columns]
+_COPY = {
+    "consents": f"COPY consents ({', '.join(_COLUMNS)}) FROM STDIN",
+    "consents_archive": f"COPY consents_archive ({', '.join(_COLUMNS)}, archived_at) FROM STDIN",
+}
+_TABLES = ("consents", "consents_archive")
+
+@dataclass
+class Spec:
+    rows: int
+    chunk_rows: int
+    seed: int
+    now_ms: int
+    start_ms: int
+    tenants: List[Optional[str]]
+    tenant_cum: List[float]
+    tenant_shard: List[int]
+    tpps: List[str]
+    tpp_cum: List[float]
+    statuses: List[str]
+    status_cum: List[float]
+    overdue: float
+    expiry_default_share: float
+    psus: int
+    archive_cutoff_ms: Optional[int]
+    shard_urls: Dict[int, str]
+    redis_url: Optional[str]
+    base_url: str
+
+    @property
+    def chunks(self) -> int:
+        return -(-self.rows // self.chunk_rows)
+
+def _zipf_cum(n: int, skew: float) -> List[float]:
+    total, cum = 0.0, []
+    for i in range(n):
+        total += 1.0 / (i + 1) ** skew
+        cum.append(total)
+    return cum
+
+def _parse_mix(raw: str) -> Tuple[List[str], List[float]]:
+    names, cum, total = [], [], 0.0
+    for part in raw.split(","):
+        name, _, weight = part.partition("=")
+        if name not in CONSENT_STATUSES:
+            raise SystemExit(f"unknown status {name!r} in --status-mix")
+        total += float(weight)
+        names.append(name)
+        cum.append(total)
+    return names, cum
+
+def _ts(ms: int) -> str:
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(ms // 1000)) + f".{ms % 1000:03d}+00"
+
+def _uuid7(ms: int, rand: int, shard: int) -> str:
+    # unix_ts_ms | ver 7 | 12 random bits | variant | 62 random bits, last byte = shard
+    value = (ms << 80) | (0x7 << 76) | ((rand >> 62) & 0xFFF) << 64 | (0b10 << 62) | (rand & ((1 << 62) - 256)) | shard
+    h = f"{value:032x}"
+    return f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}"
+
+# ---- Worker side ----------------------------------------------------------------
+
+_conns: Dict[int, object] = {}
+
+def _conn(spec: Spec, shard: int):
+    # One connection per shard per worker process, reused across chunks
+    conn = _conns.get(shard)
+    if conn is None:
+        engine = create_engine(spec.shard_urls[shard], poolclass=NullPool)
+        conn = _conns[shard] = engine.raw_connection()
+        with conn.cursor() as cur:
+            cur.execute("SET synchronous_commit = off")
+        conn.commit()
+    return conn
+
+class _IdempotencyWriter:
+    def __init__(self, spec: Spec) -> None:
+        import redis
+        from app.api.schemas.consents import ConsentCreateRequest, ConsentCreateResponse
+        self.spec = spec
+        self.pipe = redis.Redis.from_url(spec.redis_url).pipeline(transaction=False)
+        self.pending = 0
+        self.written = 0
+        self._request, self._response = ConsentCreateRequest, ConsentCreateResponse
+
+    def add(self, consent_id: str, tpp: str, mask: int, created_ms: int, expires_ms: int,
+            requested_expiry: bool, idem_key: str, correlation_id: str) -> None:
+        permissions = decode_permissions(mask)
+        expires_at = datetime.fromtimestamp(expires_ms / 1000, tz=timezone.utc)
+        request = self._request(
+            permissions=permissions,
+            expiration_at=expires_at if requested_expiry else None,
+            redirect_urls={"success_url": f"https://{tpp}.example/ok", "failure_url": f"https://{tpp}.example/no"},
+        )
+        response = self._response(
+            id=consent_id,
+            status="PENDING_SCA",
+            type="AIS",
+            permissions=permissions,
+            expires_at=expires_at,
+            next_action={"authorize_url": f"{self.spec.base_url}/consents/{consent_id}/authorize"},
+            links={
+                "self": f"/consents/{consent_id}",
+                "status": f"/consents/{consent_id}/status",
+                "revoke": f"/consents/{consent_id}/revoke",
+            },
+            correlation_id=correlation_id,
+        )
+        entry = {
+            "state": "FINAL",
+            "body_sha256": canonical_sha256(request.model_dump(mode="json")),
+            "response": response.model_dump(mode="json"),
+            "status_code": 201,
+            "headers": {"X-Request-ID": correlation_id, "Location": f"/consents/{consent_id}"},
+        }
+        ttl = IDEMPOTENCY_TTL_SECONDS - (self.spec.now_ms - created_ms) // 1000
+        self.pipe.set(f"idem:{tpp}:{idem_key}", json.dumps(entry), ex=max(ttl, 1))
+        self.pending += 1
+        if self.pending >= 1000:
+            self.flush()
+
+    def flush(self) -> None:
+        if self.pending:
+            self.pipe.execute()
+            self.written += self.pending
+            self.pending = 0
+
+def _add_stats(conn, spec: Spec, stats: Counter) -> None:
+    # Same grouping as the consent_stats triggers, into slot 0 (readers sum the slots). Chunks cover
+    # disjoint time slices, so concurrent workers rarely touch the same day's rows.
+    buf = io.StringIO()
+    for (t, p, day, status), n in stats.items():
+        day_s = time.strftime("%Y-%m-%d", time.gmtime(day * 86_400))
+        buf.write(f"{spec.tenants[t] or ''}\t{spec.tpps[p]}\t{day_s}\t{status}\t{n}\n")
+    buf.seek(0)
+    with conn.cursor() as cur:
+        cur.execute("CREATE TEMP TABLE gen_stats (tenant_key text, tpp_client_id text, day date, status text, n bigint) ON COMMIT DROP")
+        cur.copy_expert("COPY gen_stats FROM STDIN", buf)
+        cur.execute("""
+            INSERT INTO consent_stats AS cs (tenant_key, tpp_client_id, day, status, slot, n)
+            SELECT tenant_key, tpp_client_id, day, status, 0, n FROM gen_stats
+            ORDER BY 1, 2, 3, 4
+            ON CONFLICT (tenant_key, tpp_client_id, day, status, slot) DO UPDATE SET n = cs.n + EXCLUDED.n
+        """)
+
+def _load_chunk(spec: Spec, index: int):
+    rng = random.Random(f"{spec.seed}:{index}")
+    first = index * spec.chunk_rows
+    n = min(spec.chunk_rows, spec.rows - first)
+    step = (spec.now_ms - spec.start_ms) / spec.rows
+    t0 = spec.start_ms + first * step
+    idem_since = spec.now_ms - IDEMPOTENCY_TTL_SECONDS * 1000
+    sweep_lag_ms = settings.EXPIRY_SWEEP_SECONDS * 1000
+    retention_ms = settings.ARCHIVE_RETENTION_DAYS * _DAY_MS
+    masks = list(range(1, 1 << len(PERMISSION_BITS)))
+
+    tenant_ix = rng.choices(range(len(spec.tenants)), cum_weights=spec.tenant_cum, k=n)
+    tpp_ix = rng.choices(range(len(spec.tpps)), cum_weights=spec.tpp_cum, k=n)
+    picks = rng.choices(spec.statuses, cum_weights=spec.status_cum, k=n)
+
+    buffers: Dict[Tuple[int, str], io.StringIO] = defaultdict(io.StringIO)
+    buffered: Counter = Counter()
+    stats: Dict[int, Counter] = defaultdict(Counter)
+    idem = _IdempotencyWriter(spec) if spec.redis_url else None
+
+    def flush(key) -> None:
+        shard, table = key
+        buf = buffers.pop(key)
+        buf.seek(0)
+        with _conn(spec, shard).cursor() as cur:
+            cur.copy_expert(_COPY[table], buf)
+        buffered[key] = 0
+
+    for j in range(n):
+        created = int(t0 + (j + rng.random()) * step)
+        tenant, tpp = spec.tenants[tenant_ix[j]], spec.tpps[tpp_ix[j]]
+        shard = spec.tenant_shard[tenant_ix[j]]
+        consent_id = _uuid7(created, rng.getrandbits(74), shard)
+
+        requested_expiry = rng.random() >= spec.expiry_default_share
+        days = 1 + int(rng.random() * MAX_EXPIRY_DAYS) if requested_expiry else MAX_EXPIRY_DAYS
+        expires = created + days * _DAY_MS
+        status = picks[j]
+        if status in ACTIVE_STATUSES and expires <= spec.now_ms and rng.random() >= spec.overdue:
+            status = "EXPIRED"
+
+        mask = masks[int(rng.random() * len(masks))]
+        psu = sca_id = None
+        version = 1
+        updated = created
+        if status != "PENDING_SCA":
+            psu = f"psu-{int(rng.random() * spec.psus)}"
+            sca_id = settings.SCA_STATE_ACTIVE_KEY_ID + "." + base64.urlsafe_b64encode(rng.randbytes(44)).decode().rstrip("=")
+            updated = created + 5_000 + int(rng.random() * 295_000)  # SCA round trip
+            version = 2
+            if status == "REVOKED":
+                updated += int(rng.random() * max(0, min(expires, spec.now_ms) - updated))
+                version = 3
+            elif status == "EXPIRED":
+                updated = expires + int(rng.random() * sweep_lag_ms)
+                version = 3
+            updated = min(updated, spec.now_ms)
+
+        ip = rng.getrandbits(24)
+        fields = [  # _COLUMNS order
+            consent_id, tenant or "\\N", tpp, psu or "\\N", "AIS", status, str(mask),
+            "t" if rng.random() < 0.9 else "f", _ts(expires),
+            f"https://{tpp}.example/ok", f"https://{tpp}.example/no", "\\N", sca_id or "\\N",
+            _ts(created), _ts(updated), f"10.{ip >> 16}.{(ip >> 8) & 0xFF}.{1 + (ip & 0xFF) % 254}",
+            "\\N", str(version),
+        ]
+        table = "consents"
+        if spec.archive_cutoff_ms is not None and status in TERMINAL_STATUSES and updated < spec.archive_cutoff_ms:
+            table = "consents_archive"
+            fields.append(_ts(min(updated + retention_ms, spec.now_ms)))
+        key = (shard, table)
+        buffers[key].write("\t".join(fields) + "\n")
+        buffered[key] += 1
+        if buffered[key] >= _FLUSH_ROWS:
+            flush(key)
+        stats[shard][(tenant_ix[j], tpp_ix[j], created // _DAY_MS, status)] += 1
+
+        if created >= idem_since:
+            # Drawn with or without --no-redis, so the rows don't depend on it
+            idem_key = str(uuid.UUID(int=rng.getrandbits(128), version=4))
+            correlation_id = str(uuid.UUID(int=rng.getrandbits(128), version=4))
+            if idem is not None:
+                idem.add(consent_id, tpp, mask, created, expires, requested_expiry, idem_key, correlation_id)
+
+    for key in list(buffers):
+        flush(key)
+    # Rows and their counts commit together
+    for shard, counts in stats.items():
+        conn = _conn(spec, shard)
+        _add_stats(conn, spec, counts)
+        conn.commit()
+    if idem is not None:
+        idem.flush()
+    return n, idem.written if idem is not None else 0
+
+def _run_chunk(args):
+    return _load_chunk(*args)
+
+# ---- Coordinator side -----------------------------------------------------------
+
+@dataclass
+class _Deferred:
+    table: str
+    index_defs: List[str]      # CREATE INDEX statements, built in parallel
+    constraint_defs: List[str]  # ALTER TABLE ... ADD CONSTRAINT, after the indexes
+
+def _drop_indexes(engine: Engine, table: str) -> _Deferred:
+    deferred = _Deferred(table, [], [])
+    with engine.begin() as conn:
+        partitioned = conn.execute(text("SELECT relkind = 'p' FROM pg_class WHERE oid = CAST(:t AS regclass)"), {"t": table}).scalar()
+        # Primary/unique keys nothing references: a regular table rebuilds the index and attaches it,
+        # a partitioned one (no USING INDEX there) re-adds the constraint
+        for name, definition, index_def in conn.execute(text("""
+            SELECT c.conname, pg_get_constraintdef(c.oid), pg_get_indexdef(c.conindid)
+            FROM pg_constraint c
+            WHERE c.conrelid = CAST(:t AS regclass) AND c.contype IN ('p', 'u')
+              AND NOT EXISTS (SELECT 1 FROM pg_constraint f WHERE f.contype = 'f' AND f.conindid = c.conindid)
+        """), {"t": table}).all():
+            conn.execute(text(f'ALTER TABLE {table} DROP CONSTRAINT "{name}"'))
+            if partitioned:
+                deferred.constraint_defs.append(f'ALTER TABLE {table} ADD CONSTRAINT "{name}" {definition}')
+            else:
+                deferred.index_defs.append(index_def)
+                kind = "PRIMARY KEY" if definition.startswith("PRIMARY KEY") else "UNIQUE"
+                deferred.constraint_defs.append(f'ALTER TABLE {table} ADD CONSTRAINT "{name}" {kind} USING INDEX "{name}"')
+        for name, index_def in conn.execute(text("""
+            SELECT i.relname, pg_get_indexdef(i.oid)
+            FROM pg_index x JOIN pg_class i ON i.oid = x.indexrelid
+            WHERE x.indrelid = CAST(:t AS regclass)
+              AND NOT EXISTS (SELECT 1 FROM pg_constraint c WHERE c.conindid = i.oid)
+        """), {"t": table}).all():
+            conn.execute(text(f'DROP INDEX "{name}"'))
+            # On a partitioned table this reads "ON ONLY", which would leave the partitions unindexed
+            deferred.index_defs.append(index_def.replace(" ON ONLY ", " ON ", 1))
+    return deferred
+
+def _rebuild(engine: Engine, deferred: List[_Deferred], parallel: int, maintenance_work_mem: str) -> None:
+    def build(statement: str) -> None:
+        with engine.connect() as conn:
+            conn.execute(text(f"SET maintenance_work_mem = '{maintenance_work_mem}'"))
+            start = time.perf_counter()
+            conn.execute(text(statement))
+            conn.commit()
+            print(f"  {time.perf_counter() - start:7.1f}s  {statement}")
+
+    with ThreadPoolExecutor(max_workers=parallel) as pool:
+        list(pool.map(build, [s for d in deferred for s in d.index_defs]))
+    for d in deferred:
+        for statement in d.constraint_defs:
+            build(statement)
+
+def _prepare(engine: Engine, spec: Spec, args) -> List[_Deferred]:
+    with engine.begin() as conn:
+        if args.truncate:
+            conn.execute(text("TRUNCATE consents, consents_archive, consent_stats, consent_events"))
+        if spec.archive_cutoff_ms is not None:
+            conn.execute(text("""
+                SELECT consents_archive_ensure_partition(m::date)
+                FROM generate_series(date_trunc('month', to_timestamp(:start / 1000.0)), date_trunc('month', now()), interval '1 month') AS m
+            """), {"start": spec.start_ms})
+        empty = {t: not conn.execute(text(f"SELECT EXISTS (SELECT 1 FROM {t})")).scalar() for t in _TABLES}
+        conn.execute(text("ALTER TABLE consents DISABLE TRIGGER consent_stats_insert"))
+    if args.keep_indexes:
+        return []
+    return [_drop_indexes(engine, t) for t in _TABLES if empty[t]]
+
+def _build_spec(args) -> Spec:
+    now = datetime.fromisoformat(args.now) if args.now else datetime.now(timezone.utc)
+    now_ms = int(now.timestamp() * 1000)
+    tenants: List[Optional[str]] = args.tenant or [f"tenant-{i:03d}" for i in range(args.tenants)] or [None]
+    tpps = [f"tpp-{i:04d}" for i in range(args.tpps)]
+    statuses, status_cum = _parse_mix(args.status_mix)
+    return Spec(
+        rows=args.rows,
+        chunk_rows=args.chunk_rows,
+        seed=args.seed,
+        now_ms=now_ms,
+        start_ms=now_ms - args.days * _DAY_MS,
+        tenants=tenants,
+        tenant_cum=_zipf_cum(len(tenants), args.tenant_skew),
+        tenant_shard=[router.shard_for_tenant(t) for t in tenants],
+        tpps=tpps,
+        tpp_cum=_zipf_cum(len(tpps), args.tpp_skew),
+        statuses=statuses,
+        status_cum=status_cum,
+        overdue=args.overdue,
+        expiry_default_share=args.expiry_default_share,
+        psus=args.psus,
+        archive_cutoff_ms=now_ms - settings.ARCHIVE_RETENTION_DAYS * _DAY_MS if args.archive else None,
+        shard_urls={s: router.url(s) for s in router.shard_ids()},
+        redis_url=None if args.no_redis else settings.REDIS_URL,
+        base_url=args.base_url.rstrip("/"),
+    )
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--rows", type=int, default=1_000_000)
+    ap.add_argument("--workers", type=int, default=multiprocessing.cpu_count())
+    ap.add_argument("--chunk-rows", type=int, default=200_000, help="rows per seeded chunk (part of the seed: keep it fixed to reproduce)")
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--now", default=None, help="ISO timestamp the window ends at (default: now)")
+    ap.add_argument("--days", type=int, default=365, help="creation window")
+    ap.add_argument("--tenants", type=int, default=10, help="generated tenant-NNN names; 0 = no tenant")
+    ap.add_argument("--tenant", action="append", help="explicit tenant name (repeatable, overrides --tenants)")
+    ap.add_argument("--tenant-skew", type=float, default=1.0, help="Zipf exponent over tenants")
+    ap.add_argument("--tpps", type=int, default=200)
+    ap.add_argument("--tpp-skew", type=float, default=1.2, help="Zipf exponent over TPPs")
+    ap.add_argument("--psus", type=int, default=5_000_000)
+    ap.add_argument("--status-mix", default="GRANTED=55,REVOKED=15,REJECTED=10,EXPIRED=15,PENDING_SCA=5")
+    ap.add_argument("--overdue", type=float, default=0.001)
+    ap.add_argument("--expiry-default-share", type=float, default=0.6)
+    ap.add_argument("--archive", action="store_true")
+    ap.add_argument("--no-redis", action="store_true", help="skip idempotency entries")
+    ap.add_argument("--base-url", default="http://localhost:8000")
+    ap.add_argument("--truncate", action="store_true", help="empty consents, consents_archive, consent_stats and consent_events first")
+    ap.add_argument("--keep-indexes", action="store_true", help="never drop indexes, even into empty tables")
+    ap.add_argument("--index-parallel", type=int, default=4, help="concurrent index builds per shard")
+    ap.add_argument("--maintenance-work-mem", default="1GB")
+    args = ap.parse_args()
+
+    spec = _build_spec(args)
+    shards = sorted(set(spec.tenant_shard))
+    print(f"now={datetime.fromtimestamp(spec.now_ms / 1000, tz=timezone.utc).isoformat()} seed={spec.seed} "
+          f"rows={spec.rows} chunks={spec.chunks} workers={args.workers} shards={shards}")
+
+    deferred: Dict[int, List[_Deferred]] = {}
+    written = idem_written = 0
+    start = time.perf_counter()
+    try:
+        for shard in shards:
+            deferred[shard] = _prepare(router.engine(shard), spec, args)
+            for d in deferred[shard]:
+                print(f"shard {shard}: {d.table}: {len(d.index_defs)} indexes and {len(d.constraint_defs)} constraints deferred")
+        with multiprocessing.Pool(args.workers) as pool:
+            for n, idem_n in pool.imap_unordered(_run_chunk, [(spec, i) for i in range(spec.chunks)]):
+                written += n
+                idem_written += idem_n
+                elapsed = time.perf_counter() - start
+                print(f"\r{written:>12} rows  {written / elapsed:>10.0f} rows/s  {idem_written} idempotency entries", end="", flush=True)
+        load_s = time.perf_counter() - start
+        print()
+    finally:
+        for shard in deferred:
+            with router.engine(shard).begin() as conn:
+                conn.execute(text("ALTER TABLE consents ENABLE TRIGGER consent_stats_insert"))
+
+    for shard in shards:
+        if deferred[shard]:
+            print(f"shard {shard}: building indexes")
+            _rebuild(router.engine(shard), deferred[shard], args.index_parallel, args.maintenance_work_mem)
+        with router.engine(shard).begin() as conn:
+            conn.execute(text("ANALYZE consents, consents_archive, consent_stats"))
+    total_s = time.perf_counter() - start
+    print(f"loaded {written} rows in {load_s:.1f}s ({written / load_s:.0f} rows/s), "
+          f"{total_s:.1f}s with indexes and ANALYZE; {idem_written} idempotency entries")
+
+if __name__ == "__main__":
+    main()
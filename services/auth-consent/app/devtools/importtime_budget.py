@@ -0,0 +1,65 @@
+"""
+Cold-start import budget check, based on `python -X importtime`.
+
+    python -m app.devtools.importtime_budget                  # check both targets
+    python -m app.devtools.importtime_budget --target worker --top 20
+
+Each target is imported in a fresh interpreter (median of --runs). Exits 1
+when a target exceeds its budget, so CI can gate on it. Budgets are
+deliberately loose; tighten them as heavy imports get deferred.
+"""
+from __future__ import annotations
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+TARGETS: Dict[str, Tuple[str, int]] = {
+    # name: (code to time, budget in ms)
+    "api": ("from app.main import create_app; create_app()", 1500),
+    "worker": ("import app.worker", 600),
+}
+
+def _measure(code: str) -> Tuple[float, List[Tuple[int, str]]]:
+    """Total import time in ms and (cumulative_us, module) for top-level imports."""
+    env = {**os.environ, "PYTHONDONTWRITEBYTECODE": "0"}
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True, text=True, env=env, check=True,
+    )
+    top: List[Tuple[int, str]] = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # Top-level entries have exactly one space of indentation before the name
+        if not name.startswith("  "):
+            top.append((int(cumulative), name.strip()))
+    return sum(c for c, _ in top) / 1000, top
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--target", choices=sorted(TARGETS), action="append")
+    ap.add_argument("--runs", type=int, default=5)
+    ap.add_argument("--top", type=int, default=10, help="show the N slowest top-level imports")
+    ap.add_argument("--budget-ms", type=int, help="override the budget for every selected target")
+    args = ap.parse_args()
+
+    failed = False
+    for name in args.target or sorted(TARGETS):
+        code, budget = TARGETS[name]
+        budget = args.budget_ms or budget
+        _measure(code)  # warm the bytecode cache; the first run compiles .pyc files
+        runs = [_measure(code) for _ in range(args.runs)]
+        total = statistics.median(t for t, _ in runs)
+        verdict = "ok" if total <= budget else "OVER BUDGET"
+        failed |= total > budget
+        print(f"{name:<8} {total:>7.0f}ms  budget={budget}ms  {verdict}")
+        for cumulative, module in sorted(runs[-1][1], reverse=True)[: args.top]:
+            print(f"    {cumulative / 1000:>7.1f}ms  {module}")
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
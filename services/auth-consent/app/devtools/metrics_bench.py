@@ -0,0 +1,74 @@
+"""
+/metrics render cost with a large registry, in a private CollectorRegistry.
+
+    python -m app.devtools.metrics_bench --routes 20 --raw-paths 20000 --scrapers 8
+
+Renders the latency histogram three ways: bounded route labels (what the
+middleware produces now), the same plus --raw-paths distinct unmatched paths
+(what scanners used to add when the raw path was the fallback label), and the
+bounded registry behind ExpositionCache with --scrapers concurrent scrapes
+repeated --rounds times.
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+
+from prometheus_client import CollectorRegistry, Histogram, generate_latest
+
+from app.core.config import settings
+from app.core.metrics import UNMATCHED_ROUTE, ExpositionCache
+
+_STATUSES = ("200", "201", "302", "400", "401", "403", "404", "409", "429", "503")
+
+def _registry(routes: int, raw_paths: int) -> CollectorRegistry:
+    registry = CollectorRegistry()
+    h = Histogram(
+        "request_latency_seconds", "HTTP request latency in seconds",
+        labelnames=("route", "status_code"), buckets=settings.METRICS_LATENCY_BUCKETS, registry=registry,
+    )
+    for r in range(routes):
+        for status in _STATUSES:
+            h.labels(route=f"/consents/{{consent_id}}/r{r}", status_code=status).observe(0.02)
+    h.labels(route=UNMATCHED_ROUTE, status_code="404").observe(0.001)
+    for _ in range(raw_paths):
+        h.labels(route=f"/wp-admin/{uuid.uuid4().hex}.php", status_code="404").observe(0.001)
+    return registry
+
+def _time_render(registry: CollectorRegistry, runs: int):
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        data = generate_latest(registry)
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times), len(data)
+
+async def _scrape_storm(registry: CollectorRegistry, scrapers: int, rounds: int, ttl: float):
+    cache = ExpositionCache(registry, ttl_seconds=ttl)
+    start = time.perf_counter()
+    for _ in range(rounds):
+        await asyncio.gather(*(cache.get() for _ in range(scrapers)))
+    return (time.perf_counter() - start) * 1000 / rounds, cache.renders
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--routes", type=int, default=20)
+    ap.add_argument("--raw-paths", type=int, default=20000)
+    ap.add_argument("--runs", type=int, default=5)
+    ap.add_argument("--scrapers", type=int, default=8)
+    ap.add_argument("--rounds", type=int, default=20)
+    args = ap.parse_args()
+
+    bounded = _registry(args.routes, 0)
+    for name, registry in (("bounded", bounded), (f"+{args.raw_paths} raw paths", _registry(args.routes, args.raw_paths))):
+        ms, size = _time_render(registry, args.runs)
+        print(f"{name:<24} render {ms:8.1f} ms  {size / 1024:9.1f} KiB")
+
+    for ttl in (0.0, 1.0):
+        ms, renders = asyncio.run(_scrape_storm(bounded, args.scrapers, args.rounds, ttl))
+        print(f"{args.scrapers} scrapers, cache {ttl:.0f}s  {ms:8.1f} ms/round  {renders} renders for {args.scrapers * args.rounds} scrapes")
+
+if __name__ == "__main__":
+    main()
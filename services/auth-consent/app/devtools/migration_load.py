@@ -0,0 +1,182 @@
+"""
+Schema changes under write load: run the app.db.migrations helpers (and their
+plain equivalents) on `consents` while writer threads insert and update
+consents, and report the writers' latency during each step.
+
+    python -m app.devtools.migration_load --writers 4 --max-write-ms 500
+
+Needs a populated consents table in DATABASE_URL (app.devtools.gen_dataset),
+big enough that an index build takes a few seconds. Steps:
+
+    baseline            no DDL, for reference
+    index_plain         CREATE INDEX: writes block for the whole build
+    index_online        create_index_concurrently / drop_index_concurrently
+    column_behind_txn   ALTER TABLE ADD COLUMN while a long transaction reads consents:
+                        plain, the ALTER queues behind it and every write queues behind the ALTER
+    column_online       the same through execute_ddl (short lock_timeout, retried)
+    backfill_online     backfill() of the scratch column in throttled batches
+
+Exits 1 when a write in an *_online step took longer than --max-write-ms.
+The scratch index and column (_mig_probe) are dropped at the end.
+"""
+from __future__ import annotations
+import argparse
+import sys
+import threading
+import time
+from typing import Callable, Dict, List
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import NullPool
+
+from app.core.config import settings
+from app.db.migrations import add_column, backfill, create_index_concurrently, drop_index_concurrently, execute_ddl
+from app.utils.ids import uuid7
+
+_INSERT = text("""
+    INSERT INTO consents (id, tenant_id, tpp_client_id, type, status, permissions_mask, recurring, expires_at,
+                          redirect_success_url, redirect_failure_url, version)
+    VALUES (:id, 'load', 'tpp-load', 'AIS', 'PENDING_SCA', 1, true, now() + interval '90 days',
+            'https://tpp.example/ok', 'https://tpp.example/no', 1)
+""")
+_UPDATE = text("UPDATE consents SET status = 'GRANTED', version = version + 1 WHERE id = :id")
+
+def _pct(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+class Writers:
+    """Threads that each insert a consent and then grant it, recording per-statement latency."""
+
+    def __init__(self, engine, count: int) -> None:
+        self.engine = engine
+        self.count = count
+        self.latency: List[float] = []
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    def _loop(self) -> None:
+        with self.engine.connect() as conn:
+            while not self._stop.is_set():
+                consent_id = uuid7()
+                for stmt in (_INSERT, _UPDATE):
+                    start = time.perf_counter()
+                    conn.execute(stmt, {"id": consent_id})
+                    conn.commit()
+                    self.latency.append((time.perf_counter() - start) * 1000)
+                time.sleep(0.005)
+
+    def __enter__(self) -> "Writers":
+        self._threads = [threading.Thread(target=self._loop, daemon=True) for _ in range(self.count)]
+        for t in self._threads:
+            t.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        for t in self._threads:
+            t.join()
+
+def _autocommit(engine):
+    return engine.connect().execution_options(isolation_level="AUTOCOMMIT")
+
+def _long_reader(engine, seconds: float) -> threading.Thread:
+    # An ordinary long transaction (report query, stuck client) holding ACCESS SHARE on consents
+    def run():
+        with engine.connect() as conn:
+            conn.execute(text("SELECT count(*) FROM (SELECT id FROM consents LIMIT 1) s"))
+            time.sleep(seconds)
+            conn.rollback()
+    t = threading.Thread(target=run, daemon=True)
+    t.start()
+    time.sleep(0.2)
+    return t
+
+def _steps(engine, args) -> Dict[str, Callable[[], None]]:
+    def baseline():
+        time.sleep(args.baseline_seconds)
+
+    def index_plain():
+        with _autocommit(engine) as conn:
+            conn.execute(text("CREATE INDEX _mig_probe_idx ON consents (created_by_ip, updated_at)"))
+            conn.execute(text("DROP INDEX _mig_probe_idx"))
+
+    def index_online():
+        with _autocommit(engine) as conn:
+            create_index_concurrently(conn, "_mig_probe_idx", "consents", "created_by_ip, updated_at")
+            drop_index_concurrently(conn, "_mig_probe_idx")
+
+    def column_behind_txn():
+        reader = _long_reader(engine, args.long_txn_seconds)
+        with _autocommit(engine) as conn:
+            conn.execute(text("ALTER TABLE consents ADD COLUMN IF NOT EXISTS _mig_probe smallint"))
+            conn.execute(text("ALTER TABLE consents DROP COLUMN IF EXISTS _mig_probe"))
+        reader.join()
+
+    def column_online():
+        reader = _long_reader(engine, args.long_txn_seconds)
+        with _autocommit(engine) as conn:
+            execute_ddl(conn, "ALTER TABLE consents ADD COLUMN IF NOT EXISTS _mig_probe smallint",
+                        lock_timeout_ms=args.lock_timeout_ms, attempts=100)
+        reader.join()
+
+    def backfill_online():
+        with _autocommit(engine) as conn:
+            add_column(conn, "consents", "_mig_probe smallint")
+            backfill(conn, "consents", set_sql="_mig_probe = permissions_mask", where_sql="_mig_probe IS NULL",
+                     batch_size=args.batch_size, pause_seconds=args.pause_seconds, report_every_seconds=5)
+
+    return {
+        "baseline": baseline,
+        "index_plain": index_plain,
+        "index_online": index_online,
+        "column_behind_txn": column_behind_txn,
+        "column_online": column_online,
+        "backfill_online": backfill_online,
+    }
+
+def _cleanup(engine) -> None:
+    with _autocommit(engine) as conn:
+        conn.execute(text("DROP INDEX IF EXISTS _mig_probe_idx"))
+        conn.execute(text("ALTER TABLE consents DROP COLUMN IF EXISTS _mig_probe"))
+        conn.execute(text("DELETE FROM consents WHERE tenant_id = 'load' AND tpp_client_id = 'tpp-load'"))
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--writers", type=int, default=4)
+    ap.add_argument("--step", action="append", help="repeatable; default: all, in order")
+    ap.add_argument("--max-write-ms", type=float, default=500.0)
+    ap.add_argument("--baseline-seconds", type=float, default=5.0)
+    ap.add_argument("--long-txn-seconds", type=float, default=5.0)
+    ap.add_argument("--lock-timeout-ms", type=int, default=100)
+    ap.add_argument("--batch-size", type=int, default=settings.MIGRATION_BACKFILL_BATCH_SIZE)
+    ap.add_argument("--pause-seconds", type=float, default=settings.MIGRATION_BACKFILL_PAUSE_SECONDS)
+    args = ap.parse_args()
+
+    import logging
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(message)s")
+    engine = create_engine(settings.DATABASE_URL, poolclass=NullPool)
+    steps = _steps(engine, args)
+    over_budget = []
+    try:
+        for name in args.step or list(steps):
+            with Writers(engine, args.writers) as w:
+                time.sleep(0.5)
+                start = time.perf_counter()
+                steps[name]()
+                elapsed = time.perf_counter() - start
+            lat = w.latency
+            print(f"{name:<18} {elapsed:6.1f}s  writes {len(lat):>6}  p50 {_pct(lat, 0.5):7.1f}  "
+                  f"p99 {_pct(lat, 0.99):8.1f}  max {_pct(lat, 1.0):8.1f} ms")
+            if name.endswith("_online") and _pct(lat, 1.0) > args.max_write_ms:
+                over_budget.append(name)
+    finally:
+        _cleanup(engine)
+    if over_budget:
+        print(f"write latency above {args.max_write_ms:.0f} ms during: {', '.join(over_budget)}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
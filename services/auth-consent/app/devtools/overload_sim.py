@@ -0,0 +1,81 @@
+"""
+Drive AdmissionMiddleware against a stand-in app whose "DB" slows down mid-run,
+and print how the concurrency limit and shed counts react.
+
+    python -m app.devtools.overload_sim --concurrency 200 --slow-ms 250
+
+The stand-in serves any path after sleeping for the current "DB latency" behind
+a fixed-size semaphore (the connection pool). No Postgres or Redis needed.
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import time
+from collections import Counter
+
+import httpx
+
+from app.middleware.admission import AdaptiveLimit, AdmissionMiddleware
+
+class SlowDbApp:
+    """Minimal ASGI app: waits for a pool slot, then sleeps `latency` seconds."""
+
+    def __init__(self, pool_size: int, latency: float) -> None:
+        self.pool = asyncio.Semaphore(pool_size)
+        self.latency = latency
+
+    async def __call__(self, scope, receive, send) -> None:
+        async with self.pool:
+            await asyncio.sleep(self.latency)
+        await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"text/plain")]})
+        await send({"type": "http.response.body", "body": b"ok"})
+
+async def _client_loop(client: httpx.AsyncClient, i: int, stop_at: float, results: Counter, latencies: list) -> None:
+    # Every 5th virtual client is a writer; the rest poll
+    write = i % 5 == 0
+    while time.monotonic() < stop_at:
+        start = time.perf_counter()
+        if write:
+            r = await client.post("/v1/consents", json={})
+        else:
+            r = await client.get("/v1/consents/00000000-0000-0000-0000-000000000000/status")
+        kind = "write" if write else "read"
+        results[(kind, r.status_code)] += 1
+        if r.status_code == 200:
+            latencies.append(time.perf_counter() - start)
+        else:
+            await asyncio.sleep(float(r.headers.get("retry-after", "1")) / 10)
+
+async def _run(args) -> None:
+    backend = SlowDbApp(pool_size=args.pool_size, latency=args.fast_ms / 1000)
+    mw = AdmissionMiddleware(backend, limiter=AdaptiveLimit(initial=args.initial_limit))
+    transport = httpx.ASGITransport(app=mw)
+    async with httpx.AsyncClient(transport=transport, base_url="http://sim") as client:
+        for phase, latency_ms in (("healthy", args.fast_ms), ("degraded", args.slow_ms), ("recovered", args.fast_ms)):
+            backend.latency = latency_ms / 1000
+            results: Counter = Counter()
+            latencies: list = []
+            stop_at = time.monotonic() + args.phase_seconds
+            await asyncio.gather(*(
+                _client_loop(client, i, stop_at, results, latencies) for i in range(args.concurrency)
+            ))
+            latencies.sort()
+            p99 = latencies[int(len(latencies) * 0.99) - 1] * 1000 if latencies else 0.0
+            print(
+                f"{phase:<10} db={latency_ms:>4}ms limit={mw.limiter.limit:>6.1f} "
+                f"write ok/shed={results[('write', 200)]}/{results[('write', 503)]} "
+                f"read ok/shed={results[('read', 200)]}/{results[('read', 503)]} p99={p99:.0f}ms"
+            )
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--concurrency", type=int, default=200)
+    ap.add_argument("--pool-size", type=int, default=10)
+    ap.add_argument("--initial-limit", type=int, default=64)
+    ap.add_argument("--fast-ms", type=int, default=5)
+    ap.add_argument("--slow-ms", type=int, default=250)
+    ap.add_argument("--phase-seconds", type=float, default=5.0)
+    asyncio.run(_run(ap.parse_args()))
+
+if __name__ == "__main__":
+    main()
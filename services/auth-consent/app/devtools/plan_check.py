@@ -0,0 +1,260 @@
+"""
+Query-plan contract for the repository layer: run each repository function
+against a seeded Postgres, EXPLAIN (FORMAT JSON) every statement it issues,
+and compare the plan shape with app/devtools/plan_baseline.json.
+
+    # seed (the baseline was recorded on this dataset)
+    python -m app.devtools.gen_dataset --rows 2000000 --seed 1 --archive --no-redis --truncate
+    python -m app.devtools.plan_check                 # exit 1 on any regression
+    python -m app.devtools.plan_check --update        # re-record after a deliberate change
+    python -m app.devtools.plan_check --case consents.expire_due --show
+
+Each case runs inside a transaction that is rolled back afterwards (the
+repositories' own commits become savepoint releases), so the data is left as
+it was. Statements are EXPLAINed (not ANALYZEd) with their real parameters
+just before they execute; a case stops at the first statement it repeats
+(expire_due's next batch, for instance).
+
+A statement fails the check when:
+  - an index the baseline used is no longer used
+  - it sequentially scans a relation estimated above --seq-scan-rows rows
+    (unless the relation is in the case's "allow_seq_scan" list)
+  - its estimated total cost exceeds the baseline's by more than --cost-factor
+  - the case issues a different number of statements than recorded
+--update keeps hand-edited allow_seq_scan lists. Monthly partitions are
+compared by their parent's pattern (consents_archive_YYYYMM_pkey), and
+the queries filter on now(), so seed with the default --now.
+"""
+from __future__ import annotations
+import argparse
+import json
+import re
+import sys
+import uuid
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+
+from app.api.schemas.consents import ConsentCreateRequest
+from app.db.shards import router
+from app.repositories import archive, consent_events, consent_reads, consent_stats, consents, outbox, reminders, revocation_jobs
+
+BASELINE = Path(__file__).with_name("plan_baseline.json")
+_EXPLAINABLE = ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH")
+_PARTITION_MONTH = re.compile(r"_\d{6}(?=_|$)")
+
+class _Repeat(Exception):
+    """Raised from the cursor hook to end a case at its first repeated statement."""
+
+@dataclass
+class Samples:
+    granted: Any
+    pending: Any
+    archived: Any
+
+    @classmethod
+    def load(cls, db: Session) -> "Samples":
+        def row(sql: str):
+            return db.execute(text(sql)).first()
+        granted = row("SELECT id, tpp_client_id, tenant_id, psu_id FROM consents WHERE status = 'GRANTED' ORDER BY created_at DESC LIMIT 1")
+        pending = row("SELECT id, tpp_client_id, tenant_id, psu_id FROM consents WHERE status = 'PENDING_SCA' ORDER BY created_at DESC LIMIT 1")
+        archived = row("SELECT id FROM consents_archive LIMIT 1")
+        if granted is None or pending is None:
+            raise SystemExit("no GRANTED / PENDING_SCA consents: seed the database first (see --help)")
+        return cls(granted, pending, archived.id if archived is not None else uuid.uuid4())
+
+_NOW = datetime.now(timezone.utc)
+
+def _create(db: Session, s: Samples) -> None:
+    payload = ConsentCreateRequest(
+        permissions=["accounts:read"],
+        redirect_urls={"success_url": "https://tpp.example/ok", "failure_url": "https://tpp.example/no"},
+    )
+    consents.create(
+        db, consent_id=uuid.uuid4(), tpp_client_id=s.pending.tpp_client_id, payload=payload,
+        expires_at=_NOW + timedelta(days=90), status="PENDING_SCA", client_ip=None, tenant_id=s.pending.tenant_id,
+    )
+
+# name -> repository call; the sweeper and bulk revocation batches are the ones that matter most
+CASES: Dict[str, Callable[[Session, Samples], Any]] = {
+    "consent_reads.get_status_view": lambda db, s: consent_reads.get_status_view(db, s.granted.id),
+    "consent_reads.get_status_view.archived": lambda db, s: consent_reads.get_status_view(db, s.archived),
+    "consent_reads.get_record": lambda db, s: consent_reads.get_record(db, s.granted.id),
+    "consents.get_by_id.archived": lambda db, s: consents.get_by_id(db, s.archived),
+    "consents.create": _create,
+    "consents.update_status_if_allowed": lambda db, s: consents.update_status_if_allowed(
+        db, consent_id=s.granted.id, allowed_from=("GRANTED",), new_status="REVOKED", actor="plan-check"),
+    "consents.start_sca_if_pending": lambda db, s: consents.start_sca_if_pending(
+        db, consent_id=s.pending.id, sca_id="plan-check", tpp_client_id=s.pending.tpp_client_id, tenant_id=s.pending.tenant_id),
+    "consents.complete_sca": lambda db, s: consents.complete_sca(
+        db, consent_id=s.pending.id, sca_id="plan-check", new_status="GRANTED", actor="plan-check"),
+    "consents.expire_due": lambda db, s: consents.expire_due(db, batch_size=1000),
+    "consents.revoke_matching_batch.psu_id": lambda db, s: consents.revoke_matching_batch(
+        db, selector="psu_id", value=s.granted.psu_id, batch_size=500, actor="plan-check"),
+    "consents.revoke_matching_batch.tpp_client_id": lambda db, s: consents.revoke_matching_batch(
+        db, selector="tpp_client_id", value=s.granted.tpp_client_id, batch_size=500, actor="plan-check"),
+    "consents.revoke_matching_batch.tenant_id": lambda db, s: consents.revoke_matching_batch(
+        db, selector="tenant_id", value=s.granted.tenant_id, batch_size=500, actor="plan-check"),
+    "consents.has_active_matching.psu_id": lambda db, s: consents.has_active_matching(db, selector="psu_id", value=s.granted.psu_id),
+    "consents.has_active_matching.tpp_client_id": lambda db, s: consents.has_active_matching(
+        db, selector="tpp_client_id", value=s.granted.tpp_client_id),
+    "archive.archive_terminal_batch": lambda db, s: archive.archive_terminal_batch(
+        db, cutoff=_NOW - timedelta(days=180), batch_size=1000),
+    "consent_events.list_for_consent": lambda db, s: consent_events.list_for_consent(db, s.granted.id),
+    "consent_stats.counts.by_status": lambda db, s: consent_stats.counts(db, group_by=["status"]),
+    "consent_stats.counts.tpp_days": lambda db, s: consent_stats.counts(
+        db, group_by=["day", "status"], tpp_client_id=s.granted.tpp_client_id, day_from=date.today() - timedelta(days=30)),
+    "outbox.claim_batch": lambda db, s: outbox.claim_batch(db, limit=100, lease_seconds=30),
+    "outbox.backlog_stats": lambda db, s: outbox.backlog_stats(db),
+    "reminders.claim_new": lambda db, s: reminders.claim_new(db, window_seconds=7 * 86400, limit=500, lease_seconds=30),
+    "reminders.claim_retries": lambda db, s: reminders.claim_retries(db, limit=500, lease_seconds=30),
+    "reminders.backlog_stats": lambda db, s: reminders.backlog_stats(db, window_seconds=7 * 86400),
+    "revocation_jobs.claim_job": lambda db, s: revocation_jobs.claim_job(db, lease_seconds=30),
+    "revocation_jobs.fail_exhausted": lambda db, s: revocation_jobs.fail_exhausted(db, max_attempts=5),
+}
+
+# ---- Capturing ------------------------------------------------------------------
+
+def _walk(node: dict):
+    yield node
+    for child in node.get("Plans", ()):
+        yield from _walk(child)
+
+def _generic(name: str) -> str:
+    # consent_events_202611_consent_id_ts_idx -> consent_events_YYYYMM_consent_id_ts_idx
+    return _PARTITION_MONTH.sub("_YYYYMM", name)
+
+def _summarize(sql: str, plan: dict) -> dict:
+    nodes = list(_walk(plan["Plan"]))
+    return {
+        "sql": " ".join(sql.split())[:200],  # to recognise the statement in a diff, not to compare
+        "indexes": sorted({_generic(n["Index Name"]) for n in nodes if "Index Name" in n}),
+        "seq_scans": sorted({_generic(n["Relation Name"]) for n in nodes if n["Node Type"] == "Seq Scan"}),
+        "_seq_scanned": sorted({n["Relation Name"] for n in nodes if n["Node Type"] == "Seq Scan"}),
+        "cost": round(plan["Plan"]["Total Cost"], 2),
+        "plan": [_describe(n) for n in nodes],
+    }
+
+def _describe(node: dict) -> str:
+    text_ = node["Node Type"]
+    if "Index Name" in node:
+        text_ += f" using {node['Index Name']}"
+    if "Relation Name" in node:
+        text_ += f" on {node['Relation Name']}"
+    return f"{text_} (rows={node['Plan Rows']}, cost={node['Total Cost']})"
+
+def run_case(engine, name: str, samples_of: Callable[[Session], Samples]) -> List[dict]:
+    captured: List[dict] = []
+    seen = set()
+
+    with engine.connect() as conn:
+        outer = conn.begin()
+
+        def explain(conn_, cursor, statement, parameters, context, executemany):
+            if statement.lstrip().split(None, 1)[0].upper() not in _EXPLAINABLE:
+                return
+            if statement in seen:
+                raise _Repeat()
+            seen.add(statement)
+            # executemany hands over a list; insertmanyvalues batches are already one statement + dict
+            params = parameters[0] if isinstance(parameters, (list, tuple)) and parameters else parameters
+            cursor.execute("EXPLAIN (FORMAT JSON) " + statement, params)
+            captured.append(_summarize(statement, cursor.fetchone()[0][0]))
+
+        # Repository commits release a savepoint; the outer transaction is rolled back below
+        db = Session(bind=conn, join_transaction_mode="create_savepoint")
+        try:
+            samples = samples_of(db)
+            event.listen(conn, "before_cursor_execute", explain)
+            try:
+                CASES[name](db, samples)
+            except _Repeat:
+                pass
+            finally:
+                event.remove(conn, "before_cursor_execute", explain)
+        finally:
+            db.close()
+            outer.rollback()
+    return captured
+
+# ---- Checking -------------------------------------------------------------------
+
+def _row_estimates(engine) -> Dict[str, float]:
+    with engine.connect() as conn:
+        return dict(conn.execute(text(
+            "SELECT relname, reltuples FROM pg_class WHERE relkind IN ('r', 'p') AND relnamespace = 'public'::regnamespace"
+        )).all())
+
+def check_case(name: str, got: List[dict], expected: Optional[dict], rows: Dict[str, float], args) -> List[str]:
+    if expected is None:
+        return ["no baseline (run with --update)"]
+    problems = []
+    want = expected["statements"]
+    if len(got) != len(want):
+        problems.append(f"{len(got)} statements, baseline has {len(want)}")
+    allowed = set(expected.get("allow_seq_scan", ()))
+    for i, stmt in enumerate(got):
+        for rel in stmt["_seq_scanned"]:
+            if _generic(rel) not in allowed and rows.get(rel, 0) > args.seq_scan_rows:
+                problems.append(f"#{i}: Seq Scan on {rel} (~{rows[rel]:.0f} rows)")
+        if i >= len(want):
+            continue
+        missing = set(want[i]["indexes"]) - set(stmt["indexes"])
+        if missing:
+            problems.append(f"#{i}: no longer uses {', '.join(sorted(missing))}")
+        if stmt["cost"] > want[i]["cost"] * args.cost_factor:
+            problems.append(f"#{i}: estimated cost {stmt['cost']} > {args.cost_factor} x baseline {want[i]['cost']}")
+    return problems
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--case", action="append", choices=sorted(CASES), help="repeatable; default: all")
+    ap.add_argument("--shard", type=int, default=0)
+    ap.add_argument("--update", action="store_true", help="re-record the baseline for the selected cases")
+    ap.add_argument("--show", action="store_true", help="print every plan")
+    ap.add_argument("--seq-scan-rows", type=float, default=10_000)
+    ap.add_argument("--cost-factor", type=float, default=2.0)
+    ap.add_argument("--min-rows", type=float, default=100_000, help="refuse to judge plans on a smaller consents table")
+    args = ap.parse_args()
+
+    engine = router.engine(args.shard)
+    rows = _row_estimates(engine)
+    if rows.get("consents", 0) < args.min_rows:
+        raise SystemExit(f"consents has ~{rows.get('consents', 0):.0f} rows (< --min-rows): plans would not be representative; "
+                         "seed with app.devtools.gen_dataset and ANALYZE first")
+
+    baseline = json.loads(BASELINE.read_text()) if BASELINE.exists() else {"cases": {}}
+    failed = 0
+    for name in args.case or list(CASES):
+        got = run_case(engine, name, Samples.load)
+        if args.show:
+            for i, stmt in enumerate(got):
+                print(f"-- {name} #{i}: {stmt['sql']}")
+                for line in stmt["plan"]:
+                    print(f"     {line}")
+        if args.update:
+            previous = baseline["cases"].get(name, {})
+            baseline["cases"][name] = {
+                "allow_seq_scan": previous.get("allow_seq_scan", []),
+                "statements": [{k: v for k, v in s.items() if k != "plan" and not k.startswith("_")} for s in got],
+            }
+            print(f"recorded {name}: {len(got)} statements")
+            continue
+        problems = check_case(name, got, baseline["cases"].get(name), rows, args)
+        failed += bool(problems)
+        print(f"{'FAIL' if problems else 'ok  '} {name}")
+        for p in problems:
+            print(f"       {p}")
+
+    if args.update:
+        BASELINE.write_text(json.dumps(baseline, indent=2, sort_keys=True) + "\n")
+    elif failed:
+        print(f"\n{failed} case(s) regressed; if intended, re-record with --update and review the diff")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+"""
+End-to-end check of expiry reminder delivery: seed consents, run the
+reminders job against an SMTP sink until it's done, verify every PSU got
+exactly one digest with all of its due consents, and report throughput.
+
+    python -m app.devtools.reminder_check --psus 2000 --per-psu 3 --fail-rate 0.1
+    python -m app.devtools.reminder_check --smtp-host localhost --smtp-port 1025   # MailHog
+
+Needs DATABASE_URL with the schema (expiry_reminders included). The job works
+on every eligible consent in the window, so the check uses a short window
+(--window-minutes) and refuses to run if consents it didn't seed are in it.
+With the built-in stub (app.devtools.smtp_stub, the default) messages are
+verified as received; against an external server only the markers are.
+Seeded consents and their markers are deleted at the end.
+
+Seeded per PSU: --per-psu consents due for a reminder, plus one outside the
+window and one one-off (non-recurring) that must not be mentioned. Every
+tenth PSU has no email address and some have an unparseable one such as
+"(psu-13@example.test" (both discarded), PSUs at @reject.test get a 550
+(dead-lettered), and --fail-rate of the deliveries get a 451 (retried). A
+second pass checks that nothing is sent twice. Finally a message that
+aiosmtplib refuses to send (no usable recipient) must come back as a
+permanent failure of that message alone, with the pool still usable.
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import sys
+import time
+from collections import Counter
+from email.message import EmailMessage
+
+from sqlalchemy import text
+
+from app.core.smtp import SmtpPool
+from app.db.session import engine
+from app.devtools.smtp_stub import SmtpStub
+from app.housekeeping.reminders import ExpiryReminderMailer
+from app.utils.ids import uuid7
+
+TENANT = "reminder-check"
+PROBE = "probe@example.test"
+
+_INSERT = text("""
+    INSERT INTO consents (id, tenant_id, tpp_client_id, psu_id, type, status, permissions_mask, recurring,
+                          expires_at, redirect_success_url, redirect_failure_url, version)
+    VALUES (:id, :tenant, :tpp, :psu, 'AIS', 'GRANTED', 1, :recurring,
+            now() + make_interval(secs => :expires_in), 'https://tpp.example/ok', 'https://tpp.example/no', 1)
+""")
+
+def _psu(i: int) -> str:
+    if i % 10 == 9:
+        return f"psu-{i}"                 # no address
+    if i % 25 == 13:
+        return f"(psu-{i}@example.test"   # has an "@" but parses to no address
+    if i % 50 == 7:
+        return f"psu-{i}@reject.test"     # permanent failure
+    return f"psu-{i}@example.test"
+
+def _addressed(i: int) -> bool:
+    return i % 10 != 9 and i % 25 != 13
+
+def _seed(psus: int, per_psu: int, window_seconds: float) -> None:
+    rows = []
+    for i in range(psus):
+        for j in range(per_psu):
+            rows.append({"id": uuid7(), "tenant": TENANT, "tpp": f"tpp-{j % 7}", "psu": _psu(i), "recurring": True,
+                         "expires_in": window_seconds * (0.2 + 0.7 * ((i * per_psu + j) % 97) / 97)})
+        rows.append({"id": uuid7(), "tenant": TENANT, "tpp": "tpp-late", "psu": _psu(i), "recurring": True,
+                     "expires_in": window_seconds * 3})
+        rows.append({"id": uuid7(), "tenant": TENANT, "tpp": "tpp-oneoff", "psu": _psu(i), "recurring": False,
+                     "expires_in": window_seconds / 2})
+    with engine.begin() as conn:
+        for k in range(0, len(rows), 1000):
+            conn.execute(_INSERT, rows[k:k + 1000])
+
+def _foreign_in_window(window_seconds: float) -> int:
+    with engine.connect() as conn:
+        return conn.execute(text("""
+            SELECT count(*) FROM consents
+            WHERE status = 'GRANTED' AND recurring AND psu_id IS NOT NULL
+              AND expires_at > now() AND expires_at <= now() + make_interval(secs => :w)
+              AND tenant_id IS DISTINCT FROM :t
+        """), {"w": window_seconds, "t": TENANT}).scalar()
+
+def _marker_counts() -> Counter:
+    with engine.connect() as conn:
+        rows = conn.execute(text("SELECT status, count(*) FROM expiry_reminders WHERE tenant_id = :t GROUP BY 1"),
+                            {"t": TENANT}).all()
+    return Counter({status: n for status, n in rows})
+
+def _cleanup() -> None:
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM expiry_reminders WHERE tenant_id = :t"), {"t": TENANT})
+        conn.execute(text("DELETE FROM consents WHERE tenant_id = :t"), {"t": TENANT})
+
+async def _drain(mailer: ExpiryReminderMailer) -> int:
+    total = 0
+    while True:
+        n = await mailer.remind_once()
+        total += n
+        if not n:
+            # Retries become due after retry_base; wait for them unless nothing is pending
+            if not _marker_counts().get("PENDING"):
+                return total
+            await asyncio.sleep(0.2)
+
+async def _probe_unsendable(mailer: ExpiryReminderMailer) -> list:
+    """A message aiosmtplib rejects before talking to the server fails alone and permanently."""
+    failed = []
+    msg = EmailMessage()
+    msg["From"] = mailer.sender
+    msg["To"] = "(" + PROBE
+    msg["Subject"] = "probe"
+    msg.set_content("probe")
+    err = await mailer._send(msg)
+    if err is None or not err[1]:
+        failed.append(f"unsendable message: expected a permanent failure, got {err}")
+    del msg["To"]
+    msg["To"] = PROBE
+    for _ in range(5):  # the stub may answer 451 to this one too
+        err = await mailer._send(msg)
+        if err is None or err[1]:
+            break
+    if err is not None:
+        failed.append(f"pool unusable after an unsendable message: {err[0]}")
+    return failed
+
+async def _run(args) -> int:
+    window = args.window_minutes * 60
+    foreign = _foreign_in_window(window)
+    if foreign:
+        print(f"{foreign} consents of other tenants are inside the window; use a scratch database")
+        return 2
+    _cleanup()
+    _seed(args.psus, args.per_psu, window)
+
+    stub = None
+    host, port = args.smtp_host, args.smtp_port
+    if host is None:
+        stub = SmtpStub(port=0, latency_ms=args.latency_ms, fail_rate=args.fail_rate, reject_domains=["reject.test"])
+        await stub.start()
+        host, port = stub.host, stub.port
+    pool = SmtpPool(host, port, size=args.pool_size, rate_per_second=args.rate or None,
+                    max_messages_per_connection=args.max_per_connection)
+    mailer = ExpiryReminderMailer(
+        pool, "Open Banking <no-reply@bank.example>",
+        window_seconds=window, batch_size=args.batch_size, retry_base_seconds=0.1, max_attempts=20,
+    )
+    failed = []
+    try:
+        start = time.perf_counter()
+        processed = await _drain(mailer)
+        elapsed = time.perf_counter() - start
+        again = await mailer.remind_once()
+        markers = _marker_counts()
+        failed += await _probe_unsendable(mailer)
+    finally:
+        await pool.close()
+        if stub:
+            await stub.stop()
+        if not args.keep:
+            _cleanup()
+
+    addressed = [i for i in range(args.psus) if _addressed(i)]
+    deliverable = [i for i in addressed if not _psu(i).endswith("@reject.test")]
+    expected_sent = len(deliverable) * args.per_psu
+    print(f"processed {processed} reminders in {elapsed:.1f}s  markers {dict(markers)}  "
+          f"connections {pool.connections_opened}")
+    digests = [m for m in stub.messages if m["To"] != PROBE] if stub else []
+    if stub:
+        print(f"emails {len(digests)}  {len(digests) / elapsed:.0f}/s  "
+              f"451s {stub.temp_failures}  550s {stub.rejected}")
+    if markers.get("SENT") != expected_sent:
+        failed.append(f"SENT markers {markers.get('SENT')} != {expected_sent}")
+    if markers.get("DEAD", 0) != (len(addressed) - len(deliverable)) * args.per_psu:
+        failed.append(f"DEAD markers {markers.get('DEAD', 0)}")
+    if markers.get("DISCARDED", 0) != (args.psus - len(addressed)) * args.per_psu:
+        failed.append(f"DISCARDED markers {markers.get('DISCARDED', 0)}")
+    if markers.get("PENDING"):
+        failed.append(f"{markers['PENDING']} markers still PENDING")
+    if again:
+        failed.append(f"second pass handled {again} reminders")
+    if stub:
+        if args.fail_rate and not stub.temp_failures:
+            failed.append("no delivery got a 451; the retry path was not exercised")
+        per_rcpt = Counter(m["To"] for m in digests)
+        if sorted(per_rcpt) != sorted(_psu(i) for i in deliverable):
+            failed.append("recipients differ from the deliverable PSUs")
+        if any(n > 1 for n in per_rcpt.values()):
+            failed.append(f"{sum(n > 1 for n in per_rcpt.values())} PSUs got more than one digest")
+        bodies = [m.get_payload(decode=True).decode() for m in digests]
+        if any(b.count("expires on") != args.per_psu or "tpp-late" in b or "tpp-oneoff" in b for b in bodies):
+            failed.append("a digest does not list exactly the due consents")
+    for f in failed:
+        print("FAIL", f)
+    return 1 if failed else 0
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--psus", type=int, default=1000)
+    ap.add_argument("--per-psu", type=int, default=3)
+    ap.add_argument("--window-minutes", type=float, default=60.0)
+    ap.add_argument("--batch-size", type=int, default=500)
+    ap.add_argument("--pool-size", type=int, default=4)
+    ap.add_argument("--max-per-connection", type=int, default=100)
+    ap.add_argument("--rate", type=float, default=0.0, help="messages/s, 0 = unlimited")
+    ap.add_argument("--latency-ms", type=float, default=5.0, help="stub DATA latency")
+    ap.add_argument("--fail-rate", type=float, default=0.05, help="stub 451 share")
+    ap.add_argument("--smtp-host", help="external SMTP server (e.g. MailHog) instead of the stub")
+    ap.add_argument("--smtp-port", type=int, default=1025)
+    ap.add_argument("--keep", action="store_true", help="keep the seeded consents and markers")
+    args = ap.parse_args()
+    sys.exit(asyncio.run(_run(args)))
+
+if __name__ == "__main__":
+    main()
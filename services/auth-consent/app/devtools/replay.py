@@ -0,0 +1,187 @@
+"""
+Replay a traffic capture (CAPTURE_ENABLED, see app/middleware/capture.py)
+against a running instance and compare per-route latency with the capture.
+
+    python -m app.devtools.replay /tmp/auth-consent-capture/capture.ndjson \\
+        --base-url http://localhost:8000 --speed 2 --token "$TPP_TOKEN"
+
+Requests keep their original arrival offsets (divided by --speed). Captured
+consent hashes are mapped to consents created during the replay: a captured
+create mints the id its later status/authorize/callback requests use, and
+hashes first seen without a create are pre-seeded before the clock starts
+(--no-seed sends those to a random id instead, i.e. 404s). Callbacks reuse
+the sca_id returned by the replayed authorize. TPP hashes are assigned to the
+--token values round-robin, so ownership stays consistent per consent.
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import glob
+import itertools
+import json
+import time
+import uuid
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+import httpx
+
+_PERMISSIONS = ["accounts:read", "balances:read", "transactions:read"]
+_REDIRECTS = {"success_url": "https://tpp.example/ok", "failure_url": "https://tpp.example/no"}
+
+def load_capture(paths: List[str]) -> List[dict]:
+    """Records from every file (rotated backups included), ordered by arrival."""
+    files: List[str] = []
+    for p in paths:
+        # capture.ndjson.5 ... capture.ndjson.1 are older than capture.ndjson
+        backups = sorted(glob.glob(f"{glob.escape(p)}.[0-9]*"), key=lambda f: -int(f.rsplit(".", 1)[1]))
+        files += backups + [p]
+    records = []
+    for f in files:
+        with open(f, encoding="utf-8") as fh:
+            records += [json.loads(line) for line in fh if line.strip()]
+    records.sort(key=lambda r: r["t"])
+    return records
+
+def _create_body(shape) -> dict:
+    # Rebuild a valid create body with the captured number of permissions
+    n = 1
+    if isinstance(shape, dict) and isinstance(shape.get("permissions"), list):
+        n = max(1, shape["permissions"][1])
+    return {
+        "permissions": list(itertools.islice(itertools.cycle(_PERMISSIONS), n)),
+        "redirect_urls": _REDIRECTS,
+    }
+
+def _pct(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+class Replayer:
+    def __init__(self, client: httpx.AsyncClient, tokens: List[str], max_inflight: int) -> None:
+        self.client = client
+        self.tokens = tokens
+        self.sem = asyncio.Semaphore(max_inflight)
+        self.consents: Dict[str, str] = {}           # capture hash -> replayed consent id
+        self.sca_ids: Dict[str, str] = {}            # capture hash -> sca_id from authorize
+        self.ready: Dict[str, asyncio.Event] = defaultdict(asyncio.Event)
+        self.tpps: Dict[str, str] = {}
+        self.results: Dict[tuple, dict] = defaultdict(lambda: {"replayed": [], "captured": [], "errors": 0, "mismatch": 0})
+
+    def _headers(self, rec: dict) -> dict:
+        headers = {}
+        if self.tokens:
+            p = rec.get("p") or ""
+            if p not in self.tpps:
+                self.tpps[p] = self.tokens[len(self.tpps) % len(self.tokens)]
+            headers["Authorization"] = f"Bearer {self.tpps[p]}"
+        return headers
+
+    async def create(self, c_hash: Optional[str], rec: dict) -> httpx.Response:
+        headers = {**self._headers(rec), "Idempotency-Key": str(uuid.uuid4())}
+        r = await self.client.post("/consents", json=_create_body(rec.get("b")), headers=headers)
+        if c_hash and r.status_code in (200, 201):
+            self.consents[c_hash] = r.json()["id"]
+        if c_hash:
+            self.ready[c_hash].set()
+        return r
+
+    async def seed(self, records: List[dict]) -> int:
+        created = {r["c"] for r in records if r.get("c") and r["m"] == "POST" and r["r"] == "/consents"}
+        first: Dict[str, dict] = {}
+        for r in records:
+            c = r.get("c")
+            if c and c not in created and c not in first:
+                first[c] = r
+        for c, rec in first.items():
+            await self.create(c, rec)
+        return len(first)
+
+    async def _send(self, rec: dict) -> Optional[httpx.Response]:
+        method, route, c = rec["m"], rec["r"], rec.get("c")
+        if method == "POST" and route == "/consents":
+            return await self.create(c, rec)
+
+        path = route
+        if "{consent_id}" in route:
+            if c and c not in self.consents and c in self.ready:
+                await self.ready[c].wait()  # create still in flight
+            path = route.replace("{consent_id}", self.consents.get(c, str(uuid.uuid4())))
+        params = {}
+        if route.endswith("/authorize/callback"):
+            params = {"state": self.sca_ids.get(c, "unknown"), "result": (rec.get("q") or {}).get("result", "approved")}
+        r = await self.client.request(method, path, params=params, headers=self._headers(rec))
+        if route.endswith("/authorize") and r.status_code == 200 and c:
+            self.sca_ids[c] = r.json()["sca_id"]
+        return r
+
+    async def one(self, rec: dict, at: float) -> None:
+        delay = at - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        res = self.results[(rec["m"], rec["r"])]
+        async with self.sem:
+            start = time.perf_counter()
+            try:
+                r = await self._send(rec)
+            except httpx.HTTPError:
+                res["errors"] += 1
+                return
+            res["replayed"].append((time.perf_counter() - start) * 1000)
+        res["captured"].append(rec["d"])
+        if r.status_code >= 500:
+            res["errors"] += 1
+        if r.status_code != rec["s"]:
+            res["mismatch"] += 1
+
+    async def run(self, records: List[dict], speed: float) -> float:
+        # Register creates up front so dependants wait for them instead of 404ing
+        for rec in records:
+            if rec.get("c") and rec["m"] == "POST" and rec["r"] == "/consents":
+                self.ready[rec["c"]]
+        t0 = time.monotonic()
+        base = records[0]["t"]
+        await asyncio.gather(*(self.one(rec, t0 + (rec["t"] - base) / speed) for rec in records))
+        return time.monotonic() - t0
+
+def _report(results: Dict[tuple, dict], elapsed: float, captured_span: float) -> None:
+    print(f"replayed in {elapsed:.1f}s (capture spans {captured_span:.1f}s)\n")
+    print(f"{'route':<44} {'n':>6} {'err':>5} {'diff':>5}   {'p50':>13} {'p90':>13} {'p99':>13} {'max':>13}")
+    print(f"{'':<44} {'':>6} {'':>5} {'':>5}   {'replay/capt ms':>13}")
+    for (method, route), res in sorted(results.items(), key=lambda kv: -len(kv[1]["replayed"])):
+        rep, cap = res["replayed"], res["captured"]
+        cols = "".join(
+            f" {_pct(rep, q):>6.1f}/{_pct(cap, q):<6.1f}" for q in (0.5, 0.9, 0.99, 1.0)
+        )
+        print(f"{method + ' ' + route:<44} {len(rep):>6} {res['errors']:>5} {res['mismatch']:>5}  {cols}")
+
+async def _main(args) -> None:
+    records = load_capture(args.capture)
+    if not records:
+        raise SystemExit("capture is empty")
+    if args.limit:
+        records = records[: args.limit]
+    limits = httpx.Limits(max_connections=args.max_inflight)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=args.timeout) as client:
+        replayer = Replayer(client, args.token, args.max_inflight)
+        if args.seed:
+            print(f"seeded {await replayer.seed(records)} consents")
+        elapsed = await replayer.run(records, args.speed)
+    _report(replayer.results, elapsed, records[-1]["t"] - records[0]["t"])
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("capture", nargs="+", help="capture file(s); rotated .N backups are picked up automatically")
+    ap.add_argument("--base-url", default="http://localhost:8000")
+    ap.add_argument("--speed", type=float, default=1.0, help="time scale: 2 = twice as fast as captured")
+    ap.add_argument("--token", action="append", default=[], help="TPP bearer token; repeat for several TPPs")
+    ap.add_argument("--max-inflight", type=int, default=256)
+    ap.add_argument("--timeout", type=float, default=30.0)
+    ap.add_argument("--limit", type=int, default=0, help="replay only the first N requests")
+    ap.add_argument("--no-seed", dest="seed", action="store_false", help="don't pre-create consents the capture only reads")
+    asyncio.run(_main(ap.parse_args()))
+
+if __name__ == "__main__":
+    main()
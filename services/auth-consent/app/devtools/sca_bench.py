@@ -0,0 +1,77 @@
+"""
+Latency of HttpScaProvider.initiate against the stub provider, in-process (no
+sockets), with and without hedging, for a healthy, a slow-tailed and a failing
+provider.
+
+    python -m app.devtools.sca_bench --calls 2000 --concurrency 50
+
+The interesting columns: p99 under "tail" (hedging should cut it to roughly
+hedge_after + latency) and the failing provider's p50 once its breaker is open
+(calls fail in microseconds instead of waiting for the deadline).
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import time
+import uuid
+from typing import List
+
+import httpx
+
+from app.devtools.sca_provider_stub import Behaviour, create_stub_app
+from app.services.sca_providers import HttpScaProvider, ScaProviderError
+
+SCENARIOS = {
+    "healthy": Behaviour(latency_ms=20),
+    "tail": Behaviour(latency_ms=20, slow_rate=0.05, slow_ms=1500),
+    "failing": Behaviour(latency_ms=20, fail_rate=1.0),
+}
+
+def _pct(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+async def _run(behaviour: Behaviour, hedge_after, calls: int, concurrency: int, timeout: float):
+    stub = create_stub_app(behaviour)
+    provider = HttpScaProvider(
+        "bench", "http://stub", timeout_seconds=timeout, max_concurrency=concurrency * 2,
+        hedge_after_seconds=hedge_after, transport=httpx.ASGITransport(app=stub),
+    )
+    latencies: List[float] = []
+    errors = 0
+    gate = asyncio.Semaphore(concurrency)
+
+    async def one():
+        nonlocal errors
+        async with gate:
+            start = time.perf_counter()
+            try:
+                await provider.initiate(uuid.uuid4(), "http://api", uuid.uuid4().hex)
+            except ScaProviderError:
+                errors += 1
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    await asyncio.gather(*(one() for _ in range(calls)))
+    await provider.close()
+    return latencies, errors, stub.state.calls
+
+async def _main(args) -> None:
+    print(f"{'scenario':<10} {'hedge':>6} {'p50':>8} {'p90':>8} {'p99':>8} {'max':>8} {'err':>6} {'sent':>6}")
+    for name, behaviour in SCENARIOS.items():
+        for hedge in (None, args.hedge_after):
+            lat, errors, sent = await _run(behaviour, hedge, args.calls, args.concurrency, args.timeout)
+            cols = "".join(f" {_pct(lat, q):>8.1f}" for q in (0.5, 0.9, 0.99, 1.0))
+            print(f"{name:<10} {('off' if hedge is None else f'{hedge}s'):>6}{cols} {errors:>6} {sent:>6}")
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--calls", type=int, default=1000)
+    ap.add_argument("--concurrency", type=int, default=50)
+    ap.add_argument("--hedge-after", type=float, default=0.1)
+    ap.add_argument("--timeout", type=float, default=3.0)
+    asyncio.run(_main(ap.parse_args()))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Stand-in for a remote SCA provider (the HttpScaProvider contract), for local
+runs, integration tests and app.devtools.sca_bench.
+
+    python -m app.devtools.sca_provider_stub --port 9100 --latency-ms 40 --slow-rate 0.05
+    SCA_PROVIDER=stub SCA_PROVIDERS='{"stub": {"base_url": "http://localhost:9100"}}' ...
+
+POST /sca starts the session the caller names (sca_id); repeating it is a no-op.
+Its redirect_url points at GET /sca/{id}/authenticate?result=approved|denied,
+which records the outcome and redirects the browser to the consent's callback, like a real ASPSP
+would after the PSU authenticated. GET /sca/{id} reports the outcome.
+
+Degradation knobs apply to every API call: a base latency, a share of slow
+calls (tail latency) and a share of 503s. They can be changed at runtime with
+PUT /_stub/behaviour to degrade a running provider mid-benchmark.
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import random
+from dataclasses import asdict, dataclass
+from typing import Dict, Literal, Optional
+
+from fastapi import FastAPI, HTTPException, Query, Request
+from pydantic import BaseModel
+from starlette.responses import RedirectResponse
+
+@dataclass
+class Behaviour:
+    latency_ms: float = 20.0
+    slow_rate: float = 0.0      # share of calls that take slow_ms instead
+    slow_ms: float = 1000.0
+    fail_rate: float = 0.0      # share of calls answered with 503
+
+class _InitiateBody(BaseModel):
+    sca_id: str
+    consent_id: str
+    callback_url: str
+
+def create_stub_app(behaviour: Optional[Behaviour] = None) -> FastAPI:
+    app = FastAPI(title="sca-provider-stub")
+    app.state.behaviour = behaviour or Behaviour()
+    sessions: Dict[str, dict] = {}
+    app.state.calls = 0
+
+    async def degrade() -> None:
+        b: Behaviour = app.state.behaviour
+        app.state.calls += 1
+        slow = random.random() < b.slow_rate
+        await asyncio.sleep((b.slow_ms if slow else b.latency_ms) / 1000)
+        if random.random() < b.fail_rate:
+            raise HTTPException(status_code=503, detail="degraded")
+
+    @app.post("/sca")
+    async def initiate(body: _InitiateBody, request: Request):
+        await degrade()
+        sessions.setdefault(body.sca_id, {"status": "pending", "callback_url": body.callback_url})
+        return {"redirect_url": f"{str(request.base_url).rstrip('/')}/sca/{body.sca_id}/authenticate"}
+
+    @app.get("/sca/{sca_id}")
+    async def status(sca_id: str):
+        await degrade()
+        session = sessions.get(sca_id)
+        if session is None:
+            raise HTTPException(status_code=404, detail="unknown session")
+        return {"sca_id": sca_id, "status": session["status"]}
+
+    @app.get("/sca/{sca_id}/authenticate")
+    async def authenticate(sca_id: str, result: Literal["approved", "denied"] = Query("approved")):
+        session = sessions.get(sca_id)
+        if session is None:
+            raise HTTPException(status_code=404, detail="unknown session")
+        session["status"] = result
+        return RedirectResponse(f"{session['callback_url']}?state={sca_id}&result={result}", status_code=302)
+
+    @app.get("/_stub/behaviour")
+    async def get_behaviour():
+        return asdict(app.state.behaviour)
+
+    @app.put("/_stub/behaviour")
+    async def set_behaviour(update: dict):
+        app.state.behaviour = Behaviour(**{**asdict(app.state.behaviour), **update})
+        return asdict(app.state.behaviour)
+
+    return app
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=9100)
+    ap.add_argument("--latency-ms", type=float, default=20.0)
+    ap.add_argument("--slow-rate", type=float, default=0.0)
+    ap.add_argument("--slow-ms", type=float, default=1000.0)
+    ap.add_argument("--fail-rate", type=float, default=0.0)
+    args = ap.parse_args()
+    import uvicorn
+    app = create_stub_app(Behaviour(args.latency_ms, args.slow_rate, args.slow_ms, args.fail_rate))
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""
+Local SMTP sink for development and reminder delivery testing, when MailHog
+(infra/docker/compose.yaml) isn't running.
+
+    python -m app.devtools.smtp_stub --port 1025 --latency-ms 20 --fail-rate 0.05
+
+then point the service at it: SMTP_HOST=localhost SMTP_PORT=1025.
+
+Speaks enough ESMTP for aiosmtplib (EHLO, MAIL, RCPT, DATA, RSET, NOOP, QUIT).
+--latency-ms delays each DATA answer like a slow relay; --fail-rate answers
+451 to that share of messages (temporary, the client should retry);
+recipients in --reject-domain get 550 (permanent). Accepted messages are
+logged and kept in memory; app.devtools.reminder_check runs it in-process.
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import logging
+import random
+from email import message_from_bytes
+from email.message import Message
+from typing import List, Optional, Sequence
+
+log = logging.getLogger("smtp-stub")
+
+class SmtpStub:
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 1025,
+        *,
+        latency_ms: float = 0.0,
+        fail_rate: float = 0.0,
+        reject_domains: Sequence[str] = (),
+        max_messages: int = 100_000,
+    ) -> None:
+        self.host = host
+        self.port = port
+        self.latency = latency_ms / 1000
+        self.fail_rate = fail_rate
+        self.reject_domains = {d.lower() for d in reject_domains}
+        self.max_messages = max_messages
+        self.messages: List[Message] = []
+        self.connections = 0
+        self.temp_failures = 0
+        self.rejected = 0
+        self._server: Optional[asyncio.base_events.Server] = None
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(self._session, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _session(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections += 1
+
+        async def reply(line: str) -> None:
+            writer.write(line.encode() + b"\r\n")
+            await writer.drain()
+
+        await reply("220 smtp-stub ESMTP")
+        sender, rcpts = None, []
+        try:
+            while True:
+                raw = await reader.readline()
+                if not raw:
+                    return
+                line = raw.decode("utf-8", "replace").rstrip("\r\n")
+                verb = line[:4].upper()
+                if verb in ("EHLO", "HELO"):
+                    if verb == "EHLO":
+                        await reply("250-smtp-stub\r\n250-PIPELINING\r\n250-8BITMIME\r\n250 SIZE 10485760")
+                    else:
+                        await reply("250 smtp-stub")
+                elif verb == "MAIL":
+                    sender, rcpts = line[10:].strip(), []
+                    await reply("250 OK")
+                elif verb == "RCPT":
+                    rcpt = line[8:].strip().strip("<>")
+                    if rcpt.rpartition("@")[2].lower() in self.reject_domains:
+                        self.rejected += 1
+                        await reply("550 5.1.1 mailbox unavailable")
+                    else:
+                        rcpts.append(rcpt)
+                        await reply("250 OK")
+                elif verb == "DATA":
+                    if sender is None or not rcpts:
+                        await reply("503 5.5.1 need MAIL and RCPT first")
+                        continue
+                    await reply("354 end with <CRLF>.<CRLF>")
+                    data = await self._read_data(reader)
+                    if self.latency:
+                        await asyncio.sleep(self.latency)
+                    if self.fail_rate and random.random() < self.fail_rate:
+                        self.temp_failures += 1
+                        await reply("451 4.3.0 try again later")
+                    else:
+                        msg = message_from_bytes(data)
+                        if len(self.messages) < self.max_messages:
+                            self.messages.append(msg)
+                        log.info("accepted to=%s subject=%s", ",".join(rcpts), msg.get("Subject"))
+                        await reply("250 OK queued")
+                    sender, rcpts = None, []
+                elif verb == "RSET":
+                    sender, rcpts = None, []
+                    await reply("250 OK")
+                elif verb == "NOOP":
+                    await reply("250 OK")
+                elif verb == "QUIT":
+                    await reply("221 bye")
+                    return
+                else:
+                    await reply("502 5.5.2 command not implemented")
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _read_data(reader: asyncio.StreamReader) -> bytes:
+        lines = []
+        while True:
+            line = await reader.readline()
+            if not line or line in (b".\r\n", b".\n"):
+                break
+            if line.startswith(b".."):
+                line = line[1:]  # dot-unstuffing
+            lines.append(line)
+        return b"".join(lines)
+
+async def _main(args) -> None:
+    stub = SmtpStub(
+        args.host, args.port,
+        latency_ms=args.latency_ms, fail_rate=args.fail_rate, reject_domains=args.reject_domain or (),
+        max_messages=1000,
+    )
+    await stub.start()
+    log.info("listening host=%s port=%d", stub.host, stub.port)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await stub.stop()
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=1025)
+    ap.add_argument("--latency-ms", type=float, default=0.0)
+    ap.add_argument("--fail-rate", type=float, default=0.0)
+    ap.add_argument("--reject-domain", action="append", help="repeatable")
+    args = ap.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(message)s")
+    try:
+        asyncio.run(_main(args))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""
+Local stub webhook receiver for development and dispatcher testing.
+
+    uvicorn app.devtools.webhook_receiver:app --port 9000
+
+then point the service at it, e.g.
+    WEBHOOKS_ENABLED=true WEBHOOK_ENDPOINTS='{"dev-bypass": "http://localhost:9000/hooks"}'
+
+Set STUB_FAIL_RATE (0..1) to make it answer 503 randomly and exercise retries.
+"""
+from __future__ import annotations
+import json
+import logging
+import os
+import random
+from collections import deque
+
+from fastapi import FastAPI, Request, Response
+
+from app.utils.webhook_signing import SIGNATURE_HEADER, verify_signature
+
+SECRET = os.getenv("WEBHOOK_SIGNING_SECRET", "dev-webhook-secret")
+FAIL_RATE = float(os.getenv("STUB_FAIL_RATE", "0"))
+
+app = FastAPI(title="webhook-receiver-stub")
+log = logging.getLogger("webhook-receiver")
+
+_received: deque = deque(maxlen=1000)
+_seen_ids: set[str] = set()
+
+@app.post("/hooks")
+async def receive(request: Request):
+    body = await request.body()
+    if not verify_signature(SECRET, body, request.headers.get(SIGNATURE_HEADER, "")):
+        return Response(status_code=401)
+    if FAIL_RATE and random.random() < FAIL_RATE:
+        return Response(status_code=503)
+    hook_id = request.headers.get("X-Webhook-Id", "")
+    duplicate = hook_id in _seen_ids
+    _seen_ids.add(hook_id)
+    _received.append({"id": hook_id, "duplicate": duplicate, "payload": json.loads(body)})
+    log.info("webhook id=%s duplicate=%s", hook_id, duplicate)
+    return Response(status_code=204)
+
+@app.get("/hooks")
+async def list_received():
+    return {"count": len(_received), "unique": len(_seen_ids), "items": list(_received)}
@@ -0,0 +1,83 @@
+from __future__ import annotations
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from anyio import to_thread
+
+from app.db.shards import router as shards
+from app.repositories.archive import archive_terminal_batch, ensure_archive_partitions
+
+class ConsentArchiver:
+    """Moves terminal consents past the retention window into consents_archive, in small batches."""
+
+    def __init__(
+        self,
+        interval_seconds: int = 3600,
+        retention_days: int = 180,
+        batch_size: int = 1000,
+        max_batches: int = 100,
+        batch_pause_seconds: float = 0.1,
+    ) -> None:
+        self.interval = interval_seconds
+        self.retention_days = retention_days
+        self.batch_size = batch_size
+        self.max_batches = max_batches
+        self.batch_pause = batch_pause_seconds
+        self._task: asyncio.Task | None = None
+        self._stopping = False
+
+    async def start(self) -> None:
+        if self._task:
+            return
+        self._stopping = False
+        self._task = asyncio.create_task(self._run(), name="consent-archiver")
+
+    async def stop(self) -> None:
+        self._stopping = True
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            finally:
+                self._task = None
+
+    async def _run(self) -> None:
+        log = logging.getLogger("archival")
+        while not self._stopping:
+            try:
+                count = await self.archive_once()
+                if count:
+                    log.info("archived_consents count=%d", count)
+            except Exception:
+                log.exception("archival_error")
+            await asyncio.sleep(self.interval)
+
+    async def archive_once(self) -> int:
+        cutoff = datetime.now(timezone.utc) - timedelta(days=self.retention_days)
+        total = 0
+        for shard in shards.shard_ids():
+            await to_thread.run_sync(self._ensure_partitions, shard)
+            for _ in range(self.max_batches):
+                moved = await to_thread.run_sync(self._move_batch, shard, cutoff)
+                total += moved
+                if moved < self.batch_size or self._stopping:
+                    break
+                # Leave room for online traffic between batches
+                await asyncio.sleep(self.batch_pause)
+        return total
+
+    def _ensure_partitions(self, shard: int) -> None:
+        db = shards.session(shard)
+        try:
+            ensure_archive_partitions(db)
+        finally:
+            db.close()
+
+    def _move_batch(self, shard: int, cutoff: datetime) -> int:
+        db = shards.session(shard)
+        try:
+            return archive_terminal_batch(db, cutoff=cutoff, batch_size=self.batch_size)
+        finally:
+            db.close()
@@ -3,12 +3,13 @@ import asyncio
 import logging
 from anyio import to_thread
 
-from app.db.session import SessionLocal
+from app.db.shards import router as shards
 from app.repositories.consents import expire_due
 
 class ExpirySweeper:
-    def __init__(self, interval_seconds: int = 60) -> None:
+    def __init__(self, interval_seconds: int = 60, batch_size: int = 1000) -> None:
         self.interval = interval_seconds
+        self.batch_size = batch_size
         self._task: asyncio.Task | None = None
         self._stopping = False
 
@@ -41,8 +42,11 @@ class ExpirySweeper:
             await asyncio.sleep(self.interval)
 
     def _expire_once(self) -> int:
-        db = SessionLocal()
-        try:
-            return expire_due(db)
-        finally:
-            db.close()
+        total = 0
+        for shard in shards.shard_ids():
+            db = shards.session(shard)
+            try:
+                total += expire_due(db, batch_size=self.batch_size)
+            finally:
+                db.close()
+        return total
@@ -0,0 +1,59 @@
+from __future__ import annotations
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from anyio import to_thread
+
+from app.db.shards import router as shards
+from app.repositories.consent_events import ensure_partitions, drop_partitions_before
+
+class EventPartitionMaintainer:
+    """Keeps consent_events partitions created ahead of time and prunes expired ones."""
+
+    def __init__(self, interval_seconds: int = 3600, months_ahead: int = 2, retention_days: int | None = None) -> None:
+        self.interval = interval_seconds
+        self.months_ahead = months_ahead
+        self.retention_days = retention_days
+        self._task: asyncio.Task | None = None
+        self._stopping = False
+
+    async def start(self) -> None:
+        if self._task:
+            return
+        self._stopping = False
+        self._task = asyncio.create_task(self._run(), name="event-partitions")
+
+    async def stop(self) -> None:
+        self._stopping = True
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            finally:
+                self._task = None
+
+    async def _run(self) -> None:
+        log = logging.getLogger("partitions")
+        while not self._stopping:
+            try:
+                dropped = await to_thread.run_sync(self._maintain_once)
+                if dropped:
+                    log.info("dropped_event_partitions %s", ",".join(dropped))
+            except Exception:
+                log.exception("event_partition_error")
+            await asyncio.sleep(self.interval)
+
+    def _maintain_once(self) -> list[str]:
+        dropped: list[str] = []
+        for shard in shards.shard_ids():
+            db = shards.session(shard)
+            try:
+                ensure_partitions(db, months_ahead=self.months_ahead)
+                if self.retention_days is not None:
+                    cutoff = datetime.now(timezone.utc) - timedelta(days=self.retention_days)
+                    dropped += [f"{shard}:{name}" for name in drop_partitions_before(db, cutoff)]
+            finally:
+                db.close()
+        return dropped
@@ -0,0 +1,78 @@
+from __future__ import annotations
+import asyncio
+import logging
+import time
+from anyio import to_thread
+from sqlalchemy import text
+
+from app.cache.redis_client import get_redis
+from app.core.config import settings
+from app.core.readiness import state
+from app.db.shards import router as shards
+
+def _ping_db() -> None:
+    # Every shard must answer: a down shard makes its tenants' requests fail
+    for shard in shards.shard_ids():
+        with shards.engine(shard).connect() as conn:
+            conn.execute(text("SELECT 1"))
+
+class DependencyProber:
+    """
+    Probes Postgres, Redis and (unless SKIP_JWT) the OIDC issuer on an interval
+    and records the results in app.core.readiness.state, so /ready never does
+    I/O of its own.
+    """
+
+    def __init__(self, interval_seconds: float = 5.0, timeout_seconds: float = 2.0) -> None:
+        self.interval = interval_seconds
+        self.timeout = timeout_seconds
+        self._task: asyncio.Task | None = None
+        self._stopping = False
+
+    async def start(self) -> None:
+        if self._task:
+            return
+        self._stopping = False
+        await self.probe_once()  # populate state before the first /ready call
+        self._task = asyncio.create_task(self._run(), name="dependency-prober")
+
+    async def stop(self) -> None:
+        self._stopping = True
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            finally:
+                self._task = None
+
+    async def _run(self) -> None:
+        log = logging.getLogger("readiness")
+        while not self._stopping:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.probe_once()
+            except Exception:
+                log.exception("dependency_probe_error")
+
+    async def probe_once(self) -> None:
+        probes = {
+            "db": lambda: to_thread.run_sync(_ping_db),
+            "redis": lambda: get_redis().ping(),
+        }
+        if not settings.SKIP_JWT:
+            from app.security.jwt import _get_oidc_conf  # cached for 5 minutes
+            probes["oidc"] = _get_oidc_conf
+        await asyncio.gather(*(self._probe(name, fn) for name, fn in probes.items()))
+
+    async def _probe(self, name: str, fn) -> None:
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(fn(), timeout=self.timeout)
+            state.record_probe(name, True, (time.perf_counter() - start) * 1000)
+        except Exception as e:
+            prev = state.probes.get(name)
+            if prev is None or prev.ok:
+                logging.getLogger("readiness").warning("dependency_unhealthy name=%s error=%s", name, e)
+            state.record_probe(name, False, (time.perf_counter() - start) * 1000, error=type(e).__name__)
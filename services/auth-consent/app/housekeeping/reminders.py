@@ -0,0 +1,317 @@
+from __future__ import annotations
+import asyncio
+import hashlib
+import logging
+import time
+from email.message import EmailMessage
+from email.utils import formatdate, getaddresses, parseaddr
+from pathlib import Path
+from string import Template
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from anyio import to_thread
+import aiosmtplib
+
+from app.core.metrics import (
+    inc_expiry_reminder_email,
+    inc_expiry_reminders,
+    observe_expiry_reminder_send,
+    set_expiry_reminder_backlog,
+)
+from app.core.smtp import SmtpPool, is_permanent
+from app.db.shards import router as shards
+from app.repositories.reminders import (
+    backlog_stats,
+    claim_new,
+    claim_retries,
+    mark_discarded,
+    mark_failed,
+    mark_sent,
+    purge_expired,
+)
+
+_BACKLOG_REFRESH_SECONDS = 60.0   # the backlog query scans the whole window
+_PURGE_EVERY_SECONDS = 3600.0
+
+_DEFAULT_TEMPLATES = {
+    "subject": "Access you granted to ${count} provider(s) expires on ${first_expiry}",
+    "item": "  - ${tpp_client_id}: expires on ${expires_on}",
+    "body": (
+        "Hello,\n\n"
+        "Access you granted to the following providers will expire soon:\n\n"
+        "${items}\n\n"
+        "To keep using a service, renew its access from the provider's app before it\n"
+        "expires. If you no longer use it there is nothing to do: its access simply ends.\n\n"
+        "This is an automated message, please do not reply.\n"
+    ),
+}
+
+class ReminderTemplates:
+    """
+    Subject, body and per-consent item templates (string.Template, ${name}),
+    parsed once; `directory` may override any of subject.txt, body.txt, item.txt.
+    """
+
+    def __init__(self, directory: Optional[str] = None) -> None:
+        texts = dict(_DEFAULT_TEMPLATES)
+        if directory:
+            for name in texts:
+                path = Path(directory) / f"{name}.txt"
+                if path.exists():
+                    texts[name] = path.read_text(encoding="utf-8")
+        self.subject = Template(texts["subject"].strip())
+        self.body = Template(texts["body"])
+        self.item = Template(texts["item"].rstrip("\n"))
+
+    def render(self, items: Sequence[Any], *, sender: str, recipient: str) -> EmailMessage:
+        items = sorted(items, key=lambda r: (r.expires_at, r.tpp_client_id))
+        lines = "\n".join(
+            self.item.safe_substitute(
+                tpp_client_id=r.tpp_client_id,
+                expires_on=r.expires_at.strftime("%Y-%m-%d"),
+                consent_id=r.consent_id,
+            )
+            for r in items
+        )
+        values = {"count": len(items), "first_expiry": items[0].expires_at.strftime("%Y-%m-%d"), "items": lines}
+        msg = EmailMessage()
+        msg["From"] = sender
+        msg["To"] = recipient
+        msg["Subject"] = self.subject.safe_substitute(values)
+        msg["Date"] = formatdate(usegmt=True)
+        msg["Message-ID"] = _message_id(items, sender)
+        msg["Auto-Submitted"] = "auto-generated"
+        msg.set_content(self.body.safe_substitute(values))
+        return msg
+
+def _message_id(items: Sequence[Any], sender: str) -> str:
+    # Same consents, same id: a digest re-sent after a lost acknowledgement can be deduplicated downstream
+    digest = hashlib.sha256(
+        "|".join(sorted(f"{r.consent_id}:{r.expires_at.isoformat()}" for r in items)).encode()
+    ).hexdigest()[:32]
+    domain = parseaddr(sender)[1].rpartition("@")[2] or "localhost"
+    return f"<reminder.{digest}@{domain}>"
+
+class ExpiryReminderMailer:
+    """
+    Emails PSUs before their consents expire. Each round claims the GRANTED
+    recurring consents that entered the reminder window (a range scan of the
+    active-expiry index) and groups them into one digest per PSU. The digests
+    go out over a pooled set of SMTP sessions under a rate limit. A marker per
+    consent expiry (expiry_reminders) means each expiry is reminded about at
+    most once, across runs and workers. Failed digests are retried with
+    exponential backoff and dead-lettered after `max_attempts`.
+    """
+
+    def __init__(
+        self,
+        smtp: SmtpPool,
+        sender: str,
+        *,
+        interval_seconds: float = 300.0,
+        window_seconds: float = 7 * 86400,
+        batch_size: int = 500,
+        max_attempts: int = 6,
+        retry_base_seconds: float = 60.0,
+        lease_seconds: int = 300,
+        keep_seconds: float = 30 * 86400,
+        recipient_template: Optional[str] = None,
+        template_dir: Optional[str] = None,
+    ) -> None:
+        self.smtp = smtp
+        self.sender = sender
+        self.interval = interval_seconds
+        self.window = window_seconds
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.retry_base = retry_base_seconds
+        self.lease_seconds = lease_seconds
+        self.keep_seconds = keep_seconds
+        self.recipient_template = recipient_template
+        self.templates = ReminderTemplates(template_dir)
+        self._backlog_checked = 0.0
+        self._purged = 0.0
+        self._more_pending = False
+        self._task: asyncio.Task | None = None
+        self._stopping = False
+
+    async def start(self) -> None:
+        if self._task:
+            return
+        self._stopping = False
+        self._task = asyncio.create_task(self._run(), name="expiry-reminders")
+
+    async def stop(self) -> None:
+        self._stopping = True
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            finally:
+                self._task = None
+        await self.smtp.close()
+
+    async def _run(self) -> None:
+        log = logging.getLogger("reminders")
+        while not self._stopping:
+            try:
+                count = await self.remind_once()
+                if count:
+                    log.info("expiry_reminders_processed count=%d", count)
+            except Exception:
+                log.exception("expiry_reminder_error")
+                self._more_pending = False
+            # A full batch on any shard means more consents are waiting; go again right away
+            if not self._more_pending:
+                await asyncio.sleep(self.interval)
+
+    async def remind_once(self) -> int:
+        """One batch per shard; returns the number of reminders handled."""
+        counts = [await self._remind_shard(shard) for shard in shards.shard_ids()]
+        self._more_pending = any(c >= self.batch_size for c in counts)
+        await self._maybe_maintain()
+        return sum(counts)
+
+    async def _remind_shard(self, shard: int) -> int:
+        rows = await to_thread.run_sync(self._claim, shard)
+        if not rows:
+            return 0
+
+        digests: Dict[Tuple[Optional[str], str], List[Any]] = {}
+        inactive = 0
+        for r in rows:
+            if r.status != "PENDING":
+                inactive += 1  # a retry whose consent is no longer active; the claim discarded it
+                continue
+            digests.setdefault((r.tenant_id, r.psu_id), []).append(r)
+
+        outgoing: List[Tuple[List[Any], EmailMessage]] = []
+        no_address: List[Tuple[Any, Any]] = []
+        for (tenant_id, psu_id), items in digests.items():
+            recipient = self._recipient(tenant_id, psu_id)
+            if recipient is None:
+                no_address.extend((r.consent_id, r.expires_at) for r in items)
+                continue
+            outgoing.append((items, self.templates.render(items, sender=self.sender, recipient=recipient)))
+
+        results = await asyncio.gather(*(self._send(msg) for _, msg in outgoing))
+        sent: List[Tuple[Any, Any]] = []
+        failures: List[Tuple[List[Tuple[Any, Any]], str, float | None]] = []
+        for (items, _), err in zip(outgoing, results):
+            keys = [(r.consent_id, r.expires_at) for r in items]
+            if err is None:
+                sent.extend(keys)
+                inc_expiry_reminder_email("sent")
+                inc_expiry_reminders("sent", len(keys))
+                continue
+            error, permanent = err
+            attempts = max(r.attempts for r in items)
+            if permanent or attempts >= self.max_attempts:
+                failures.append((keys, error, None))
+                outcome = "dead"
+            else:
+                failures.append((keys, error, self.retry_base * (2 ** (attempts - 1))))
+                outcome = "retry"
+            inc_expiry_reminder_email(outcome)
+            inc_expiry_reminders(outcome, len(keys))
+        if inactive or no_address:
+            inc_expiry_reminders("discarded", inactive + len(no_address))
+
+        await to_thread.run_sync(self._record, shard, sent, failures, no_address)
+        return len(rows)
+
+    def _recipient(self, tenant_id: Optional[str], psu_id: str) -> Optional[str]:
+        if self.recipient_template:
+            address = self.recipient_template.format(psu_id=psu_id, tenant_id=tenant_id or "")
+        else:
+            address = psu_id
+        # Header values must be a single line holding exactly one address with a local part and a domain;
+        # anything else (e.g. "(bob@example.com", which parses to nothing) is not an address we can use
+        if "\r" in address or "\n" in address:
+            return None
+        parsed = getaddresses([address])
+        if len(parsed) != 1:
+            return None
+        local, _, domain = parsed[0][1].rpartition("@")
+        if not local or not domain:
+            return None
+        return address
+
+    async def _send(self, message: EmailMessage) -> Tuple[str, bool] | None:
+        """
+        Returns None on success, otherwise (short error description, permanent).
+        Never raises: one bad digest must not keep the round's others from being recorded.
+        """
+        start = time.perf_counter()
+        try:
+            await self.smtp.send(message)
+        except (aiosmtplib.SMTPException, OSError) as e:
+            return f"{type(e).__name__}: {e}", is_permanent(e)
+        except Exception as e:
+            # e.g. aiosmtplib's ValueError for a message without usable recipients: resending won't help
+            logging.getLogger("reminders").warning("expiry_reminder_send_error to=%s error=%r", message["To"], e)
+            return f"{type(e).__name__}: {e}", isinstance(e, ValueError)
+        finally:
+            observe_expiry_reminder_send(time.perf_counter() - start)
+        return None
+
+    async def _maybe_maintain(self) -> None:
+        now = time.monotonic()
+        if now - self._purged >= _PURGE_EVERY_SECONDS:
+            self._purged = now
+            await to_thread.run_sync(self._purge)
+        if now - self._backlog_checked >= _BACKLOG_REFRESH_SECONDS:
+            self._backlog_checked = now
+            await to_thread.run_sync(self._publish_backlog)
+
+    def _claim(self, shard: int) -> List[Any]:
+        # Retries first, so a steady stream of new consents can't starve them
+        db = shards.session(shard)
+        try:
+            rows = claim_retries(db, limit=self.batch_size, lease_seconds=self.lease_seconds)
+            if len(rows) < self.batch_size:
+                rows += claim_new(
+                    db,
+                    window_seconds=self.window,
+                    limit=self.batch_size - len(rows),
+                    lease_seconds=self.lease_seconds,
+                )
+            return rows
+        finally:
+            db.close()
+
+    def _record(
+        self,
+        shard: int,
+        sent: List[Tuple[Any, Any]],
+        failures: List[Tuple[List[Tuple[Any, Any]], str, float | None]],
+        no_address: List[Tuple[Any, Any]],
+    ) -> None:
+        db = shards.session(shard)
+        try:
+            mark_sent(db, sent)
+            mark_failed(db, failures)
+            mark_discarded(db, no_address, "no_address")
+        finally:
+            db.close()
+
+    def _purge(self) -> None:
+        for shard in shards.shard_ids():
+            db = shards.session(shard)
+            try:
+                purge_expired(db, keep_seconds=self.keep_seconds)
+            finally:
+                db.close()
+
+    def _publish_backlog(self) -> None:
+        # Total not-yet-reminded across shards; lag is the worst shard's
+        pending, lag = 0, 0.0
+        for shard in shards.shard_ids():
+            db = shards.session(shard)
+            try:
+                p, l = backlog_stats(db, window_seconds=self.window)
+            finally:
+                db.close()
+            pending, lag = pending + p, max(lag, l)
+        set_expiry_reminder_backlog(pending, lag)
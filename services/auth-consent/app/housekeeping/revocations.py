@@ -0,0 +1,138 @@
+from __future__ import annotations
+import asyncio
+import functools
+import logging
+import time
+from anyio import to_thread
+
+from app.cache.invalidation import publish_revoked
+from app.core.metrics import inc_bulk_revocation_job, observe_bulk_revocation_batch
+from app.db.shards import DEFAULT_SHARD, router as shards
+from app.repositories import revocation_jobs as jobs_repo
+from app.repositories.consents import has_active_matching, revoke_matching_batch
+
+class BulkRevoker:
+    """
+    Executes revocation_jobs (enqueued via POST /admin/revocations), one job at a time.
+
+    Jobs live on the default shard; the consents they match are revoked on every
+    shard in batches of `batch_size` (short transactions, SKIP LOCKED, a pause
+    between batches), so online traffic never waits behind a bulk job. Each
+    batch renews the job's lease; if the worker dies, another one re-claims the
+    job after the lease and continues with whatever is still active.
+    """
+
+    def __init__(
+        self,
+        interval_seconds: float = 5.0,
+        batch_size: int = 500,
+        batch_pause_seconds: float = 0.05,
+        lease_seconds: int = 120,
+        max_attempts: int = 5,
+    ) -> None:
+        self.interval = interval_seconds
+        self.batch_size = batch_size
+        self.batch_pause = batch_pause_seconds
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self._task: asyncio.Task | None = None
+        self._stopping = False
+
+    async def start(self) -> None:
+        if self._task:
+            return
+        self._stopping = False
+        self._task = asyncio.create_task(self._run(), name="bulk-revoker")
+
+    async def stop(self) -> None:
+        self._stopping = True
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            finally:
+                self._task = None
+
+    async def _run(self) -> None:
+        log = logging.getLogger("revocations")
+        while not self._stopping:
+            try:
+                failed = await self._control(jobs_repo.fail_exhausted, max_attempts=self.max_attempts)
+                if failed:
+                    inc_bulk_revocation_job("failed", failed)
+                    log.warning("bulk_revocation_failed jobs=%d", failed)
+                job = await self._control(jobs_repo.claim_job, lease_seconds=self.lease_seconds)
+                if job is not None:
+                    await self.run_job(job)
+                    continue  # look for the next job straight away
+            except Exception:
+                log.exception("bulk_revocation_error")
+            await asyncio.sleep(self.interval)
+
+    async def run_job(self, job) -> None:
+        log = logging.getLogger("revocations")
+        log.info("bulk_revocation_started job=%s selector=%s attempt=%d", job.id, job.selector, job.attempts)
+        actor = f"admin:{job.requested_by or 'unknown'}"
+        try:
+            for shard in shards.shard_ids():
+                while True:
+                    start = time.perf_counter()
+                    ids = await to_thread.run_sync(self._revoke_batch, shard, job, actor)
+                    observe_bulk_revocation_batch(job.selector, len(ids), time.perf_counter() - start)
+                    await publish_revoked(ids)
+                    owned = await self._control(
+                        jobs_repo.record_progress, job.id,
+                        attempt=job.attempts, revoked=len(ids), lease_seconds=self.lease_seconds,
+                    )
+                    if not owned or self._stopping:
+                        # Cancelled, re-claimed elsewhere, or shutting down (resumed after the lease)
+                        log.info("bulk_revocation_stopped job=%s owned=%s", job.id, owned)
+                        return
+                    # Short batch: done with this shard, unless rows locked by online traffic were skipped
+                    if len(ids) < self.batch_size and not await to_thread.run_sync(self._has_remaining, shard, job):
+                        break
+                    # Nothing revoked: what's left is locked by in-flight requests, give them time
+                    await asyncio.sleep(self.batch_pause if ids else max(self.batch_pause, 0.5))
+        except Exception as exc:
+            await self._control(jobs_repo.record_error, job.id, repr(exc))
+            raise
+        await self._control(jobs_repo.finish_job, job.id)
+        inc_bulk_revocation_job("completed")
+        log.info("bulk_revocation_completed job=%s", job.id)
+
+    # ---- DB access (worker threads) ---------------------------------------------
+
+    async def _control(self, fn, *args, **kwargs):
+        # revocation_jobs lives on the default shard
+        return await to_thread.run_sync(functools.partial(self._on_default_shard, fn, *args, **kwargs))
+
+    @staticmethod
+    def _on_default_shard(fn, *args, **kwargs):
+        db = shards.session(DEFAULT_SHARD)
+        try:
+            return fn(db, *args, **kwargs)
+        finally:
+            db.close()
+
+    def _revoke_batch(self, shard: int, job, actor: str):
+        db = shards.session(shard)
+        try:
+            return revoke_matching_batch(
+                db,
+                selector=job.selector,
+                value=job.value,
+                batch_size=self.batch_size,
+                actor=actor,
+                correlation_id=f"revocation-job:{job.id}",
+            )
+        finally:
+            db.close()
+
+    def _has_remaining(self, shard: int, job) -> bool:
+        db = shards.session(shard)
+        try:
+            return has_active_matching(db, selector=job.selector, value=job.value)
+        finally:
+            db.close()
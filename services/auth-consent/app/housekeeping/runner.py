@@ -0,0 +1,106 @@
+"""
+Builds the enabled housekeeping jobs from settings. Shared by the API process
+(HOUSEKEEPING_IN_API) and the standalone worker (python -m app.worker).
+
+Job modules are imported only when the job is enabled, so e.g. httpx is never
+loaded by a process that doesn't dispatch webhooks, nor aiosmtplib by one that
+doesn't send reminders.
+"""
+from __future__ import annotations
+import logging
+from typing import Iterable, List, Optional, Tuple
+
+from app.core.config import Settings
+
+JOB_NAMES = ("expiry", "partitions", "webhooks", "archive", "revocations", "reminders")
+
+def build_jobs(settings: Settings, names: Optional[Iterable[str]] = None) -> List[Tuple[str, object]]:
+    wanted = set(names) if names is not None else set(JOB_NAMES)
+    jobs: List[Tuple[str, object]] = []
+
+    if "expiry" in wanted and settings.EXPIRY_SWEEP_ENABLED:
+        from app.housekeeping.expiry import ExpirySweeper
+        jobs.append(("expiry", ExpirySweeper(
+            interval_seconds=settings.EXPIRY_SWEEP_SECONDS,
+            batch_size=settings.EXPIRY_SWEEP_BATCH_SIZE,
+        )))
+    # consent_events is only partitioned when the schema comes from Alembic
+    if "partitions" in wanted and settings.USE_ALEMBIC:
+        from app.housekeeping.partitions import EventPartitionMaintainer
+        jobs.append(("partitions", EventPartitionMaintainer(
+            interval_seconds=settings.CONSENT_EVENTS_PARTITION_SECONDS,
+            months_ahead=settings.CONSENT_EVENTS_MONTHS_AHEAD,
+            retention_days=settings.CONSENT_EVENTS_RETENTION_DAYS,
+        )))
+    if "webhooks" in wanted and settings.WEBHOOKS_ENABLED:
+        from app.housekeeping.webhooks import WebhookDispatcher
+        jobs.append(("webhooks", WebhookDispatcher(
+            settings.WEBHOOK_ENDPOINTS,
+            settings.WEBHOOK_SIGNING_SECRET,
+            interval_seconds=settings.WEBHOOK_DISPATCH_SECONDS,
+            batch_size=settings.WEBHOOK_BATCH_SIZE,
+            per_tpp_concurrency=settings.WEBHOOK_PER_TPP_CONCURRENCY,
+            max_connections=settings.WEBHOOK_MAX_CONNECTIONS,
+            timeout_seconds=settings.WEBHOOK_TIMEOUT_SECONDS,
+            max_attempts=settings.WEBHOOK_MAX_ATTEMPTS,
+            retry_base_seconds=settings.WEBHOOK_RETRY_BASE_SECONDS,
+            lease_seconds=settings.WEBHOOK_LEASE_SECONDS,
+        )))
+    # Archive table only exists when the schema comes from Alembic
+    if "archive" in wanted and settings.ARCHIVE_ENABLED and settings.USE_ALEMBIC:
+        from app.housekeeping.archival import ConsentArchiver
+        jobs.append(("archive", ConsentArchiver(
+            interval_seconds=settings.ARCHIVE_INTERVAL_SECONDS,
+            retention_days=settings.ARCHIVE_RETENTION_DAYS,
+            batch_size=settings.ARCHIVE_BATCH_SIZE,
+            max_batches=settings.ARCHIVE_MAX_BATCHES_PER_RUN,
+            batch_pause_seconds=settings.ARCHIVE_BATCH_PAUSE_SECONDS,
+        )))
+    if "revocations" in wanted and settings.BULK_REVOCATION_ENABLED:
+        from app.housekeeping.revocations import BulkRevoker
+        jobs.append(("revocations", BulkRevoker(
+            interval_seconds=settings.BULK_REVOCATION_POLL_SECONDS,
+            batch_size=settings.BULK_REVOCATION_BATCH_SIZE,
+            batch_pause_seconds=settings.BULK_REVOCATION_BATCH_PAUSE_SECONDS,
+            lease_seconds=settings.BULK_REVOCATION_LEASE_SECONDS,
+            max_attempts=settings.BULK_REVOCATION_MAX_ATTEMPTS,
+        )))
+    if "reminders" in wanted and settings.EXPIRY_REMINDERS_ENABLED:
+        from app.core.smtp import SmtpPool
+        from app.housekeeping.reminders import ExpiryReminderMailer
+        smtp = SmtpPool(
+            settings.SMTP_HOST,
+            settings.SMTP_PORT,
+            size=settings.SMTP_POOL_SIZE,
+            username=settings.SMTP_USERNAME,
+            password=settings.SMTP_PASSWORD,
+            use_tls=settings.SMTP_USE_TLS,
+            start_tls=settings.SMTP_START_TLS,
+            timeout_seconds=settings.SMTP_TIMEOUT_SECONDS,
+            max_messages_per_connection=settings.SMTP_MAX_MESSAGES_PER_CONNECTION,
+            rate_per_second=settings.SMTP_RATE_PER_SECOND,
+        )
+        jobs.append(("reminders", ExpiryReminderMailer(
+            smtp,
+            settings.SMTP_FROM,
+            interval_seconds=settings.EXPIRY_REMINDER_SECONDS,
+            window_seconds=settings.EXPIRY_REMINDER_WINDOW_DAYS * 86400,
+            batch_size=settings.EXPIRY_REMINDER_BATCH_SIZE,
+            max_attempts=settings.EXPIRY_REMINDER_MAX_ATTEMPTS,
+            retry_base_seconds=settings.EXPIRY_REMINDER_RETRY_BASE_SECONDS,
+            lease_seconds=settings.EXPIRY_REMINDER_LEASE_SECONDS,
+            keep_seconds=settings.EXPIRY_REMINDER_KEEP_DAYS * 86400,
+            recipient_template=settings.EXPIRY_REMINDER_RECIPIENT_TEMPLATE,
+            template_dir=settings.EXPIRY_REMINDER_TEMPLATE_DIR,
+        )))
+    return jobs
+
+async def start_jobs(jobs: List[Tuple[str, object]]) -> None:
+    for name, job in jobs:
+        await job.start()
+        logging.getLogger("housekeeping").info("job_started name=%s", name)
+
+async def stop_jobs(jobs: List[Tuple[str, object]]) -> None:
+    # Reverse start order
+    for _, job in reversed(jobs):
+        await job.stop()
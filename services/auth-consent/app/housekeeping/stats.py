@@ -0,0 +1,56 @@
+from __future__ import annotations
+import asyncio
+import logging
+from anyio import to_thread
+
+from app.core.metrics import set_consents_by_status
+from app.db.shards import router as shards
+from app.models.consent import CONSENT_STATUSES
+from app.repositories.consent_stats import counts
+
+class ConsentStatsGauges:
+    """Refreshes consents_by_status from consent_stats (a few summary rows per shard, not a table scan)."""
+
+    def __init__(self, interval_seconds: int = 60) -> None:
+        self.interval = interval_seconds
+        self._task: asyncio.Task | None = None
+        self._stopping = False
+
+    async def start(self) -> None:
+        if self._task:
+            return
+        self._stopping = False
+        self._task = asyncio.create_task(self._run(), name="consent-stats-gauges")
+
+    async def stop(self) -> None:
+        self._stopping = True
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            finally:
+                self._task = None
+
+    async def _run(self) -> None:
+        log = logging.getLogger("stats")
+        while not self._stopping:
+            try:
+                set_consents_by_status(await to_thread.run_sync(self._by_status))
+            except Exception:
+                log.exception("consent_stats_error")
+            await asyncio.sleep(self.interval)
+
+    def _by_status(self) -> dict:
+        # Every known status gets a value, so the label set is fixed and complete
+        totals = dict.fromkeys(CONSENT_STATUSES, 0)
+        for shard in shards.shard_ids():
+            db = shards.session(shard)
+            try:
+                for (status,), n in counts(db, group_by=["status"]).items():
+                    if status in totals:
+                        totals[status] += n
+            finally:
+                db.close()
+        return totals
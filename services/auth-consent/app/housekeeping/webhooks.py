@@ -0,0 +1,201 @@
+from __future__ import annotations
+import asyncio
+import json
+import logging
+import time
+from typing import Any, Dict, List, Tuple
+from anyio import to_thread
+import httpx
+
+from app.db.shards import router as shards
+from app.repositories.outbox import (
+    backlog_stats,
+    claim_batch,
+    mark_delivered,
+    mark_discarded,
+    mark_failed,
+)
+from app.utils.webhook_signing import SIGNATURE_HEADER, sign_payload
+from app.core.metrics import (
+    inc_webhook_delivery,
+    observe_webhook_delivery_latency,
+    set_webhook_backlog,
+)
+
+_BACKLOG_REFRESH_SECONDS = 5.0
+
+class WebhookDispatcher:
+    """
+    Drains webhook_outbox: claims batches, delivers signed POSTs over one pooled
+    AsyncClient with a concurrency cap per TPP, retries with exponential backoff
+    and dead-letters rows after `max_attempts`.
+    """
+
+    def __init__(
+        self,
+        endpoints: Dict[str, str],
+        signing_secret: str,
+        *,
+        interval_seconds: float = 1.0,
+        batch_size: int = 100,
+        per_tpp_concurrency: int = 4,
+        max_connections: int = 100,
+        timeout_seconds: float = 5.0,
+        max_attempts: int = 8,
+        retry_base_seconds: float = 2.0,
+        lease_seconds: int = 60,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ) -> None:
+        self.endpoints = endpoints
+        self.secret = signing_secret
+        self.interval = interval_seconds
+        self.batch_size = batch_size
+        self.per_tpp_concurrency = per_tpp_concurrency
+        self.max_connections = max_connections
+        self.timeout = timeout_seconds
+        self.max_attempts = max_attempts
+        self.retry_base = retry_base_seconds
+        self.lease_seconds = lease_seconds
+        self._transport = transport  # tests/benchmarks can point this at a stub receiver
+        self._client: httpx.AsyncClient | None = None
+        self._limits: Dict[str, asyncio.Semaphore] = {}
+        self._backlog_checked = 0.0
+        self._more_pending = False
+        self._task: asyncio.Task | None = None
+        self._stopping = False
+
+    async def start(self) -> None:
+        if self._task:
+            return
+        self._stopping = False
+        self._client = httpx.AsyncClient(
+            timeout=self.timeout,
+            limits=httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections),
+            transport=self._transport,
+        )
+        self._task = asyncio.create_task(self._run(), name="webhook-dispatcher")
+
+    async def stop(self) -> None:
+        self._stopping = True
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            finally:
+                self._task = None
+        if self._client:
+            await self._client.aclose()
+            self._client = None
+
+    async def _run(self) -> None:
+        log = logging.getLogger("webhooks")
+        while not self._stopping:
+            try:
+                await self.dispatch_once()
+            except Exception:
+                log.exception("webhook_dispatch_error")
+                self._more_pending = False
+            # A full batch on any shard means there is likely more waiting; go again right away
+            if not self._more_pending:
+                await asyncio.sleep(self.interval)
+
+    async def dispatch_once(self) -> int:
+        """One batch per shard; returns the number of rows handled."""
+        counts = [await self._dispatch_shard(shard) for shard in shards.shard_ids()]
+        self._more_pending = any(c >= self.batch_size for c in counts)
+        await self._maybe_publish_backlog()
+        return sum(counts)
+
+    async def _dispatch_shard(self, shard: int) -> int:
+        rows = await to_thread.run_sync(self._claim, shard)
+        if not rows:
+            return 0
+
+        deliverable = [r for r in rows if r.tpp_client_id in self.endpoints]
+        orphaned = [r.id for r in rows if r.tpp_client_id not in self.endpoints]
+
+        results = await asyncio.gather(*(self._deliver(r) for r in deliverable))
+        delivered = [r.id for r, err in zip(deliverable, results) if err is None]
+        failures: List[Tuple[int, str, float | None]] = []
+        for r, err in zip(deliverable, results):
+            if err is None:
+                continue
+            if r.attempts >= self.max_attempts:
+                failures.append((r.id, err, None))
+                inc_webhook_delivery("dead")
+            else:
+                failures.append((r.id, err, self.retry_base * (2 ** (r.attempts - 1))))
+                inc_webhook_delivery("retry")
+        for _ in delivered:
+            inc_webhook_delivery("delivered")
+        for _ in orphaned:
+            inc_webhook_delivery("discarded")
+
+        await to_thread.run_sync(self._record, shard, delivered, failures, orphaned)
+        return len(rows)
+
+    async def _maybe_publish_backlog(self) -> None:
+        # The backlog query counts pending rows; no need to run it on every batch
+        now = time.monotonic()
+        if now - self._backlog_checked < _BACKLOG_REFRESH_SECONDS:
+            return
+        self._backlog_checked = now
+        await to_thread.run_sync(self._publish_backlog)
+
+    async def _deliver(self, row: Any) -> str | None:
+        """Returns None on success, otherwise a short error description."""
+        assert self._client is not None
+        sem = self._limits.get(row.tpp_client_id)
+        if sem is None:
+            sem = self._limits[row.tpp_client_id] = asyncio.Semaphore(self.per_tpp_concurrency)
+
+        body = json.dumps(row.payload, separators=(",", ":")).encode("utf-8")
+        headers = {
+            "Content-Type": "application/json",
+            "X-Webhook-Id": str(row.id),
+            "X-Webhook-Event": row.event_type,
+            SIGNATURE_HEADER: sign_payload(self.secret, body),
+        }
+        async with sem:
+            start = time.perf_counter()
+            try:
+                resp = await self._client.post(self.endpoints[row.tpp_client_id], content=body, headers=headers)
+            except httpx.HTTPError as e:
+                return f"{type(e).__name__}: {e}"
+            finally:
+                observe_webhook_delivery_latency(time.perf_counter() - start)
+        if 200 <= resp.status_code < 300:
+            return None
+        return f"http_{resp.status_code}"
+
+    def _claim(self, shard: int) -> List[Any]:
+        db = shards.session(shard)
+        try:
+            return claim_batch(db, limit=self.batch_size, lease_seconds=self.lease_seconds)
+        finally:
+            db.close()
+
+    def _record(
+        self, shard: int, delivered: List[int], failures: List[Tuple[int, str, float | None]], orphaned: List[int]
+    ) -> None:
+        db = shards.session(shard)
+        try:
+            mark_delivered(db, delivered)
+            mark_failed(db, failures)
+            mark_discarded(db, orphaned, "no_endpoint")
+        finally:
+            db.close()
+
+    def _publish_backlog(self) -> None:
+        # Total pending across shards; lag is the worst shard's oldest row
+        pending, lag = 0, 0.0
+        for shard in shards.shard_ids():
+            db = shards.session(shard)
+            try:
+                p, l = backlog_stats(db)
+            finally:
+                db.close()
+            pending, lag = pending + p, max(lag, l)
+        set_webhook_backlog(pending, lag)
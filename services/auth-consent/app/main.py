@@ -1,65 +1,176 @@
-from fastapi import FastAPI
+from __future__ import annotations
+from typing import TYPE_CHECKING
+
 from app.core.config import settings
-from app.core.logging import setup_logging 
-from app.api.routers import ( health, consents_create, consents_status, consents_get, consents_revoke, consents_callback, consents_authorize)
-from app.db.init_db import init_db
-from app.housekeeping.expiry import ExpirySweeper
-from fastapi.exceptions import RequestValidationError
-from starlette.exceptions import HTTPException as StarletteHTTPException
-from app.core.errors import (
-    http_exception_handler,
-    validation_exception_handler,
-    unhandled_exception_handler,
-)
-from app.middleware.correlation import CorrelationMiddleware 
-from app.core.metrics import router as metrics_router, MetricsMiddleware
-
-
-app = FastAPI(title=settings.APP_NAME, version="0.1.0")
-setup_logging()
-
-_sweeper: ExpirySweeper | None = None
-
-@app.on_event("startup")
-async def on_startup():
-    if not settings.USE_ALEMBIC:
-        init_db() 
-    global _sweeper
-    if settings.EXPIRY_SWEEP_ENABLED:
-        _sweeper = ExpirySweeper(interval_seconds=settings.EXPIRY_SWEEP_SECONDS)
-        await _sweeper.start()
-
-@app.on_event("shutdown")
-async def on_shutdown():
-    global _sweeper
-    if _sweeper:
-        await _sweeper.stop()
-        _sweeper = None
-
-# Middleware: install correlation header propagation (adds X-Request-ID)
-app.add_middleware(CorrelationMiddleware)
-# Middleware: metrics timing AFTER correlation (so we can enrich later if needed)
-app.add_middleware(MetricsMiddleware, exclude_routes=settings.METRICS_EXCLUDE_ROUTES)
-
-# Exception handlers (uniform error JSON)
-app.add_exception_handler(StarletteHTTPException, http_exception_handler)
-app.add_exception_handler(RequestValidationError, validation_exception_handler)
-app.add_exception_handler(Exception, unhandled_exception_handler)
-
-# Routers
-app.include_router(health.router)
-app.include_router(consents_create.router)
-app.include_router(consents_status.router)
-app.include_router(consents_get.router)
-app.include_router(consents_revoke.router)
-app.include_router(consents_authorize.router) 
-app.include_router(consents_callback.router) 
-
-# Conditionally expose /metrics
-if settings.METRICS_ENABLED:
-    app.include_router(metrics_router)
-
-# Root
-@app.get("/")
-def root():
-    return {"service": settings.APP_NAME, "env": settings.APP_ENV}
+from app.core.logging import setup_logging
+
+if TYPE_CHECKING:
+    from fastapi import FastAPI
+
+def create_app() -> "FastAPI":
+    """
+    Build the API application. Routers, middleware and housekeeping are imported
+    here rather than at module import, so entry points that don't serve HTTP
+    (app.worker, Alembic, devtools) never pay for them.
+
+    uvicorn --factory app.main:create_app
+
+    Configuration comes from app.core.config.settings (the environment), which
+    the routers, middleware and jobs read directly as well.
+    """
+    from fastapi import FastAPI
+    from fastapi.exceptions import RequestValidationError
+    from starlette.exceptions import HTTPException as StarletteHTTPException
+    from app.api.routers import (
+        health, ready, admin_profiling, admin_revocations, admin_consent_stats, consents_create, consents_status, consents_get, consents_revoke,
+        consents_callback, consents_authorize, consents_history,
+    )
+    from app.core.errors import (
+        http_exception_handler,
+        validation_exception_handler,
+        unhandled_exception_handler,
+    )
+    from app.core import profiling
+    from app.core.metrics import router as metrics_router, MetricsMiddleware
+    from app.core.readiness import state as readiness_state
+    from app.housekeeping.runner import build_jobs, start_jobs, stop_jobs
+    from app.middleware.admission import AdaptiveLimit, AdmissionMiddleware
+    from app.middleware.capture import CaptureMiddleware
+    from app.middleware.correlation import CorrelationMiddleware
+
+    app = FastAPI(title=settings.APP_NAME, version="0.1.0")
+    setup_logging()
+    app.state.jobs = []
+
+    @app.on_event("startup")
+    async def on_startup():
+        if not settings.USE_ALEMBIC:
+            from app.db.init_db import init_db
+            init_db()
+        elif settings.MIGRATE_ON_STARTUP:
+            from anyio import to_thread
+            from app.db.migrations import upgrade_all
+            await to_thread.run_sync(upgrade_all)
+        if settings.WARMUP_ENABLED:
+            from app.core.warmup import warm_up
+            await warm_up(app)
+        else:
+            readiness_state.warmed_up = True
+
+        from app.housekeeping.probes import DependencyProber
+        jobs = [("probes", DependencyProber(
+            interval_seconds=settings.READINESS_PROBE_SECONDS,
+            timeout_seconds=settings.READINESS_PROBE_TIMEOUT_SECONDS,
+        ))]
+        if settings.LOOP_LAG_MONITOR_ENABLED:
+            from app.core.loop_monitor import LoopLagMonitor
+            jobs.append(("loop_monitor", LoopLagMonitor(
+                interval_seconds=settings.LOOP_LAG_INTERVAL_SECONDS,
+                warn_seconds=settings.LOOP_LAG_WARN_SECONDS,
+                capture_stacks=settings.LOOP_LAG_CAPTURE_STACKS,
+            )))
+        # Per-process gauges, exported by whichever process serves /metrics
+        if settings.USE_ALEMBIC and settings.METRICS_ENABLED:
+            from app.housekeeping.stats import ConsentStatsGauges
+            jobs.append(("consent_stats", ConsentStatsGauges(settings.CONSENT_STATS_GAUGE_SECONDS)))
+        # Housekeeping can run in a separate worker process instead (python -m app.worker)
+        if settings.HOUSEKEEPING_IN_API:
+            jobs += build_jobs(settings)
+        app.state.jobs = jobs
+        await start_jobs(jobs)
+        if settings.PROFILING_CONTINUOUS:
+            profiling.start_continuous(settings.PROFILING_CONTINUOUS_HZ)
+
+    @app.on_event("shutdown")
+    async def on_shutdown():
+        readiness_state.warmed_up = False  # fail /ready while draining
+        await stop_jobs(app.state.jobs)
+        app.state.jobs = []
+        profiling.stop_continuous()
+        from app.core.http import close_http_client
+        from app.services.sca_providers import close_providers
+        await close_http_client()
+        await close_providers()
+
+    # Middleware: profiling FIRST so it is innermost and runs in the endpoint's task
+    app.add_middleware(profiling.ProfilingMiddleware)
+    # Middleware: install correlation header propagation (adds X-Request-ID)
+    app.add_middleware(CorrelationMiddleware)
+    # Middleware: metrics timing AFTER correlation (so we can enrich later if needed)
+    app.add_middleware(
+        MetricsMiddleware,
+        exclude_routes=settings.METRICS_EXCLUDE_ROUTES,
+        exemplar_min_seconds=settings.METRICS_EXEMPLAR_MIN_SECONDS,
+        tpp_top_k=settings.METRICS_TPP_TOP_K,
+    )
+    # Middleware: admission control outermost (bar capture) so it sheds before any other work
+    if settings.ADMISSION_ENABLED:
+        app.add_middleware(
+            AdmissionMiddleware,
+            limiter=AdaptiveLimit(
+                initial=settings.ADMISSION_INITIAL_LIMIT,
+                min_limit=settings.ADMISSION_MIN_LIMIT,
+                max_limit=settings.ADMISSION_MAX_LIMIT,
+            ),
+            read_share=settings.ADMISSION_READ_SHARE,
+            exempt_paths=settings.ADMISSION_EXEMPT_ROUTES,
+            exempt_prefixes=settings.ADMISSION_EXEMPT_PREFIXES,
+        )
+    # Middleware: capture outside admission so shed requests are part of the recorded load
+    if settings.CAPTURE_ENABLED:
+        app.add_middleware(
+            CaptureMiddleware,
+            path=settings.CAPTURE_PATH,
+            max_bytes=settings.CAPTURE_MAX_BYTES,
+            backups=settings.CAPTURE_BACKUPS,
+            sample_rate=settings.CAPTURE_SAMPLE_RATE,
+            hash_key=settings.CAPTURE_HASH_KEY,
+            exclude_paths=set(settings.METRICS_EXCLUDE_ROUTES),
+        )
+
+    # Exception handlers (uniform error JSON)
+    app.add_exception_handler(StarletteHTTPException, http_exception_handler)
+    app.add_exception_handler(RequestValidationError, validation_exception_handler)
+    app.add_exception_handler(Exception, unhandled_exception_handler)
+
+    # Routers
+    app.include_router(health.router)
+    app.include_router(ready.router)
+    app.include_router(consents_create.router)
+    app.include_router(consents_status.router)
+    app.include_router(consents_get.router)
+    app.include_router(consents_revoke.router)
+    app.include_router(consents_authorize.router)
+    app.include_router(consents_callback.router)
+    app.include_router(consents_history.router)
+    app.include_router(admin_profiling.router)
+    app.include_router(admin_revocations.router)
+    app.include_router(admin_consent_stats.router)
+    if settings.FAULT_INJECTION_ENABLED:
+        from app.api.routers import admin_faults
+        from app.core import faults
+        faults.install()
+        app.include_router(admin_faults.router)
+
+    # Conditionally expose /metrics
+    if settings.METRICS_ENABLED:
+        app.include_router(metrics_router)
+
+    # Root
+    @app.get("/")
+    def root():
+        return {"service": settings.APP_NAME, "env": settings.APP_ENV}
+
+    return app
+
+_app: "FastAPI | None" = None
+
+def __getattr__(name: str):
+    # Keeps `uvicorn app.main:app` and `from app.main import app` working;
+    # the application is only built on first access.
+    global _app
+    if name == "app":
+        if _app is None:
+            _app = create_app()
+        return _app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
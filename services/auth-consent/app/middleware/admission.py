@@ -0,0 +1,130 @@
+from __future__ import annotations
+import json
+import math
+import time
+from typing import Iterable
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.errors import _build_error
+from app.core.metrics import inc_admission_shed, set_admission_state
+
+PRIORITY_WRITE = "write"
+PRIORITY_READ = "read"
+
+class AdaptiveLimit:
+    """
+    Gradient-style adaptive concurrency limit.
+
+    Tracks a fast and a slow moving average of request latency. When the fast
+    average rises above the slow one (queueing somewhere downstream, e.g. the
+    DB pool), the limit shrinks proportionally; while latency is stable it
+    grows by ~sqrt(limit) per update, probing for more capacity.
+    """
+
+    def __init__(
+        self,
+        initial: int = 64,
+        min_limit: int = 8,
+        max_limit: int = 512,
+        smoothing: float = 0.2,
+    ) -> None:
+        self.limit = float(initial)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.smoothing = smoothing
+        self._short_rtt = 0.0
+        self._long_rtt = 0.0
+
+    def on_sample(self, latency: float, inflight: int) -> None:
+        if self._long_rtt == 0.0:
+            self._short_rtt = self._long_rtt = latency
+            return
+        self._short_rtt += 0.1 * (latency - self._short_rtt)
+        self._long_rtt += 0.01 * (latency - self._long_rtt)
+        # Let the baseline recover quickly after a sustained shift (e.g. after an incident)
+        if self._long_rtt > 2 * self._short_rtt:
+            self._long_rtt *= 0.95
+
+        # Only grow when the current limit is actually being used
+        if inflight < self.limit / 2 and self._short_rtt <= self._long_rtt:
+            return
+        gradient = max(0.5, min(1.0, self._long_rtt / self._short_rtt))
+        new_limit = self.limit * gradient + math.sqrt(self.limit)
+        self.limit = self.limit * (1 - self.smoothing) + new_limit * self.smoothing
+        self.limit = max(self.min_limit, min(self.max_limit, self.limit))
+
+class AdmissionMiddleware:
+    """
+    Outermost ASGI middleware: admits or sheds requests before any auth/DB work.
+
+    Writes (create, authorize, callback, revoke) may use the whole limit;
+    reads only `read_share` of it, so polling is shed first under overload.
+    Shed requests get a fast 503 + Retry-After.
+
+    `exempt_paths` (exact) and `exempt_prefixes` bypass admission and are not
+    latency samples: probes, metrics scrapes and admin endpoints such as the
+    profilers, whose deliberately long requests would read as overload.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        limiter: AdaptiveLimit | None = None,
+        read_share: float = 0.8,
+        exempt_paths: Iterable[str] | None = None,
+        exempt_prefixes: Iterable[str] | None = None,
+        retry_after_seconds: int = 1,
+    ) -> None:
+        self.app = app
+        self.limiter = limiter or AdaptiveLimit()
+        self.read_share = read_share
+        self.exempt_paths = set(exempt_paths or [])
+        self.exempt_prefixes = tuple(exempt_prefixes or ())
+        self.retry_after = retry_after_seconds
+        self.inflight = 0
+
+    @staticmethod
+    def classify(scope: Scope) -> str:
+        if scope.get("method") != "GET" or scope.get("path", "").endswith("/authorize/callback"):
+            return PRIORITY_WRITE
+        return PRIORITY_READ
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        path = scope.get("path", "")
+        if scope["type"] != "http" or path in self.exempt_paths or path.startswith(self.exempt_prefixes):
+            await self.app(scope, receive, send)
+            return
+
+        priority = self.classify(scope)
+        limit = self.limiter.limit
+        allowed = limit if priority == PRIORITY_WRITE else limit * self.read_share
+        if self.inflight >= allowed:
+            inc_admission_shed(priority)
+            await self._shed(scope, send)
+            return
+
+        self.inflight += 1
+        set_admission_state(self.limiter.limit, self.inflight)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.limiter.on_sample(time.perf_counter() - start, self.inflight)
+            self.inflight -= 1
+            set_admission_state(self.limiter.limit, self.inflight)
+
+    async def _shed(self, scope: Scope, send: Send) -> None:
+        body = json.dumps(_build_error("overloaded", 503)).encode("utf-8")
+        headers = [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(self.retry_after).encode()),
+            (b"cache-control", b"no-store"),
+        ]
+        for name, value in scope.get("headers", []):
+            if name == b"x-request-id":
+                headers.append((b"x-request-id", value))
+                break
+        await send({"type": "http.response.start", "status": 503, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,164 @@
+"""
+Opt-in traffic capture (CAPTURE_ENABLED) for load-shape replay.
+
+Writes one compact NDJSON line per request with sanitized metadata only:
+
+    {"t": 1734.512, "m": "POST", "r": "/consents", "s": 201, "d": 12.4,
+     "c": "9f2c...", "p": "41ab...", "b": {"permissions": ["s", 2], ...}}
+
+t  seconds since capture start       m/r/s  method, route template, status
+d  server-side duration in ms        c/p    keyed hashes of consent id / TPP id
+b  body *shape* (types and lengths, never values)
+q  query parameter names (values only for enum-like params)
+
+Ids are HMAC'd with CAPTURE_HASH_KEY (random per process when unset), so
+hashes correlate requests within a capture but can't be reversed or
+joined with other data. Lines go through a queue to a background thread
+that owns a size-rotated file; the request path never touches the disk.
+"""
+from __future__ import annotations
+import atexit
+import hashlib
+import hmac
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import time
+from typing import Any, Optional
+from urllib.parse import parse_qsl
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.metrics import resolve_route_template
+
+_MAX_BODY_BYTES = 64 * 1024
+_SAFE_QUERY_VALUES = {"result"}  # enum-valued, not identifying
+
+def body_shape(value: Any, depth: int = 0) -> Any:
+    """Structure of a JSON value with every scalar replaced by its type letter."""
+    if depth > 6:
+        return "…"
+    if isinstance(value, dict):
+        return {k: body_shape(v, depth + 1) for k, v in value.items()}
+    if isinstance(value, list):
+        return [body_shape(value[0], depth + 1) if value else None, len(value)]
+    if isinstance(value, bool):
+        return "b"
+    if isinstance(value, (int, float)):
+        return "n"
+    if isinstance(value, str):
+        return "s"
+    return None
+
+class _CaptureWriter:
+    def __init__(self, path: str, max_bytes: int, backups: int) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        handler = logging.handlers.RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backups, encoding="utf-8")
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        self._queue: "queue.Queue[logging.LogRecord]" = queue.Queue(maxsize=100_000)
+        self._listener = logging.handlers.QueueListener(self._queue, handler)
+        self._logger = logging.Logger("capture")  # standalone: never reaches the root handlers
+        self._logger.addHandler(logging.handlers.QueueHandler(self._queue))
+        self._closed = False
+        self._listener.start()
+        atexit.register(self.close)  # flush queued lines on exit
+
+    def write(self, record: dict) -> None:
+        try:
+            self._logger.info(json.dumps(record, separators=(",", ":")))
+        except queue.Full:
+            pass  # drop rather than block requests
+
+    def close(self) -> None:
+        if not self._closed:
+            self._closed = True
+            self._listener.stop()
+
+class CaptureMiddleware:
+    def __init__(
+        self,
+        app: ASGIApp,
+        path: str,
+        max_bytes: int = 50 * 1024 * 1024,
+        backups: int = 5,
+        sample_rate: float = 1.0,
+        hash_key: Optional[str] = None,
+        exclude_paths: Optional[set] = None,
+    ) -> None:
+        self.app = app
+        self.sample_rate = sample_rate
+        self.exclude_paths = set(exclude_paths or ())
+        self._key = (hash_key or os.urandom(16).hex()).encode()
+        self._writer = _CaptureWriter(path, max_bytes, backups)
+        self._t0 = time.time()
+
+    def _hash(self, value: Optional[str]) -> Optional[str]:
+        if not value:
+            return None
+        return hmac.new(self._key, value.encode(), hashlib.sha256).hexdigest()[:16]
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or scope.get("path") in self.exclude_paths
+            or (self.sample_rate < 1.0 and random.random() >= self.sample_rate)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        arrived = time.time() - self._t0
+        body = bytearray()
+        status_code = 0
+        location: Optional[str] = None
+
+        async def receive_wrapper() -> Message:
+            message = await receive()
+            if message["type"] == "http.request" and len(body) < _MAX_BODY_BYTES:
+                body.extend(message.get("body", b"")[: _MAX_BODY_BYTES - len(body)])
+            return message
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code, location
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                for name, value in message.get("headers", []):
+                    if name == b"location":
+                        location = value.decode("latin-1")
+            await send(message)
+
+        try:
+            await self.app(scope, receive_wrapper, send_wrapper)
+        finally:
+            self._record(scope, arrived, start, status_code or 500, bytes(body), location)
+
+    def _record(self, scope: Scope, arrived: float, start: float, status_code: int, body: bytes, location: Optional[str]) -> None:
+        consent_id = (scope.get("path_params") or {}).get("consent_id")
+        if consent_id is None and location and location.startswith("/consents/"):
+            consent_id = location.split("/")[2]  # id minted by create
+        state = scope.get("state") or {}
+        rec: dict = {
+            "t": round(arrived, 4),
+            "m": scope["method"],
+            "r": resolve_route_template(scope),
+            "s": status_code,
+            "d": round((time.perf_counter() - start) * 1000, 2),
+        }
+        if consent_id:
+            rec["c"] = self._hash(str(consent_id))
+        if state.get("tpp_client_id"):
+            rec["p"] = self._hash(state["tpp_client_id"])
+        if body:
+            try:
+                rec["b"] = body_shape(json.loads(body))
+            except ValueError:
+                rec["b"] = f"<{len(body)} bytes>"
+        if scope.get("query_string"):
+            rec["q"] = {
+                k: (v if k in _SAFE_QUERY_VALUES else "s")
+                for k, v in parse_qsl(scope["query_string"].decode("latin-1"))
+            }
+        self._writer.write(rec)
@@ -1,22 +1,29 @@
 import uuid
-from sqlalchemy import Column, String, Boolean, DateTime, Text, Integer, func, Index
+from sqlalchemy import Column, Enum, Boolean, DateTime, Text, Integer, SmallInteger, func, Index
 from sqlalchemy.dialects.postgresql import UUID as PG_UUID, JSONB
 from app.db.base import Base
+from app.utils.permissions import decode_permissions
 
-class Consent(Base):
-    __tablename__ = "consents"
+CONSENT_STATUSES = ("PENDING_SCA", "GRANTED", "REJECTED", "EXPIRED", "REVOKED")
+CONSENT_TYPES = ("AIS",)
+ACTIVE_STATUSES = ("PENDING_SCA", "GRANTED")
+TERMINAL_STATUSES = ("REJECTED", "EXPIRED", "REVOKED")
+
+class ConsentColumns:
+    """Columns shared by the hot `consents` table and the cold `consents_archive`."""
 
     id = Column(PG_UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     tenant_id = Column(Text, nullable=True)
 
-    tpp_client_id = Column(Text, nullable=False, index=True)
+    tpp_client_id = Column(Text, nullable=False)
     psu_id = Column(Text, nullable=True)
 
-    type = Column(String(16), nullable=False)               # e.g., "AIS"
-    permissions = Column(JSONB, nullable=False)             # ["accounts:read", ...]
-    status = Column(String(20), nullable=False, index=True) # PENDING_SCA, GRANTED, ...
+    # Postgres enums (4 bytes, compared natively) instead of free text
+    type = Column(Enum(*CONSENT_TYPES, name="consent_type"), nullable=False)
+    status = Column(Enum(*CONSENT_STATUSES, name="consent_status"), nullable=False)
+    permissions_mask = Column(SmallInteger, nullable=False)  # bits from app.utils.permissions
     recurring = Column(Boolean, nullable=False, default=True)
-    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    expires_at = Column(DateTime(timezone=True), nullable=False)
 
     redirect_success_url = Column(Text, nullable=False)
     redirect_failure_url = Column(Text, nullable=False)
@@ -29,6 +36,39 @@ class Consent(Base):
     extra_metadata = Column("metadata", JSONB, nullable=True)     # column named "metadata"
     version = Column(Integer, nullable=False, default=1)
 
+    @property
+    def permissions(self) -> list[str]:
+        return decode_permissions(self.permissions_mask)
+
+class Consent(ConsentColumns, Base):
+    __tablename__ = "consents"
+
+class ConsentArchive(ConsentColumns, Base):
+    """Terminal consents moved out of the hot table (range-partitioned by created_at, see 0005)."""
+    __tablename__ = "consents_archive"
+
+    # Partition key must be part of the primary key
+    created_at = Column(DateTime(timezone=True), primary_key=True, nullable=False, server_default=func.now())
+    archived_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+
 # Quick indices for common filters:
 Index("idx_consents_tenant", Consent.tenant_id)
 Index("idx_consents_created_at", Consent.created_at)
+Index("idx_consents_tpp_client", Consent.tpp_client_id)
+Index(
+    "idx_consents_psu_active",
+    Consent.psu_id,
+    postgresql_where=Consent.status.in_(ACTIVE_STATUSES) & Consent.psu_id.isnot(None),
+)
+# Partial indexes: the sweeper only ever looks at active rows, the archiver only at terminal ones
+Index(
+    "idx_consents_expires_active",
+    Consent.expires_at,
+    postgresql_where=Consent.status.in_(ACTIVE_STATUSES),
+)
+Index(
+    "idx_consents_terminal_updated",
+    Consent.updated_at,
+    postgresql_where=Consent.status.in_(TERMINAL_STATUSES),
+)
+Index("idx_consents_archive_tpp_client", ConsentArchive.tpp_client_id)
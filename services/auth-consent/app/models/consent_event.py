@@ -0,0 +1,20 @@
+from sqlalchemy import BigInteger, Column, DateTime, String, Text, func, Index
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+from app.db.base import Base
+
+class ConsentEvent(Base):
+    """Append-only history of consent status transitions."""
+    __tablename__ = "consent_events"
+
+    # Range-partitioned on ts (see 0003 migration), so ts is part of the key
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    ts = Column(DateTime(timezone=True), primary_key=True, nullable=False, server_default=func.now())
+
+    consent_id = Column(PG_UUID(as_uuid=True), nullable=False)
+    from_status = Column(String(20), nullable=True)         # NULL for the creation event
+    to_status = Column(String(20), nullable=False)
+    actor = Column(Text, nullable=False)                    # e.g. "tpp:<client>", "psu", "system:expiry"
+    correlation_id = Column(Text, nullable=True)
+
+# History lookups are always "one consent, ordered by time"
+Index("idx_consent_events_consent_ts", ConsentEvent.consent_id, ConsentEvent.ts)
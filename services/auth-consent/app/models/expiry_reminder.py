@@ -0,0 +1,33 @@
+from sqlalchemy import Column, DateTime, Integer, String, Text, func, Index, text
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+from app.db.base import Base
+
+class ExpiryReminder(Base):
+    """
+    Dedup marker for the expiry reminder of one consent expiry: a consent is
+    reminded about at most once per expires_at, whatever the number of runs or
+    workers. PENDING rows are claimed (leased) or waiting for a retry.
+    """
+    __tablename__ = "expiry_reminders"
+
+    consent_id = Column(PG_UUID(as_uuid=True), primary_key=True)
+    expires_at = Column(DateTime(timezone=True), primary_key=True)
+    tenant_id = Column(Text, nullable=True)
+    psu_id = Column(Text, nullable=False)
+    tpp_client_id = Column(Text, nullable=False)
+
+    status = Column(String(16), nullable=False, server_default="PENDING")  # PENDING, SENT, DEAD, DISCARDED
+    attempts = Column(Integer, nullable=False, server_default="0")
+    last_error = Column(Text, nullable=True)
+    available_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())  # lease / next retry
+
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    sent_at = Column(DateTime(timezone=True), nullable=True)
+
+# Retries pick up due PENDING rows only; the purge walks expires_at
+Index(
+    "idx_expiry_reminders_pending",
+    ExpiryReminder.available_at,
+    postgresql_where=text("status = 'PENDING'"),
+)
+Index("idx_expiry_reminders_expires", ExpiryReminder.expires_at)
@@ -0,0 +1,41 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+
+from app.utils.permissions import decode_permissions
+
+@dataclass(slots=True, frozen=True)
+class ConsentRecord:
+    """
+    Plain, read-only consent snapshot for request paths.
+
+    Cheaper than an ORM instance (no identity map entry, no change tracking,
+    no per-instance __dict__) and safe to use after the session is closed.
+    """
+    id: UUID
+    tenant_id: Optional[str]
+    tpp_client_id: str
+    type: str
+    status: str
+    permissions_mask: int
+    recurring: bool
+    expires_at: datetime
+    redirect_success_url: str
+    redirect_failure_url: str
+    accounts_scope: Optional[Dict[str, Any]]
+    sca_id: Optional[str]
+    created_at: datetime
+    updated_at: datetime
+
+    @property
+    def permissions(self) -> List[str]:
+        return decode_permissions(self.permissions_mask)
+
+    @classmethod
+    def from_row(cls, row: Any) -> "ConsentRecord":
+        # Accepts a Core Row or an ORM instance (anything exposing the columns as attributes)
+        return cls(**{name: getattr(row, name) for name in RECORD_FIELDS})
+
+RECORD_FIELDS = tuple(ConsentRecord.__dataclass_fields__)
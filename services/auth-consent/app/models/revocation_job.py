@@ -0,0 +1,35 @@
+from sqlalchemy import BigInteger, Column, DateTime, Integer, String, Text, func, Index, text
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+from app.db.base import Base
+
+REVOCATION_SELECTORS = ("psu_id", "tpp_client_id", "tenant_id")
+OPEN_JOB_STATUSES = ("PENDING", "RUNNING")
+
+class RevocationJob(Base):
+    """Admin-requested bulk revocation of every active consent matching selector = value."""
+    __tablename__ = "revocation_jobs"
+
+    id = Column(PG_UUID(as_uuid=True), primary_key=True)
+    selector = Column(String(16), nullable=False)            # one of REVOCATION_SELECTORS
+    value = Column(Text, nullable=False)
+    reason = Column(Text, nullable=True)
+    requested_by = Column(Text, nullable=True)
+
+    status = Column(String(16), nullable=False, server_default="PENDING")  # PENDING, RUNNING, COMPLETED, CANCELLED, FAILED
+    revoked_count = Column(BigInteger, nullable=False, server_default="0")
+    batches = Column(Integer, nullable=False, server_default="0")
+    attempts = Column(Integer, nullable=False, server_default="0")
+    last_error = Column(Text, nullable=True)
+    lease_until = Column(DateTime(timezone=True), nullable=True)   # RUNNING job is owned by a worker until then
+
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+Index(
+    "uq_revocation_jobs_open",
+    RevocationJob.selector,
+    RevocationJob.value,
+    unique=True,
+    postgresql_where=text("status IN ('PENDING','RUNNING')"),
+)
@@ -0,0 +1,29 @@
+from sqlalchemy import BigInteger, Column, DateTime, Integer, String, Text, func, Index, text
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID, JSONB
+from app.db.base import Base
+
+class WebhookOutbox(Base):
+    """Transactional outbox: one row per consent status change to push to the TPP."""
+    __tablename__ = "webhook_outbox"
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    consent_id = Column(PG_UUID(as_uuid=True), nullable=False)
+    tpp_client_id = Column(Text, nullable=False)
+    tenant_id = Column(Text, nullable=True)
+
+    event_type = Column(String(64), nullable=False)         # e.g., "consent.status_changed"
+    payload = Column(JSONB, nullable=False)
+    status = Column(String(16), nullable=False, server_default="PENDING")  # PENDING, DELIVERED, DEAD, DISCARDED
+    attempts = Column(Integer, nullable=False, server_default="0")
+    last_error = Column(Text, nullable=True)
+
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    available_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    delivered_at = Column(DateTime(timezone=True), nullable=True)
+
+# Dispatcher claims only due PENDING rows; delivered/dead rows drop out of the index
+Index(
+    "idx_webhook_outbox_pending",
+    WebhookOutbox.available_at,
+    postgresql_where=text("status = 'PENDING'"),
+)
@@ -0,0 +1,53 @@
+from datetime import datetime
+from sqlalchemy import bindparam, text
+from sqlalchemy.orm import Session
+from app.models.consent import Consent, TERMINAL_STATUSES
+
+# Same column list on both sides; consents_archive adds archived_at (defaulted)
+_NAMES = [f'"{c.name}"' for c in Consent.__table__.columns]
+_COLUMNS = ", ".join(_NAMES)
+
+_MOVE_BATCH = text(f"""
+    WITH picked AS (
+        SELECT id FROM consents
+        WHERE status IN :terminal AND updated_at < :cutoff
+        ORDER BY updated_at
+        LIMIT :batch
+        FOR UPDATE SKIP LOCKED
+    ),
+    moved AS (
+        DELETE FROM consents c USING picked
+        WHERE c.id = picked.id
+        RETURNING {", ".join(f"c.{n}" for n in _NAMES)}
+    )
+    INSERT INTO consents_archive ({_COLUMNS})
+    SELECT {_COLUMNS} FROM moved
+""").bindparams(bindparam("terminal", expanding=True))
+
+def ensure_archive_partitions(db: Session) -> None:
+    """
+    Create monthly archive partitions from the oldest consent still in the hot
+    table up to the current month (cheap: min() is served by idx_consents_created_at).
+    """
+    db.execute(text("""
+        SELECT consents_archive_ensure_partition(m::date)
+        FROM generate_series(
+            date_trunc('month', COALESCE((SELECT min(created_at) FROM consents), now())),
+            date_trunc('month', now()),
+            interval '1 month'
+        ) AS m
+    """))
+    db.commit()
+
+def archive_terminal_batch(db: Session, *, cutoff: datetime, batch_size: int) -> int:
+    """
+    Move up to `batch_size` terminal consents last updated before `cutoff` into
+    consents_archive in one statement (DELETE ... RETURNING feeding an INSERT).
+    Returns the number of rows moved.
+    """
+    res = db.execute(
+        _MOVE_BATCH,
+        {"terminal": TERMINAL_STATUSES, "cutoff": cutoff, "batch": batch_size},
+    )
+    db.commit()
+    return int(res.rowcount or 0)
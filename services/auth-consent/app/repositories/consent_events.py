@@ -0,0 +1,53 @@
+from typing import List
+from uuid import UUID
+from datetime import date, datetime
+from sqlalchemy import select, text
+from sqlalchemy.orm import Session
+from app.models.consent_event import ConsentEvent
+
+def list_for_consent(db: Session, consent_id: UUID, limit: int = 500) -> List[ConsentEvent]:
+    # Served by idx_consent_events_consent_ts
+    stmt = (
+        select(ConsentEvent)
+        .where(ConsentEvent.consent_id == consent_id)
+        .order_by(ConsentEvent.ts, ConsentEvent.id)
+        .limit(limit)
+    )
+    return list(db.scalars(stmt))
+
+def ensure_partitions(db: Session, months_ahead: int = 2) -> None:
+    """Create monthly partitions for the current month and `months_ahead` following ones."""
+    db.execute(
+        text("""
+            SELECT consent_events_ensure_partition((date_trunc('month', now()) + make_interval(months => m))::date)
+            FROM generate_series(0, :ahead) AS m
+        """),
+        {"ahead": months_ahead},
+    )
+    db.commit()
+
+def drop_partitions_before(db: Session, cutoff: datetime) -> List[str]:
+    """
+    Detach and drop monthly partitions whose whole range is older than `cutoff`.
+    Dropping a partition is O(1) compared to a DELETE over the same rows.
+    """
+    rows = db.execute(text("""
+        SELECT c.relname
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        JOIN pg_class p ON p.oid = i.inhparent
+        WHERE p.relname = 'consent_events' AND c.relname ~ '^consent_events_[0-9]{6}$'
+    """)).scalars().all()
+
+    dropped: List[str] = []
+    for name in sorted(rows):
+        suffix = name.rsplit("_", 1)[1]
+        year, month = int(suffix[:4]), int(suffix[4:])
+        upper = date(year + month // 12, month % 12 + 1, 1)
+        if upper > cutoff.date():
+            continue
+        db.execute(text(f'ALTER TABLE consent_events DETACH PARTITION "{name}"'))
+        db.execute(text(f'DROP TABLE "{name}"'))
+        dropped.append(name)
+    db.commit()
+    return dropped
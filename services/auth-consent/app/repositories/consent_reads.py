@@ -0,0 +1,48 @@
+"""
+Read-only consent lookups on SQLAlchemy Core.
+
+The routes only need a handful of columns and never modify what they read, so
+these skip the ORM entirely: statements are built once at import (so the
+compiled-SQL cache is always hit), executed on the session's connection, and
+come back as plain Rows / ConsentRecord instead of identity-mapped instances.
+Each lookup falls back to consents_archive for terminal consents moved to cold
+storage.
+"""
+from typing import Any, Optional
+from uuid import UUID
+from sqlalchemy import bindparam, select
+from sqlalchemy.orm import Session
+from app.models.consent import Consent, ConsentArchive
+from app.models.records import ConsentRecord, RECORD_FIELDS
+
+_hot = Consent.__table__
+_cold = ConsentArchive.__table__
+
+# Polling routes: status + expiry + ownership columns only
+_STATUS_FIELDS = ("id", "status", "expires_at", "tpp_client_id", "tenant_id")
+
+def _by_id(table, fields):
+    return select(*(table.c[f] for f in fields)).where(table.c.id == bindparam("consent_id"))
+
+_STATUS_HOT = _by_id(_hot, _STATUS_FIELDS)
+_STATUS_COLD = _by_id(_cold, _STATUS_FIELDS)
+_RECORD_HOT = _by_id(_hot, RECORD_FIELDS)
+_RECORD_COLD = _by_id(_cold, RECORD_FIELDS)
+
+def _first(db: Session, hot, cold, consent_id: UUID) -> Optional[Any]:
+    conn = db.connection()
+    params = {"consent_id": consent_id}
+    row = conn.execute(hot, params).first()
+    if row is None:
+        row = conn.execute(cold, params).first()
+    return row
+
+def get_status_view(db: Session, consent_id: UUID) -> Optional[Any]:
+    """Row with id, status, expires_at, tpp_client_id, tenant_id (attribute access)."""
+    return _first(db, _STATUS_HOT, _STATUS_COLD, consent_id)
+
+def get_record(db: Session, consent_id: UUID) -> Optional[ConsentRecord]:
+    """Full projection used by GET /consents/{id} and the state-changing routes' pre-checks."""
+    row = _first(db, _RECORD_HOT, _RECORD_COLD, consent_id)
+    # Column order matches RECORD_FIELDS, so build positionally
+    return ConsentRecord(*row) if row is not None else None
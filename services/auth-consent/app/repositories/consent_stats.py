@@ -0,0 +1,53 @@
+"""
+Reads of consent_stats, the per (tenant, TPP, creation day, status) counters
+kept up to date by triggers on `consents` (see migration 0008). Queries touch
+the summary rows only, never `consents`, so cost doesn't grow with table size.
+"""
+from datetime import date
+from typing import Dict, Optional, Sequence, Tuple
+from sqlalchemy import column, func, select, table
+from sqlalchemy.orm import Session
+
+_stats = table(
+    "consent_stats",
+    column("tenant_key"),
+    column("tpp_client_id"),
+    column("day"),
+    column("status"),
+    column("n"),
+)
+
+# API dimension -> column; tenant_key is '' for consents without a tenant
+DIMENSIONS = {
+    "tenant_id": _stats.c.tenant_key,
+    "tpp_client_id": _stats.c.tpp_client_id,
+    "day": _stats.c.day,
+    "status": _stats.c.status,
+}
+
+def counts(
+    db: Session,
+    *,
+    group_by: Sequence[str],
+    tenant_id: Optional[str] = None,
+    tpp_client_id: Optional[str] = None,
+    status: Optional[str] = None,
+    day_from: Optional[date] = None,
+    day_to: Optional[date] = None,
+) -> Dict[Tuple, int]:
+    """{(values of group_by...): count} for the filtered consents on this shard."""
+    keys = [DIMENSIONS[d] for d in group_by]
+    stmt = select(*keys, func.sum(_stats.c.n).label("n")).group_by(*keys).having(func.sum(_stats.c.n) != 0)
+    if tenant_id is not None:
+        stmt = stmt.where(_stats.c.tenant_key == tenant_id)
+    if tpp_client_id is not None:
+        stmt = stmt.where(_stats.c.tpp_client_id == tpp_client_id)
+    if status is not None:
+        stmt = stmt.where(_stats.c.status == status)
+    if day_from is not None:
+        stmt = stmt.where(_stats.c.day >= day_from)
+    if day_to is not None:
+        stmt = stmt.where(_stats.c.day <= day_to)
+    rows = db.execute(stmt).all()
+    db.commit()
+    return {tuple(r[:-1]): int(r[-1]) for r in rows}
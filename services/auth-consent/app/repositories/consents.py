@@ -1,10 +1,24 @@
-from typing import Optional, Iterable
+from typing import Iterable, List, Optional
 from uuid import UUID
 from datetime import datetime
-from sqlalchemy import update, func
+from sqlalchemy import func, insert, literal, or_, select, update
 from sqlalchemy.orm import Session
-from app.models.consent import Consent
+from app.models.consent import ACTIVE_STATUSES, Consent, ConsentArchive
+from app.models.consent_event import ConsentEvent
+from app.models.records import ConsentRecord
+from app.models.webhook_outbox import WebhookOutbox
 from app.api.schemas.consents import ConsentCreateRequest
+from app.core.config import settings
+from app.repositories.consent_reads import get_record
+from app.repositories.outbox import EVENT_STATUS_CHANGED, status_changed_payload
+from app.utils.permissions import encode_permissions
+
+_consents = Consent.__table__
+_events = ConsentEvent.__table__
+_outbox = WebhookOutbox.__table__
+
+# States the sweeper may move to EXPIRED
+_EXPIRABLE = ACTIVE_STATUSES
 
 def create(
     db: Session,
@@ -16,13 +30,15 @@ def create(
     status: str,
     client_ip: Optional[str],
     tenant_id: Optional[str],
+    actor: Optional[str] = None,
+    correlation_id: Optional[str] = None,
 ) -> Consent:
     obj = Consent(
         id=consent_id,
         tenant_id=tenant_id, 
         tpp_client_id=tpp_client_id,
         type=payload.type.value,
-        permissions=[p.value for p in payload.permissions],
+        permissions_mask=encode_permissions(p.value for p in payload.permissions),
         status=status,
         recurring=payload.recurring,
         expires_at=expires_at,
@@ -33,12 +49,24 @@ def create(
         extra_metadata=payload.metadata or None,
     )
     db.add(obj)
+    # Creation is the first entry of the history, written in the same transaction
+    db.add(ConsentEvent(
+        consent_id=consent_id,
+        from_status=None,
+        to_status=status,
+        actor=actor or f"tpp:{tpp_client_id}",
+        correlation_id=correlation_id,
+    ))
     db.commit()
     db.refresh(obj)
     return obj
 
 def get_by_id(db: Session, consent_id: UUID) -> Optional[Consent]:
-    return db.get(Consent, consent_id)
+    obj = db.get(Consent, consent_id)
+    if obj is not None:
+        return obj
+    # Terminal consents may have been moved to cold storage; same attributes, read-only
+    return db.scalars(select(ConsentArchive).where(ConsentArchive.id == consent_id)).first()
 
 def update_status_if_allowed(
     db: Session,
@@ -46,46 +74,249 @@ def update_status_if_allowed(
     consent_id: UUID,
     allowed_from: Iterable[str],
     new_status: str,
-) -> Optional[Consent]:
-    obj = db.get(Consent, consent_id)
-    if not obj:
-        return None
-    if obj.status in allowed_from:
-        obj.status = new_status
-        db.add(obj)
-        db.commit()
-        db.refresh(obj)
-    return obj
+    actor: str,
+    correlation_id: Optional[str] = None,
+) -> Optional[ConsentRecord]:
+    """
+    Transition a consent and append its history event in ONE statement:
 
-def set_sca_id_if_pending(db: Session, *, consent_id: UUID, sca_id: str) -> Optional[Consent]:
-    obj = db.get(Consent, consent_id)
-    if not obj:
-        return None
-    if obj.status == "PENDING_SCA":
-        # Idempotent: keep existing sca_id if already set
-        if obj.sca_id and obj.sca_id != sca_id:
-            # Keep the existing one; caller should reuse it
-            pass
-        else:
-            obj.sca_id = obj.sca_id or sca_id
-        db.add(obj)
-        db.commit()
-        db.refresh(obj)
-    return obj
+        WITH prev AS (SELECT id, status FROM consents WHERE id = :id FOR UPDATE),
+             upd  AS (UPDATE consents ... FROM prev WHERE prev.status IN (...) RETURNING ...),
+             ev   AS (INSERT INTO consent_events ... SELECT ... FROM upd),
+             ob   AS (INSERT INTO webhook_outbox ... SELECT ... FROM upd)   -- when webhooks are enabled
+        SELECT * FROM upd
 
+    Returns the updated consent, or the unchanged consent when the transition is
+    not allowed (callers inspect .status), or None when the consent does not exist.
+    """
+    prev = (
+        select(_consents.c.id, _consents.c.status)
+        .where(_consents.c.id == consent_id)
+        .with_for_update()
+        .cte("prev")
+    )
+    upd = (
+        update(_consents)
+        .where(_consents.c.id == prev.c.id)
+        .where(prev.c.status.in_(tuple(allowed_from)))
+        .values(status=new_status)
+        .returning(*_consents.c, prev.c.status.label("from_status"))
+        .cte("upd")
+    )
+    row = _execute_transition(db, upd, actor, correlation_id)
+    if row is not None:
+        return row
+    # Not allowed (or missing): report current state, callers decide 404/409
+    return get_record(db, consent_id)
 
-def expire_due(db: Session) -> int:
+def start_sca_if_pending(
+    db: Session,
+    *,
+    consent_id: UUID,
+    sca_id: str,
+    tpp_client_id: str,
+    tenant_id: Optional[str],
+) -> Optional[ConsentRecord]:
+    """
+    Attach a new SCA session to a PENDING_SCA consent owned by the caller, in one
+    UPDATE. A later call replaces the sca_id, which invalidates the earlier
+    session's callback. None when nothing matched (missing, not owned, or not
+    pending): callers read the consent to tell which.
+    """
+    stmt = (
+        update(_consents)
+        .where(_consents.c.id == consent_id)
+        .where(_consents.c.status == "PENDING_SCA")
+        .where(_consents.c.tpp_client_id == tpp_client_id)
+        .values(sca_id=sca_id)
+        .returning(*_consents.c)
+    )
+    if tenant_id is not None:
+        stmt = stmt.where(or_(_consents.c.tenant_id.is_(None), _consents.c.tenant_id == tenant_id))
+    row = db.execute(stmt).first()
+    db.commit()
+    return ConsentRecord.from_row(row) if row is not None else None
+
+def complete_sca(
+    db: Session,
+    *,
+    consent_id: UUID,
+    sca_id: str,
+    new_status: str,
+    actor: str,
+    correlation_id: Optional[str] = None,
+) -> Optional[ConsentRecord]:
+    """
+    Finish the consent's current SCA session: PENDING_SCA -> GRANTED/REJECTED only
+    while `sca_id` is still the stored one. No pre-read and no row lock beyond the
+    UPDATE's own; None when nothing matched.
+    """
+    upd = (
+        update(_consents)
+        .where(_consents.c.id == consent_id)
+        .where(_consents.c.sca_id == sca_id)
+        .where(_consents.c.status == "PENDING_SCA")
+        .values(status=new_status)
+        .returning(*_consents.c, literal("PENDING_SCA").label("from_status"))
+        .cte("upd")
+    )
+    return _execute_transition(db, upd, actor, correlation_id)
+
+def _execute_transition(db: Session, upd, actor: str, correlation_id: Optional[str]) -> Optional[ConsentRecord]:
+    """Run an UPDATE ... RETURNING cte (consent columns + from_status) with its history event and outbox row."""
+    ev = (
+        insert(_events)
+        .from_select(
+            ["consent_id", "from_status", "to_status", "actor", "correlation_id"],
+            select(upd.c.id, upd.c.from_status, upd.c.status, literal(actor), literal(correlation_id)),
+        )
+        .cte("ev")
+    )
+    stmt = select(upd).add_cte(ev)
+    if settings.WEBHOOKS_ENABLED:
+        ob = (
+            insert(_outbox)
+            .from_select(
+                ["consent_id", "tpp_client_id", "tenant_id", "event_type", "payload"],
+                select(
+                    upd.c.id,
+                    upd.c.tpp_client_id,
+                    upd.c.tenant_id,
+                    literal(EVENT_STATUS_CHANGED),
+                    func.jsonb_build_object(
+                        literal("event"), literal(EVENT_STATUS_CHANGED),
+                        literal("consent_id"), upd.c.id,
+                        literal("status"), upd.c.status,
+                        literal("previous_status"), upd.c.from_status,
+                    ),
+                ),
+            )
+            .cte("ob")
+        )
+        stmt = stmt.add_cte(ob)
+    row = db.execute(stmt).first()
+    db.commit()
+    return ConsentRecord.from_row(row) if row is not None else None
+
+def _append_history(db: Session, rows, to_status: str, actor: str, correlation_id: Optional[str] = None) -> None:
+    """History events (and webhook outbox rows) for a batch of transitions, one multi-row INSERT each."""
+    if not rows:
+        return
+    db.execute(
+        insert(_events),
+        [
+            {
+                "consent_id": r.id,
+                "from_status": r.from_status,
+                "to_status": to_status,
+                "actor": actor,
+                "correlation_id": correlation_id,
+            }
+            for r in rows
+        ],
+    )
+    if settings.WEBHOOKS_ENABLED:
+        db.execute(
+            insert(_outbox),
+            [
+                {
+                    "consent_id": r.id,
+                    "tpp_client_id": r.tpp_client_id,
+                    "tenant_id": r.tenant_id,
+                    "event_type": EVENT_STATUS_CHANGED,
+                    "payload": status_changed_payload(r.id, to_status, r.from_status),
+                }
+                for r in rows
+            ],
+        )
+
+def expire_due(db: Session, *, batch_size: int = 1000, actor: str = "system:expiry") -> int:
     """
     Mark due consents as EXPIRED. Returns affected row count.
     States allowed to expire: PENDING_SCA, GRANTED.
+
+    Works in batches of `batch_size` rows (short transactions, SKIP LOCKED so it
+    never waits on online traffic); each batch's history events (and webhook
+    outbox rows) go in as one multi-row INSERT.
+    """
+    total = 0
+    while True:
+        due = (
+            select(_consents.c.id, _consents.c.status)
+            .where(_consents.c.status.in_(_EXPIRABLE))
+            .where(_consents.c.expires_at <= func.now())
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+            .cte("due")
+        )
+        stmt = (
+            update(_consents)
+            .where(_consents.c.id == due.c.id)
+            .values(status="EXPIRED")
+            .returning(
+                _consents.c.id,
+                _consents.c.tpp_client_id,
+                _consents.c.tenant_id,
+                due.c.status.label("from_status"),
+            )
+        )
+        rows = db.execute(stmt).all()
+        _append_history(db, rows, "EXPIRED", actor)
+        db.commit()
+        total += len(rows)
+        if len(rows) < batch_size:
+            return total
+
+def revoke_matching_batch(
+    db: Session,
+    *,
+    selector: str,
+    value: str,
+    batch_size: int,
+    actor: str,
+    correlation_id: Optional[str] = None,
+) -> List[UUID]:
     """
+    One batch of a bulk revocation: revoke up to `batch_size` active consents
+    whose `selector` column (psu_id, tpp_client_id or tenant_id) equals `value`,
+    with their history events and outbox rows, in one short transaction.
+
+    Rows locked by online traffic are skipped (SKIP LOCKED), so a short batch
+    doesn't mean nothing is left; see has_active_matching. Returns the revoked ids.
+    """
+    column = _consents.c[selector]
+    due = (
+        select(_consents.c.id, _consents.c.status)
+        .where(column == value)
+        .where(_consents.c.status.in_(ACTIVE_STATUSES))
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+        .cte("due")
+    )
     stmt = (
-        update(Consent)
-        .where(Consent.status.in_(("PENDING_SCA", "GRANTED")))
-        .where(Consent.expires_at <= func.now())
-        .values(status="EXPIRED")
-        .execution_options(synchronize_session=False)
+        update(_consents)
+        .where(_consents.c.id == due.c.id)
+        .values(status="REVOKED")
+        .returning(
+            _consents.c.id,
+            _consents.c.tpp_client_id,
+            _consents.c.tenant_id,
+            due.c.status.label("from_status"),
+        )
+    )
+    rows = db.execute(stmt).all()
+    _append_history(db, rows, "REVOKED", actor, correlation_id)
+    db.commit()
+    return [r.id for r in rows]
+
+def has_active_matching(db: Session, *, selector: str, value: str) -> bool:
+    column = _consents.c[selector]
+    stmt = select(
+        select(_consents.c.id)
+        .where(column == value)
+        .where(_consents.c.status.in_(ACTIVE_STATUSES))
+        .exists()
     )
-    res = db.execute(stmt)
+    found = db.execute(stmt).scalar()
     db.commit()
-    return int(res.rowcount or 0)
\ No newline at end of file
+    return bool(found)
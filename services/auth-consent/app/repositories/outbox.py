@@ -0,0 +1,106 @@
+from typing import Any, Dict, List, Sequence, Tuple
+from sqlalchemy import BigInteger, Float, Text, case, cast, column, func, select, text, update, values
+from sqlalchemy.orm import Session
+from app.models.webhook_outbox import WebhookOutbox
+
+_outbox = WebhookOutbox.__table__
+
+EVENT_STATUS_CHANGED = "consent.status_changed"
+
+def status_changed_payload(consent_id, status: str, previous_status: str | None) -> Dict[str, Any]:
+    return {
+        "event": EVENT_STATUS_CHANGED,
+        "consent_id": str(consent_id),
+        "status": status,
+        "previous_status": previous_status,
+    }
+
+def claim_batch(db: Session, *, limit: int, lease_seconds: int) -> List[Any]:
+    """
+    Claim up to `limit` due rows. Rows are locked with SKIP LOCKED only for the
+    duration of this short transaction; the claim itself is a lease (available_at
+    pushed forward), so HTTP delivery never holds a DB lock and a crashed worker's
+    rows become due again once the lease runs out.
+    """
+    due = (
+        select(_outbox.c.id)
+        .where(_outbox.c.status == "PENDING")
+        .where(_outbox.c.available_at <= func.now())
+        .order_by(_outbox.c.available_at)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+        .cte("due")
+    )
+    stmt = (
+        update(_outbox)
+        .where(_outbox.c.id == due.c.id)
+        .values(
+            available_at=func.now() + func.make_interval(0, 0, 0, 0, 0, 0, lease_seconds),
+            attempts=_outbox.c.attempts + 1,
+        )
+        .returning(
+            _outbox.c.id,
+            _outbox.c.tpp_client_id,
+            _outbox.c.event_type,
+            _outbox.c.payload,
+            _outbox.c.attempts,
+            _outbox.c.created_at,
+        )
+    )
+    rows = db.execute(stmt).all()
+    db.commit()
+    return rows
+
+def mark_delivered(db: Session, ids: Sequence[int]) -> None:
+    if not ids:
+        return
+    db.execute(
+        update(_outbox)
+        .where(_outbox.c.id.in_(ids))
+        .values(status="DELIVERED", delivered_at=func.now(), last_error=None)
+    )
+    db.commit()
+
+def mark_failed(db: Session, failures: Sequence[Tuple[int, str, float | None]]) -> None:
+    """
+    failures: (id, error, retry_in_seconds). retry_in_seconds=None dead-letters the row.
+    One UPDATE ... FROM (VALUES ...) for the whole batch.
+    """
+    if not failures:
+        return
+    f = values(
+        column("id", BigInteger), column("error", Text), column("retry_in", Float), name="f",
+    ).data([(row_id, error[:500], retry_in) for row_id, error, retry_in in failures])
+    dead = f.c.retry_in.is_(None)
+    db.execute(
+        update(_outbox)
+        .where(_outbox.c.id == f.c.id)
+        .values(
+            last_error=f.c.error,
+            status=case((dead, "DEAD"), else_=_outbox.c.status),
+            available_at=case(
+                (dead, _outbox.c.available_at),
+                # cast: a batch of dead letters only would leave the VALUES column untyped
+                else_=func.now() + func.make_interval(0, 0, 0, 0, 0, 0, cast(f.c.retry_in, Float)),
+            ),
+        )
+    )
+    db.commit()
+
+def mark_discarded(db: Session, ids: Sequence[int], reason: str) -> None:
+    if not ids:
+        return
+    db.execute(
+        update(_outbox)
+        .where(_outbox.c.id.in_(ids))
+        .values(status="DISCARDED", last_error=reason)
+    )
+    db.commit()
+
+def backlog_stats(db: Session) -> Tuple[int, float]:
+    """(pending rows, age in seconds of the oldest pending row)"""
+    row = db.execute(text("""
+        SELECT count(*), COALESCE(EXTRACT(EPOCH FROM now() - min(created_at)), 0)
+        FROM webhook_outbox WHERE status = 'PENDING'
+    """)).one()
+    return int(row[0]), float(row[1])
@@ -0,0 +1,160 @@
+from typing import Any, List, Sequence, Tuple
+from sqlalchemy import DateTime, Float, Text, case, cast, column, func, text, tuple_, update, values
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+from sqlalchemy.orm import Session
+from app.models.expiry_reminder import ExpiryReminder
+
+_reminders = ExpiryReminder.__table__
+
+# (consent_id, expires_at): the marker key
+ReminderKey = Tuple[Any, Any]
+
+# Consents worth a reminder: granted, renewable, with a PSU to tell. status = 'GRANTED'
+# implies the predicate of idx_consents_expires_active, so this is a range scan of that index.
+_ELIGIBLE = """
+    c.status = 'GRANTED' AND c.recurring AND c.psu_id IS NOT NULL
+    AND c.expires_at > now() AND c.expires_at <= now() + make_interval(secs => :window)
+"""
+
+def claim_new(db: Session, *, window_seconds: float, limit: int, lease_seconds: int) -> List[Any]:
+    """
+    Claim reminders for up to `limit` consents that entered the window and have
+    no marker yet, plus every other due consent of the same PSUs, so each PSU
+    gets one digest. Claiming inserts the PENDING marker leased for
+    `lease_seconds`; ON CONFLICT DO NOTHING keeps concurrent workers' claims
+    disjoint, and a SENT marker keeps a consent from being reminded twice.
+    """
+    rows = db.execute(text(f"""
+        WITH first AS (
+            SELECT c.tenant_id, c.psu_id FROM consents c
+            WHERE {_ELIGIBLE}
+              AND NOT EXISTS (
+                  SELECT 1 FROM expiry_reminders r WHERE r.consent_id = c.id AND r.expires_at = c.expires_at
+              )
+            ORDER BY c.expires_at
+            LIMIT :limit
+        ),
+        psus AS (SELECT DISTINCT tenant_id, psu_id FROM first)
+        INSERT INTO expiry_reminders AS r (consent_id, expires_at, tenant_id, psu_id, tpp_client_id, attempts, available_at)
+        SELECT c.id, c.expires_at, c.tenant_id, c.psu_id, c.tpp_client_id, 1, now() + make_interval(secs => :lease)
+        FROM consents c JOIN psus p ON p.psu_id = c.psu_id AND p.tenant_id IS NOT DISTINCT FROM c.tenant_id
+        WHERE {_ELIGIBLE}
+        ON CONFLICT (consent_id, expires_at) DO NOTHING
+        RETURNING r.consent_id, r.expires_at, r.tenant_id, r.psu_id, r.tpp_client_id, r.attempts, r.status
+    """), {"window": window_seconds, "limit": limit, "lease": lease_seconds}).all()
+    db.commit()
+    return rows
+
+def claim_retries(db: Session, *, limit: int, lease_seconds: int) -> List[Any]:
+    """
+    Claim up to `limit` PENDING markers due for a retry (or whose lease ran out),
+    like webhook_outbox.claim_batch. Markers whose consent has meanwhile been
+    revoked, renewed or has expired come back DISCARDED instead.
+    """
+    rows = db.execute(text("""
+        WITH due AS (
+            SELECT r.consent_id, r.expires_at,
+                   r.expires_at > now() AND EXISTS (
+                       SELECT 1 FROM consents c
+                       WHERE c.id = r.consent_id AND c.expires_at = r.expires_at AND c.status = 'GRANTED'
+                   ) AS live
+            FROM expiry_reminders r
+            WHERE r.status = 'PENDING' AND r.available_at <= now()
+            ORDER BY r.available_at
+            LIMIT :limit
+            FOR UPDATE SKIP LOCKED
+        )
+        UPDATE expiry_reminders r SET
+            attempts = r.attempts + 1,
+            available_at = now() + make_interval(secs => :lease),
+            status = CASE WHEN due.live THEN 'PENDING' ELSE 'DISCARDED' END,
+            last_error = CASE WHEN due.live THEN r.last_error ELSE 'consent_inactive' END
+        FROM due
+        WHERE r.consent_id = due.consent_id AND r.expires_at = due.expires_at
+        RETURNING r.consent_id, r.expires_at, r.tenant_id, r.psu_id, r.tpp_client_id, r.attempts, r.status
+    """), {"limit": limit, "lease": lease_seconds}).all()
+    db.commit()
+    return rows
+
+def mark_sent(db: Session, keys: Sequence[ReminderKey]) -> None:
+    if not keys:
+        return
+    db.execute(
+        update(_reminders)
+        .where(tuple_(_reminders.c.consent_id, _reminders.c.expires_at).in_(keys))
+        .values(status="SENT", sent_at=func.now(), last_error=None)
+    )
+    db.commit()
+
+def mark_failed(db: Session, failures: Sequence[Tuple[Sequence[ReminderKey], str, float | None]]) -> None:
+    """
+    failures: (keys of one digest, error, retry_in_seconds). retry_in_seconds=None gives up (DEAD).
+    One UPDATE ... FROM (VALUES ...) for the whole batch, like outbox.mark_failed.
+    """
+    rows = [
+        (consent_id, expires_at, error[:500], retry_in)
+        for keys, error, retry_in in failures
+        for consent_id, expires_at in keys
+    ]
+    if not rows:
+        return
+    f = values(
+        column("consent_id", PG_UUID(as_uuid=True)), column("expires_at", DateTime(timezone=True)),
+        column("error", Text), column("retry_in", Float), name="f",
+    ).data(rows)
+    dead = f.c.retry_in.is_(None)
+    db.execute(
+        update(_reminders)
+        .where(_reminders.c.consent_id == f.c.consent_id)
+        .where(_reminders.c.expires_at == f.c.expires_at)
+        .values(
+            last_error=f.c.error,
+            status=case((dead, "DEAD"), else_=_reminders.c.status),
+            available_at=case(
+                (dead, _reminders.c.available_at),
+                # cast: a batch of dead letters only would leave the VALUES column untyped
+                else_=func.now() + func.make_interval(0, 0, 0, 0, 0, 0, cast(f.c.retry_in, Float)),
+            ),
+        )
+    )
+    db.commit()
+
+def mark_discarded(db: Session, keys: Sequence[ReminderKey], reason: str) -> None:
+    if not keys:
+        return
+    db.execute(
+        update(_reminders)
+        .where(tuple_(_reminders.c.consent_id, _reminders.c.expires_at).in_(keys))
+        .values(status="DISCARDED", last_error=reason)
+    )
+    db.commit()
+
+def purge_expired(db: Session, *, keep_seconds: float, limit: int = 5000) -> int:
+    """Delete up to `limit` markers whose consent expired more than `keep_seconds` ago."""
+    result = db.execute(text("""
+        DELETE FROM expiry_reminders WHERE (consent_id, expires_at) IN (
+            SELECT consent_id, expires_at FROM expiry_reminders
+            WHERE expires_at < now() - make_interval(secs => :keep)
+            ORDER BY expires_at
+            LIMIT :limit
+        )
+    """), {"keep": keep_seconds, "limit": limit})
+    db.commit()
+    return result.rowcount
+
+def backlog_stats(db: Session, *, window_seconds: float) -> Tuple[int, float]:
+    """
+    (consents in the window not reminded yet, seconds the oldest of them has been
+    in the window). Claimed but unsent ones count; they are not out of the door.
+    """
+    row = db.execute(text(f"""
+        SELECT count(*),
+               COALESCE(EXTRACT(EPOCH FROM now() - (min(c.expires_at) - make_interval(secs => :window))), 0)
+        FROM consents c
+        WHERE {_ELIGIBLE}
+          AND NOT EXISTS (
+              SELECT 1 FROM expiry_reminders r
+              WHERE r.consent_id = c.id AND r.expires_at = c.expires_at AND r.status <> 'PENDING'
+          )
+    """), {"window": window_seconds}).one()
+    return int(row[0]), max(float(row[1]), 0.0)
@@ -0,0 +1,139 @@
+from typing import Any, Optional
+from uuid import UUID, uuid4
+from sqlalchemy import and_, func, or_, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from app.models.revocation_job import OPEN_JOB_STATUSES, RevocationJob
+
+_jobs = RevocationJob.__table__
+
+def create_job(
+    db: Session,
+    *,
+    selector: str,
+    value: str,
+    reason: Optional[str],
+    requested_by: Optional[str],
+) -> tuple[Any, bool]:
+    """
+    Enqueue a bulk revocation. Returns (job, created); while a job for the same
+    selector/value is still open, that job is returned instead of a new one.
+    """
+    stmt = (
+        insert(_jobs)
+        .values(id=uuid4(), selector=selector, value=value, reason=reason, requested_by=requested_by)
+        .on_conflict_do_nothing(
+            index_elements=[_jobs.c.selector, _jobs.c.value],
+            index_where=_jobs.c.status.in_(OPEN_JOB_STATUSES),
+        )
+        .returning(*_jobs.c)
+    )
+    row = db.execute(stmt).first()
+    created = row is not None
+    if not created:
+        row = db.execute(
+            select(_jobs)
+            .where(_jobs.c.selector == selector)
+            .where(_jobs.c.value == value)
+            .where(_jobs.c.status.in_(OPEN_JOB_STATUSES))
+        ).first()
+    db.commit()
+    return row, created
+
+def get_job(db: Session, job_id: UUID) -> Optional[Any]:
+    return db.execute(select(_jobs).where(_jobs.c.id == job_id)).first()
+
+def cancel_job(db: Session, job_id: UUID) -> tuple[Optional[Any], bool]:
+    """
+    Cancel an open job; the worker stops after its current batch.
+    Returns (job as it now is, whether this call cancelled it).
+    """
+    result = db.execute(
+        update(_jobs)
+        .where(_jobs.c.id == job_id)
+        .where(_jobs.c.status.in_(OPEN_JOB_STATUSES))
+        .values(status="CANCELLED", finished_at=func.now(), lease_until=None)
+    )
+    db.commit()
+    return get_job(db, job_id), result.rowcount > 0
+
+def fail_exhausted(db: Session, *, max_attempts: int) -> int:
+    """Give up on jobs whose lease ran out `max_attempts` times (each claim is one attempt)."""
+    result = db.execute(
+        update(_jobs)
+        .where(_jobs.c.status == "RUNNING")
+        .where(_jobs.c.lease_until < func.now())
+        .where(_jobs.c.attempts >= max_attempts)
+        .values(status="FAILED", finished_at=func.now(), lease_until=None)
+    )
+    db.commit()
+    return result.rowcount
+
+def claim_job(db: Session, *, lease_seconds: int) -> Optional[Any]:
+    """
+    Claim the oldest PENDING job, or a RUNNING one whose worker's lease ran out
+    (crash or restart). Revoking is idempotent and the batch query only matches
+    active consents, so a re-claimed job simply carries on where it stopped.
+    """
+    claimable = (
+        select(_jobs.c.id)
+        .where(
+            or_(
+                _jobs.c.status == "PENDING",
+                and_(_jobs.c.status == "RUNNING", _jobs.c.lease_until < func.now()),
+            )
+        )
+        .order_by(_jobs.c.created_at)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+        .cte("claimable")
+    )
+    stmt = (
+        update(_jobs)
+        .where(_jobs.c.id == claimable.c.id)
+        .values(
+            status="RUNNING",
+            lease_until=func.now() + func.make_interval(0, 0, 0, 0, 0, 0, lease_seconds),
+            attempts=_jobs.c.attempts + 1,
+            started_at=func.coalesce(_jobs.c.started_at, func.now()),
+        )
+        .returning(*_jobs.c)
+    )
+    row = db.execute(stmt).first()
+    db.commit()
+    return row
+
+def record_progress(db: Session, job_id: UUID, *, attempt: int, revoked: int, lease_seconds: int) -> bool:
+    """
+    Add one batch to the job's counters and renew its lease. `attempt` is the
+    value claim_job returned: if another worker has re-claimed the job since,
+    or it was cancelled, nothing is updated and False means stop.
+    """
+    status = db.execute(
+        update(_jobs)
+        .where(_jobs.c.id == job_id)
+        .where(_jobs.c.status == "RUNNING")
+        .where(_jobs.c.attempts == attempt)
+        .values(
+            revoked_count=_jobs.c.revoked_count + revoked,
+            batches=_jobs.c.batches + (1 if revoked else 0),
+            lease_until=func.now() + func.make_interval(0, 0, 0, 0, 0, 0, lease_seconds),
+        )
+        .returning(_jobs.c.status)
+    ).scalar()
+    db.commit()
+    return status is not None
+
+def finish_job(db: Session, job_id: UUID) -> None:
+    db.execute(
+        update(_jobs)
+        .where(_jobs.c.id == job_id)
+        .where(_jobs.c.status == "RUNNING")
+        .values(status="COMPLETED", finished_at=func.now(), lease_until=None, last_error=None)
+    )
+    db.commit()
+
+def record_error(db: Session, job_id: UUID, error: str) -> None:
+    # The job stays RUNNING; it is retried once its lease runs out
+    db.execute(update(_jobs).where(_jobs.c.id == job_id).values(last_error=error[:500]))
+    db.commit()
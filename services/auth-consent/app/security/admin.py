@@ -0,0 +1,22 @@
+from __future__ import annotations
+from typing import Optional
+from fastapi import Header, HTTPException, status
+
+from app.core.config import settings
+from app.security.jwt import collect_roles, decode_bearer
+
+async def require_admin(Authorization: Optional[str] = Header(None)):
+    """
+    Route dependency for /admin/*. Same token validation as TPP calls, but the
+    token must carry one of ADMIN_ROLES (realm or client role) instead of a TPP role.
+    """
+    if not settings.ADMIN_ENABLED:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="not_found")
+    if settings.SKIP_JWT:
+        return {"sub": "dev-bypass", "roles": list(settings.ADMIN_ROLES)}
+
+    payload = await decode_bearer(Authorization)
+    roles = collect_roles(payload)
+    if roles.isdisjoint(settings.ADMIN_ROLES):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="insufficient_permissions")
+    return {"sub": payload.get("sub"), "roles": sorted(roles), "raw": payload}
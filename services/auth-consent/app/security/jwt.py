@@ -1,15 +1,19 @@
 from __future__ import annotations
+import asyncio
 import time
 from typing import Any, Dict, Optional, Set
-import httpx
-import jwt
-from fastapi import Header, HTTPException, status
+from fastapi import Header, HTTPException, Request, status
 from app.core.config import settings
+from app.core.http import get_http_client
+from app.core.offload import run_cpu
 
 # Required role(s) to call /consents (pick either one)
 REQUIRED_ROLES: Set[str] = {"tpp", "consents:create"}
 _KID_CACHE: Dict[str, Dict[str, Any]] = {}  
 _KID_TTL = 300  # 5 minutes
+_JWKS_MIN_REFRESH = 30  # unknown kids can't make us refetch the JWKS more often than this
+_JWKS_REFRESHED_AT: float = 0.0
+_JWKS_LOCK = asyncio.Lock()
 
 # Simple in-process caches (per container)
 _OIDC_CONF: Optional[Dict[str, Any]] = None
@@ -22,18 +26,17 @@ async def _get_oidc_conf() -> Dict[str, Any]:
     if _OIDC_CONF and now < _OIDC_CONF_EXP:
         return _OIDC_CONF
     url = settings.KEYCLOAK_WELLKNOWN_URL or f"{settings.KEYCLOAK_ISSUER.rstrip('/')}/.well-known/openid-configuration"
-    async with httpx.AsyncClient(timeout=5.0) as client:
-        r = await client.get(url)
-        if r.status_code != 200:
-            raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="oidc_config_unavailable")
-        conf = r.json()
+    r = await get_http_client().get(url)
+    if r.status_code != 200:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="oidc_config_unavailable")
+    conf = r.json()
     _OIDC_CONF = conf
     _JWKS_URI = conf.get("jwks_uri")
     # refresh every 5 minutes
     _OIDC_CONF_EXP = now + 300
     return conf
 
-def _require_roles(payload: Dict[str, Any]) -> None:
+def collect_roles(payload: Dict[str, Any]) -> Set[str]:
     roles: Set[str] = set()
     # Realm roles
     realm = payload.get("realm_access", {}) or {}
@@ -50,37 +53,71 @@ def _require_roles(payload: Dict[str, Any]) -> None:
     azp = payload.get("azp")
     if isinstance(azp, str):
         roles.update((ra.get(azp, {}) or {}).get("roles", []) or [])
+    return roles
+
+def _require_roles(payload: Dict[str, Any]) -> None:
     # Check required roles
-    if roles.isdisjoint(REQUIRED_ROLES):
+    if collect_roles(payload).isdisjoint(REQUIRED_ROLES):
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="insufficient_permissions")
 
 
-async def _get_signing_key(token: str):
-    from jwt import PyJWKClient, get_unverified_header
-    hdr = get_unverified_header(token)
-    kid = hdr.get("kid")
-
-    now = time.time()
-    if kid and kid in _KID_CACHE and _KID_CACHE[kid]["exp"] > now:
-        return _KID_CACHE[kid]["key"]
+def _cached_key(kid: Optional[str], now: float):
+    entry = _KID_CACHE.get(kid) if kid else None
+    if entry and entry["exp"] > now:
+        return entry["key"]
+    return None
 
+async def _refresh_jwks() -> int:
+    """Fetch the JWKS (async, shared client) and cache every signing key by kid. Returns the key count."""
+    global _JWKS_REFRESHED_AT
+    import jwt
     conf = await _get_oidc_conf()
     jwks_uri = conf.get("jwks_uri")
     if not jwks_uri:
         raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="jwks_unavailable")
+    r = await get_http_client().get(jwks_uri)
+    r.raise_for_status()
+    jwks = jwt.PyJWKSet.from_dict(r.json())
+
+    now = time.time()
+    count = 0
+    for k in jwks.keys:
+        if k.key_id and k.public_key_use in (None, "sig"):
+            _KID_CACHE[k.key_id] = {"key": k.key, "exp": now + _KID_TTL}
+            count += 1
+    _JWKS_REFRESHED_AT = now
+    return count
 
-    jwk_client = PyJWKClient(jwks_uri)
-    key = jwk_client.get_signing_key_from_jwt(token).key
+async def _get_signing_key(token: str):
+    from jwt import InvalidTokenError, get_unverified_header
+    kid = get_unverified_header(token).get("kid")
+    key = _cached_key(kid, time.time())
+    if key is not None:
+        return key
 
-    # cache by kid
-    if kid:
-        _KID_CACHE[kid] = {"key": key, "exp": now + _KID_TTL}
+    # Single flight: concurrent misses wait for one refresh instead of each fetching
+    async with _JWKS_LOCK:
+        key = _cached_key(kid, time.time())
+        if key is None and time.time() - _JWKS_REFRESHED_AT >= _JWKS_MIN_REFRESH:
+            await _refresh_jwks()
+            key = _cached_key(kid, time.time())
+    if key is None:
+        raise InvalidTokenError(f"no signing key for kid {kid!r}")
     return key
 
-async def get_current_client(Authorization: Optional[str] = Header(None)):
-    # Optional development bypass
-    if settings.SKIP_JWT:
-        return {"tpp_client_id": "dev-bypass", "roles": ["tpp"]}
+async def preload_signing_keys() -> int:
+    """
+    Fetch OIDC discovery + the full JWKS and fill _KID_CACHE, so the first
+    authenticated requests after a deploy don't pay for it. Returns the key count.
+    """
+    async with _JWKS_LOCK:
+        return await _refresh_jwks()
+
+async def decode_bearer(Authorization: Optional[str]) -> Dict[str, Any]:
+    """Verify the bearer token (signature, audience, issuer, exp) and return its claims; no role checks."""
+    # Deferred: PyJWT + cryptography and httpx are only needed once a real token arrives
+    import httpx
+    import jwt
 
     if not Authorization or not Authorization.startswith("Bearer "):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="invalid_token")
@@ -88,7 +125,9 @@ async def get_current_client(Authorization: Optional[str] = Header(None)):
 
     try:
         key = await _get_signing_key(token)
-        payload = jwt.decode(
+        # RSA verification is CPU work: keep it off the event loop
+        payload = await run_cpu(
+            jwt.decode,
             token,
             key=key,
             algorithms=["RS256"],
@@ -96,7 +135,6 @@ async def get_current_client(Authorization: Optional[str] = Header(None)):
             issuer=settings.KEYCLOAK_ISSUER,     # must match iss claim
             options={"require": ["exp", "iat"]},
         )
-        _require_roles(payload)
     except jwt.ExpiredSignatureError:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="token_expired")
     except jwt.InvalidAudienceError:
@@ -108,6 +146,16 @@ async def get_current_client(Authorization: Optional[str] = Header(None)):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="invalid_token")
     except httpx.HTTPError:
         raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="jwks_fetch_failed")
+    return payload
+
+async def get_current_client(request: Request, Authorization: Optional[str] = Header(None)):
+    # Optional development bypass
+    if settings.SKIP_JWT:
+        request.state.tpp_client_id = "dev-bypass"
+        return {"tpp_client_id": "dev-bypass", "roles": ["tpp"]}
+
+    payload = await decode_bearer(Authorization)
+    _require_roles(payload)
 
     # Pull a stable client id; azp is best, fall back to client_id/aud
     tpp_client_id = payload.get("azp") or (payload.get("client_id") if isinstance(payload.get("client_id"), str) else None)
@@ -119,6 +167,8 @@ async def get_current_client(Authorization: Optional[str] = Header(None)):
             tpp_client_id = aud[0]
     if not tpp_client_id:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="client_id_missing")
+    # For middleware that runs after the route (traffic capture)
+    request.state.tpp_client_id = tpp_client_id
 
     return {
         "tpp_client_id": tpp_client_id,
@@ -0,0 +1,170 @@
+from __future__ import annotations
+import json
+import logging
+import math
+import os
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+from fastapi import Depends, HTTPException, status
+
+from app.cache.redis_client import get_redis
+from app.core.config import settings
+from app.core.metrics import inc_rate_limited
+from app.security.jwt import get_current_client
+
+# Atomic token bucket, one round trip. Uses the Redis clock so pods never disagree.
+# KEYS[1] bucket key; ARGV: rate (tokens/s), burst, requested tokens
+# Returns {granted, retry_after_ms}
+_TOKEN_BUCKET_LUA = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local requested = tonumber(ARGV[3])
+local t = redis.call('TIME')
+local now = t[1] * 1000 + math.floor(t[2] / 1000)
+local b = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(b[1])
+local ts = tonumber(b[2])
+if tokens == nil then
+  tokens = burst
+  ts = now
+end
+tokens = math.min(burst, tokens + math.max(0, now - ts) / 1000 * rate)
+local granted = math.min(requested, math.floor(tokens))
+tokens = tokens - granted
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(burst / rate * 1000) + 1000)
+local retry_ms = 0
+if granted == 0 then
+  retry_ms = math.ceil((1 - tokens) / rate * 1000)
+end
+return {granted, retry_ms}
+"""
+
+_LEASE_TTL_SECONDS = 1.0       # leased tokens not used within this window are dropped
+_MAX_LOCAL_KEYS = 10_000
+_CONFIG_CHECK_SECONDS = 5.0
+
+@dataclass
+class _Local:
+    tokens: int = 0
+    lease_expires: float = 0.0
+    blocked_until: float = 0.0
+
+class _LimitConfig:
+    """
+    Effective (rate, burst) per client and route class:
+    Settings.RATE_LIMITS defaults <- Settings.RATE_LIMIT_OVERRIDES <- RATE_LIMIT_CONFIG_FILE.
+    The file is re-read when its mtime changes, so limits change without a restart.
+    """
+
+    def __init__(self) -> None:
+        self._file_mtime: float | None = None
+        self._file_defaults: Dict[str, Dict[str, float]] = {}
+        self._file_clients: Dict[str, Dict[str, Dict[str, float]]] = {}
+        self._checked = 0.0
+
+    def _maybe_reload(self) -> None:
+        path = settings.RATE_LIMIT_CONFIG_FILE
+        now = time.monotonic()
+        if not path or now - self._checked < _CONFIG_CHECK_SECONDS:
+            return
+        self._checked = now
+        try:
+            mtime = os.stat(path).st_mtime
+            if mtime == self._file_mtime:
+                return
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self._file_defaults = data.get("defaults", {}) or {}
+            self._file_clients = data.get("clients", {}) or {}
+            self._file_mtime = mtime
+            logging.getLogger("ratelimit").info("rate_limit_config_reloaded path=%s", path)
+        except Exception as e:
+            logging.warning("Rate limit config reload failed (keeping previous): %s", e)
+
+    def limits(self, tpp_client_id: str, route_class: str) -> Tuple[float, float]:
+        self._maybe_reload()
+        merged: Dict[str, float] = {}
+        for layer in (
+            settings.RATE_LIMITS.get(route_class),
+            self._file_defaults.get(route_class),
+            settings.RATE_LIMIT_OVERRIDES.get(tpp_client_id, {}).get(route_class),
+            self._file_clients.get(tpp_client_id, {}).get(route_class),
+        ):
+            if layer:
+                merged.update(layer)
+        rate = float(merged.get("rate", 0))
+        return rate, float(merged.get("burst", rate))
+
+_config = _LimitConfig()
+_local: Dict[str, _Local] = {}
+_script = None
+
+async def _take_from_redis(key: str, rate: float, burst: float, requested: int) -> Tuple[int, int]:
+    global _script
+    if _script is None:
+        _script = get_redis().register_script(_TOKEN_BUCKET_LUA)
+    granted, retry_ms = await _script(keys=[key], args=[rate, burst, requested])
+    return int(granted), int(retry_ms)
+
+async def check_rate_limit(route_class: str, tpp_client_id: str, tenant_id: Optional[str]) -> Optional[int]:
+    """
+    Returns None when the request may proceed, else the Retry-After in seconds.
+
+    The Redis bucket is the source of truth; each pod leases a few tokens per
+    round trip (RATE_LIMIT_LOCAL_LEASE) and remembers rejections until the
+    bucket refills, so steady traffic and tight polling loops alike mostly
+    stay in-process.
+    """
+    rate, burst = _config.limits(tpp_client_id, route_class)
+    if rate <= 0:
+        return None  # unlimited
+
+    key = f"rl:{route_class}:{tpp_client_id}:{tenant_id or '-'}"
+    now = time.monotonic()
+    local = _local.get(key)
+    if local is None:
+        if len(_local) >= _MAX_LOCAL_KEYS:
+            _local.clear()
+        local = _local[key] = _Local()
+
+    if now < local.blocked_until:
+        return max(1, math.ceil(local.blocked_until - now))
+    if local.tokens > 0 and now < local.lease_expires:
+        local.tokens -= 1
+        return None
+
+    lease = max(1, min(settings.RATE_LIMIT_LOCAL_LEASE, int(burst)))
+    try:
+        granted, retry_ms = await _take_from_redis(key, rate, burst, lease)
+    except Exception as e:
+        # Fail open: a Redis outage must not take the API down with it
+        logging.warning("Rate limit check failed (allowing request): %s", e)
+        return None
+
+    if granted <= 0:
+        local.tokens = 0
+        local.blocked_until = now + retry_ms / 1000
+        return max(1, math.ceil(retry_ms / 1000))
+    local.tokens = granted - 1
+    local.lease_expires = now + _LEASE_TTL_SECONDS
+    return None
+
+def rate_limit(route_class: str):
+    """Route dependency: `dependencies=[Depends(rate_limit("polling"))]`."""
+
+    async def _dependency(client=Depends(get_current_client)) -> None:
+        if not settings.RATE_LIMIT_ENABLED:
+            return
+        retry_after = await check_rate_limit(route_class, client["tpp_client_id"], client.get("tenant_id"))
+        if retry_after is not None:
+            inc_rate_limited(route_class)
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="rate_limited",
+                headers={"Retry-After": str(retry_after)},
+            )
+
+    return _dependency
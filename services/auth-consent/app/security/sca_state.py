@@ -0,0 +1,73 @@
+"""
+Signed SCA `state` tokens.
+
+The state handed to the PSU's browser (and echoed back on the public, unauthenticated
+callback) is self-verifying, so forged, expired or cross-consent callbacks are
+rejected without a database round trip:
+
+    <kid>.<base64url(consent_id[16] | nonce[8] | expires_at[4] | mac[16])>
+
+mac is HMAC-SHA256 over "<kid>." plus the first 28 bytes, truncated to 128 bits.
+`kid` selects the key from SCA_STATE_KEYS; tokens are issued with
+SCA_STATE_ACTIVE_KEY_ID, and older keys stay in SCA_STATE_KEYS for verification
+until the tokens they signed have expired (SCA_STATE_TTL_SECONDS).
+
+The token is also stored as the consent's sca_id: a valid signature proves we
+issued it, the stored value proves it is the consent's current SCA session.
+"""
+from __future__ import annotations
+import base64
+import hashlib
+import hmac
+import os
+import struct
+import time
+from uuid import UUID
+
+from app.core.config import settings
+
+_BODY = struct.Struct(">16s8sI")
+_MAC_BYTES = 16
+
+class InvalidScaState(ValueError):
+    """`reason` is one of malformed, unknown_key, bad_signature, wrong_consent, expired."""
+
+    def __init__(self, reason: str) -> None:
+        super().__init__(reason)
+        self.reason = reason
+
+def _key(kid: str) -> bytes:
+    secret = settings.SCA_STATE_KEYS.get(kid)
+    if secret is None:
+        raise InvalidScaState("unknown_key")
+    return secret.encode("utf-8")
+
+def _mac(kid: str, body: bytes) -> bytes:
+    return hmac.new(_key(kid), kid.encode("ascii") + b"." + body, hashlib.sha256).digest()[:_MAC_BYTES]
+
+def issue(consent_id: UUID, ttl_seconds: int | None = None) -> str:
+    kid = settings.SCA_STATE_ACTIVE_KEY_ID
+    expires_at = int(time.time()) + (ttl_seconds if ttl_seconds is not None else settings.SCA_STATE_TTL_SECONDS)
+    body = _BODY.pack(consent_id.bytes, os.urandom(8), expires_at)
+    raw = body + _mac(kid, body)
+    return f"{kid}.{base64.urlsafe_b64encode(raw).rstrip(b'=').decode('ascii')}"
+
+def verify(token: str, consent_id: UUID) -> None:
+    """Raise InvalidScaState unless `token` was issued by us for `consent_id` and has not expired."""
+    kid, sep, blob = token.partition(".")
+    if not sep or not kid.isascii() or len(blob) > 64:
+        raise InvalidScaState("malformed")
+    try:
+        raw = base64.urlsafe_b64decode(blob + "=" * (-len(blob) % 4))
+    except ValueError:
+        raise InvalidScaState("malformed")
+    if len(raw) != _BODY.size + _MAC_BYTES:
+        raise InvalidScaState("malformed")
+    body, mac = raw[: _BODY.size], raw[_BODY.size:]
+    if not hmac.compare_digest(mac, _mac(kid, body)):
+        raise InvalidScaState("bad_signature")
+    token_consent, _nonce, expires_at = _BODY.unpack(body)
+    if token_consent != consent_id.bytes:
+        raise InvalidScaState("wrong_consent")
+    if expires_at < time.time():
+        raise InvalidScaState("expired")
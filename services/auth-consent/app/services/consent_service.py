@@ -2,7 +2,7 @@
 from __future__ import annotations
 
 import logging
-from uuid import uuid4, UUID
+from uuid import UUID
 from datetime import datetime, timedelta, timezone
 from typing import Dict, Tuple, Optional
 
@@ -10,6 +10,7 @@ from pydantic import AnyHttpUrl
 from fastapi import HTTPException, status
 from sqlalchemy.orm import Session
 
+from app.db.shards import new_consent_id, session_shard
 from app.repositories.consents import create as repo_create
 from app.api.schemas.consents import (
     ConsentCreateRequest,
@@ -18,7 +19,7 @@ from app.api.schemas.consents import (
     ConsentLinks,
 )
 from app.utils.hashutils import canonical_sha256
-from app.utils.idempotency import read_entry, try_lock, store_final
+from app.utils.idempotency import read_or_lock, store_final
 from app.core.metrics import (
     inc_consents_created,
     inc_consents_revoked,
@@ -59,12 +60,13 @@ async def create_consent(
     body_dict = payload.model_dump(mode="json")
     body_sha = canonical_sha256(body_dict)
 
+    # Read and claim the key in one round trip (GET + SET NX in MULTI)
     existing = None
     try:
-        existing = await read_entry(tpp_client_id, idempotency_key)
+        existing, _ = await read_or_lock(tpp_client_id, idempotency_key, body_sha)
     except Exception as e:
         logging.warning(
-            "Idempotency read failed (continuing without strict idempotency): %s", e
+            "Idempotency check failed (continuing without strict idempotency): %s", e
         )
 
     if existing:
@@ -73,36 +75,11 @@ async def create_consent(
             if stored:
                 stored_headers = existing.get("headers", {})
                 return ConsentCreateResponse(**stored), True, stored_headers
-        # same key, different body -> conflict
+        # same key, different body (or same body still in flight) -> conflict
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT, detail="idempotency_conflict"
         )
 
-    # Try to acquire a short lock to avoid races
-    locked = False
-    try:
-        locked = await try_lock(tpp_client_id, idempotency_key, body_sha)
-    except Exception as e:
-        logging.warning("Idempotency lock failed (continuing): %s", e)
-
-    if not locked:
-        # Someone else may be creating it right now; re-check
-        try:
-            existing = await read_entry(tpp_client_id, idempotency_key)
-        except Exception:
-            existing = None
-        if (
-            existing
-            and existing.get("body_sha256") == body_sha
-            and existing.get("response")
-        ):
-            return (
-                ConsentCreateResponse(**existing["response"]),
-                True,
-                existing.get("headers", {}),
-            )
-        # If different body appears with same key, it will 409 on the caller’s retry
-
     # ---- Create consent (DB) ----
     now = datetime.now(timezone.utc)
     expires_at = (
@@ -111,7 +88,8 @@ async def create_consent(
         else _clamp_expiry(payload.expiration_at, now)
     )
 
-    consent_id = uuid4()
+    # Shard encoded in the id so later lookups route without a directory
+    consent_id = new_consent_id(session_shard(db))
 
     repo_create(
         db,
@@ -122,6 +100,7 @@ async def create_consent(
         status="PENDING_SCA",
         client_ip=client_ip,
         tenant_id=tenant_id,  # persist tenant for multi-tenant routing/metering
+        correlation_id=str(correlation_id),
     )
 
     #Metrics: count successful creation exactly once (not on idempotent replays)
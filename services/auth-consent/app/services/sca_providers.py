@@ -0,0 +1,269 @@
+"""
+SCA provider adapters: how a consent's Strong Customer Authentication is started
+and how its outcome is confirmed.
+
+    provider = sca_providers.for_tenant(tenant_id)
+    initiation = await provider.initiate(consent_id, base_url, sca_id)
+    outcome = await provider.confirm(sca_id, claimed_result)
+
+sca_id is ours: the signed state token from app.security.sca_state, which the
+provider echoes back as `state` on the callback. "local" (the default) is the
+built-in stub that sends the PSU straight to our callback. Providers listed in SCA_PROVIDERS are remote
+ASPSP SCA services spoken to over HTTP (see HttpScaProvider for the contract;
+app/devtools/sca_provider_stub.py implements it for local runs and benchmarks).
+
+Every HTTP provider is isolated from the others: its own pooled AsyncClient,
+concurrency limit, deadline and circuit breaker, so one degraded ASPSP can only
+slow down the authorizations routed to it.
+"""
+from __future__ import annotations
+import asyncio
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional
+from uuid import UUID
+
+from app.core.config import settings
+from app.core.metrics import inc_sca_provider_hedge, observe_sca_provider_call, set_sca_provider_circuit
+from app.services.sca_service import build_authorize_url, build_deny_url
+from app.utils.circuit_breaker import CircuitBreaker
+
+@dataclass(frozen=True)
+class ScaInitiation:
+    sca_id: str
+    redirect_url: str                  # where the PSU is sent to authenticate
+    deny_url: Optional[str] = None     # stub only: shortcut to a denied outcome
+
+class ScaProviderError(Exception):
+    """Provider call failed; `code` is the API error detail (see app.core.errors)."""
+
+    _STATUS = {"sca_provider_unavailable": 503, "sca_provider_timeout": 504, "sca_provider_rejected": 502}
+
+    def __init__(self, code: str, message: str = "") -> None:
+        super().__init__(message or code)
+        self.code = code
+        self.status_code = self._STATUS.get(code, 503)
+
+class ScaProvider(ABC):
+    name: str = "abstract"
+
+    @abstractmethod
+    async def initiate(self, consent_id: UUID, base_url: str, sca_id: str) -> ScaInitiation:
+        """
+        Start SCA session `sca_id` for a consent; the PSU comes back to our callback
+        under `base_url`. Idempotent per sca_id.
+        """
+
+    @abstractmethod
+    async def confirm(self, sca_id: str, claimed: str) -> str:
+        """
+        Outcome of an SCA session ("approved", "denied" or "pending"). `claimed` is
+        what the PSU's browser brought back on the callback; remote providers
+        don't take its word for it.
+        """
+
+    async def close(self) -> None:
+        pass
+
+class LocalStubProvider(ScaProvider):
+    """No external call: the authorize URL is our own callback, approved (or denied via deny_url)."""
+
+    name = "local"
+
+    async def initiate(self, consent_id: UUID, base_url: str, sca_id: str) -> ScaInitiation:
+        return ScaInitiation(
+            sca_id=sca_id,
+            redirect_url=build_authorize_url(base_url, consent_id, sca_id),
+            deny_url=build_deny_url(base_url, consent_id, sca_id),
+        )
+
+    async def confirm(self, sca_id: str, claimed: str) -> str:
+        return claimed
+
+class HttpScaProvider(ScaProvider):
+    """
+    Remote SCA service:
+
+        POST {base_url}/sca   Idempotency-Key: <sca_id>
+             {"sca_id", "consent_id", "callback_url"} -> {"redirect_url"}
+        GET  {base_url}/sca/{sca_id}       -> {"status": "pending"|"approved"|"denied"}
+
+    The provider redirects the PSU to callback_url?state=<sca_id>&result=<...>.
+
+    Both calls are idempotent, so a call still unanswered after `hedge_after`
+    seconds gets one hedged duplicate (only if a concurrency slot is free; hedges
+    never queue) and the first good answer wins. Everything, hedge included, has
+    to finish within `timeout`. 5xx, timeouts and transport errors count against
+    the circuit breaker; while it is open, calls fail immediately.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        base_url: str,
+        timeout_seconds: float = 3.0,
+        max_concurrency: int = 50,
+        hedge_after_seconds: Optional[float] = 0.3,
+        failure_threshold: int = 5,
+        reset_seconds: float = 30.0,
+        transport: Any = None,
+    ) -> None:
+        self.name = name
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout_seconds
+        self.hedge_after = hedge_after_seconds
+        self._sem = asyncio.Semaphore(max_concurrency)
+        self._max_connections = max_concurrency
+        self._transport = transport
+        self._client = None
+        self.breaker = CircuitBreaker(
+            failure_threshold, reset_seconds, on_change=lambda state: set_sca_provider_circuit(name, state)
+        )
+        set_sca_provider_circuit(name, self.breaker.state)
+
+    def _http(self):
+        if self._client is None:
+            import httpx
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=self._max_connections, max_keepalive_connections=self._max_connections),
+                transport=self._transport,
+            )
+        return self._client
+
+    async def initiate(self, consent_id: UUID, base_url: str, sca_id: str) -> ScaInitiation:
+        callback_url = f"{base_url.rstrip('/')}/consents/{consent_id}/authorize/callback"
+        body = await self._call(
+            "initiate",
+            lambda: self._http().post(
+                "/sca",
+                json={"sca_id": sca_id, "consent_id": str(consent_id), "callback_url": callback_url},
+                headers={"Idempotency-Key": sca_id},
+            ),
+        )
+        return ScaInitiation(sca_id=sca_id, redirect_url=body["redirect_url"])
+
+    async def confirm(self, sca_id: str, claimed: str) -> str:
+        body = await self._call("status", lambda: self._http().get(f"/sca/{sca_id}"))
+        return body.get("status", "pending")
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _call(self, operation: str, send: Callable[[], Awaitable[Any]]) -> Dict[str, Any]:
+        import httpx
+        if not self.breaker.allow():
+            observe_sca_provider_call(self.name, operation, "circuit_open", 0.0)
+            raise ScaProviderError("sca_provider_unavailable", f"{self.name}: circuit open")
+        start = time.perf_counter()
+        outcome = "error"
+        settled = False
+        try:
+            async with asyncio.timeout(self.timeout):
+                response = await self._hedged(send)
+            if response.status_code >= 500:
+                raise ScaProviderError("sca_provider_unavailable", f"{self.name}: HTTP {response.status_code}")
+            if response.status_code >= 400:
+                # Our request was refused; the provider itself is fine
+                outcome = "rejected"
+                self.breaker.release()
+                settled = True
+                raise ScaProviderError("sca_provider_rejected", f"{self.name}: HTTP {response.status_code}")
+            try:
+                body = response.json()
+            except ValueError:
+                body = None
+            if not isinstance(body, dict):
+                raise ScaProviderError("sca_provider_unavailable", f"{self.name}: response is not a JSON object")
+            outcome = "ok"
+            self.breaker.record_success()
+            settled = True
+            return body
+        except TimeoutError:
+            outcome = "timeout"
+            self.breaker.record_failure()
+            settled = True
+            raise ScaProviderError("sca_provider_timeout", f"{self.name}: no answer within {self.timeout}s")
+        except httpx.HTTPError as exc:
+            self.breaker.record_failure()
+            settled = True
+            raise ScaProviderError("sca_provider_unavailable", f"{self.name}: {exc!r}")
+        except ScaProviderError:
+            if not settled:
+                self.breaker.record_failure()
+                settled = True
+            raise
+        finally:
+            # Cancelled by the caller (or anything unexpected): no verdict on the
+            # provider, but a half-open trial must not stay in flight forever
+            if not settled:
+                outcome = "cancelled"
+                self.breaker.release()
+            observe_sca_provider_call(self.name, operation, outcome, time.perf_counter() - start)
+
+    async def _hedged(self, send: Callable[[], Awaitable[Any]]):
+        async def attempt():
+            async with self._sem:
+                return await send()
+
+        tasks = [asyncio.create_task(attempt())]
+        try:
+            if self.hedge_after is not None:
+                done, _ = await asyncio.wait(tasks, timeout=self.hedge_after)
+                if not done and not self._sem.locked():
+                    inc_sca_provider_hedge(self.name)
+                    tasks.append(asyncio.create_task(attempt()))
+            pending = set(tasks)
+            last: Any = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for t in done:
+                    if t.exception() is None and t.result().status_code < 500:
+                        return t.result()
+                    last = t
+            return last.result()  # every attempt failed: re-raise / return the last failure
+        finally:
+            for t in tasks:
+                if not t.done():
+                    t.cancel()
+
+# ---- Registry -------------------------------------------------------------------
+
+_providers: Dict[str, ScaProvider] = {}
+
+def _build(name: str) -> ScaProvider:
+    if name == LocalStubProvider.name:
+        return LocalStubProvider()
+    conf = settings.SCA_PROVIDERS.get(name)
+    if conf is None:
+        raise ScaProviderError("sca_provider_unavailable", f"unknown SCA provider {name!r}")
+    return HttpScaProvider(
+        name,
+        conf["base_url"],
+        timeout_seconds=float(conf.get("timeout_seconds", settings.SCA_TIMEOUT_SECONDS)),
+        max_concurrency=int(conf.get("max_concurrency", settings.SCA_MAX_CONCURRENCY)),
+        hedge_after_seconds=conf.get("hedge_after_seconds", settings.SCA_HEDGE_AFTER_SECONDS),
+        failure_threshold=int(conf.get("failure_threshold", settings.SCA_BREAKER_FAILURES)),
+        reset_seconds=float(conf.get("reset_seconds", settings.SCA_BREAKER_RESET_SECONDS)),
+    )
+
+def get_provider(name: str) -> ScaProvider:
+    provider = _providers.get(name)
+    if provider is None:
+        provider = _providers[name] = _build(name)
+    return provider
+
+def for_tenant(tenant_id: Optional[str]) -> ScaProvider:
+    """The provider that authenticates this tenant's PSUs (SCA_TENANT_PROVIDERS, else SCA_PROVIDER)."""
+    name = settings.SCA_TENANT_PROVIDERS.get(tenant_id, settings.SCA_PROVIDER) if tenant_id else settings.SCA_PROVIDER
+    return get_provider(name)
+
+async def close_providers() -> None:
+    providers = list(_providers.values())
+    _providers.clear()
+    for p in providers:
+        await p.close()
@@ -0,0 +1,65 @@
+from __future__ import annotations
+import time
+from typing import Callable, Optional
+
+CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    closed     calls pass; `failure_threshold` failures in a row open the circuit
+    open       calls are rejected without trying, for `reset_seconds`
+    half_open  one trial call is let through; success closes, failure re-opens
+
+    Not thread-safe; meant for one event loop. `on_change(state)` is called on
+    every transition (metrics).
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        reset_seconds: float = 30.0,
+        on_change: Optional[Callable[[str], None]] = None,
+    ) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._on_change = on_change
+        self.state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+
+    def allow(self) -> bool:
+        if self.state == OPEN:
+            if time.monotonic() - self._opened_at < self.reset_seconds:
+                return False
+            self._set(HALF_OPEN)
+        if self.state == HALF_OPEN:
+            if self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+        return True
+
+    def record_success(self) -> None:
+        self._failures = 0
+        self._trial_in_flight = False
+        if self.state != CLOSED:
+            self._set(CLOSED)
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        self._trial_in_flight = False
+        if self.state == HALF_OPEN or self._failures >= self.failure_threshold:
+            self._opened_at = time.monotonic()
+            if self.state != OPEN:
+                self._set(OPEN)
+
+    def release(self) -> None:
+        """The allowed call ended without a verdict (e.g. a 4xx): let another trial through."""
+        self._trial_in_flight = False
+
+    def _set(self, state: str) -> None:
+        self.state = state
+        if self._on_change:
+            self._on_change(state)
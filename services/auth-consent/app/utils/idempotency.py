@@ -1,35 +1,69 @@
 from __future__ import annotations
 import json
-from typing import Any, Dict, Optional
-from app.cache.redis_client import get_redis
+from typing import Any, Dict, Optional, Tuple
+from app.cache.redis_client import LocalCache, get_redis
+from app.core.config import settings
 
 IDEMPOTENCY_TTL_SECONDS = 24 * 60 * 60  # 24h
 _LOCK_TTL_SECONDS = 60                  # short lock to avoid races
 
+# FINAL entries never change once written, so replays can be served from memory
+_final_cache = LocalCache(
+    max_entries=settings.REDIS_LOCAL_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.REDIS_LOCAL_CACHE_TTL_SECONDS,
+)
+
 def _key(tpp_client_id: str, idem_key: str) -> str:
     return f"idem:{tpp_client_id}:{idem_key}"
 
-async def read_entry(tpp_client_id: str, idem_key: str) -> Optional[Dict[str, Any]]:
-    raw = await get_redis().get(_key(tpp_client_id, idem_key))
+def _decode(key: str, raw: Optional[str]) -> Optional[Dict[str, Any]]:
     if not raw:
         return None
     try:
-        return json.loads(raw)
+        entry = json.loads(raw)
     except Exception:
         return None
+    if entry.get("state") == "FINAL":
+        _final_cache.put(key, entry)
+    return entry
+
+async def read_entry(tpp_client_id: str, idem_key: str) -> Optional[Dict[str, Any]]:
+    key = _key(tpp_client_id, idem_key)
+    cached = _final_cache.get(key)
+    if cached is not None:
+        return cached
+    return _decode(key, await get_redis().get(key))
 
 async def try_lock(tpp_client_id: str, idem_key: str, body_sha: str) -> bool:
     # SET NX to claim the key briefly while we create the consent
     value = json.dumps({"state": "LOCK", "body_sha256": body_sha})
     return await get_redis().set(_key(tpp_client_id, idem_key), value, nx=True, ex=_LOCK_TTL_SECONDS)
 
+async def read_or_lock(tpp_client_id: str, idem_key: str, body_sha: str) -> Tuple[Optional[Dict[str, Any]], bool]:
+    """
+    read_entry + try_lock in one round trip: GET and SET NX in a MULTI block.
+    Returns (existing entry or None, whether we now hold the lock).
+    """
+    key = _key(tpp_client_id, idem_key)
+    cached = _final_cache.get(key)
+    if cached is not None:
+        return cached, False
+    value = json.dumps({"state": "LOCK", "body_sha256": body_sha})
+    async with get_redis().pipeline(transaction=True) as pipe:
+        pipe.get(key)
+        pipe.set(key, value, nx=True, ex=_LOCK_TTL_SECONDS)
+        raw, locked = await pipe.execute()
+    return _decode(key, raw), bool(locked)
+
 async def store_final(tpp_client_id: str, idem_key: str, body_sha: str,
                       response_dict: Dict[str, Any], status_code: int, headers: Dict[str, str]) -> None:
-    value = json.dumps({
+    entry = {
         "state": "FINAL",
         "body_sha256": body_sha,
         "response": response_dict,
         "status_code": status_code,
         "headers": headers,
-    })
-    await get_redis().set(_key(tpp_client_id, idem_key), value, ex=IDEMPOTENCY_TTL_SECONDS)
\ No newline at end of file
+    }
+    key = _key(tpp_client_id, idem_key)
+    await get_redis().set(key, json.dumps(entry), ex=IDEMPOTENCY_TTL_SECONDS)
+    _final_cache.put(key, entry)
@@ -0,0 +1,55 @@
+"""
+Time-ordered identifiers.
+
+uuid7() is an RFC 9562 version-7 UUID:
+
+    unix_ts_ms (48) | ver=7 (4) | counter (12) | var (2) | random (62)
+
+Ids from one process are strictly increasing: within a millisecond the 12-bit
+counter (seeded randomly in its lower half) is incremented, and when it
+overflows or the clock steps back the timestamp is carried forward instead.
+Across processes, ids are ordered by millisecond, so new rows land at the
+right-hand edge of a B-tree index instead of on a random page.
+
+`tail` overwrites the last random byte (the shard number for consent ids,
+see app.db.shards).
+"""
+from __future__ import annotations
+import os
+import threading
+import time
+from typing import Optional
+from uuid import UUID
+
+_lock = threading.Lock()
+_last_ms = 0
+_counter = 0
+
+def _next_ms_and_counter() -> tuple[int, int]:
+    global _last_ms, _counter
+    now = time.time_ns() // 1_000_000
+    with _lock:
+        if now > _last_ms:
+            _last_ms = now
+            _counter = int.from_bytes(os.urandom(2), "big") & 0x7FF
+        else:
+            _counter += 1
+            if _counter > 0xFFF:
+                # Counter exhausted (or clock went back): borrow the next millisecond
+                _last_ms += 1
+                _counter = int.from_bytes(os.urandom(2), "big") & 0x7FF
+        return _last_ms, _counter
+
+def uuid7(tail: Optional[int] = None) -> UUID:
+    ms, counter = _next_ms_and_counter()
+    raw = bytearray(ms.to_bytes(6, "big") + os.urandom(10))
+    raw[6] = 0x70 | (counter >> 8)
+    raw[7] = counter & 0xFF
+    raw[8] = (raw[8] & 0x3F) | 0x80   # RFC 9562 variant
+    if tail is not None:
+        raw[15] = tail
+    return UUID(bytes=bytes(raw))
+
+def uuid7_time_ms(value: UUID) -> int:
+    """Creation time (unix ms) embedded in a version-7 UUID."""
+    return int.from_bytes(value.bytes[:6], "big")
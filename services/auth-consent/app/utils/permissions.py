@@ -0,0 +1,24 @@
+from __future__ import annotations
+from functools import lru_cache
+from typing import Iterable, List, Tuple
+
+# Bit positions are persisted (consents.permissions_mask) - append only, never renumber.
+PERMISSION_BITS = {
+    "accounts:read": 1 << 0,
+    "balances:read": 1 << 1,
+    "transactions:read": 1 << 2,
+}
+
+def encode_permissions(values: Iterable[str]) -> int:
+    mask = 0
+    for v in values:
+        mask |= PERMISSION_BITS[v]
+    return mask
+
+@lru_cache(maxsize=None)
+def _decode(mask: int) -> Tuple[str, ...]:
+    return tuple(name for name, bit in PERMISSION_BITS.items() if mask & bit)
+
+def decode_permissions(mask: int) -> List[str]:
+    # Only 2^len(PERMISSION_BITS) possible masks, so decoding is a cache hit after warm-up
+    return list(_decode(mask))
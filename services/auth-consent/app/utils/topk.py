@@ -0,0 +1,64 @@
+from __future__ import annotations
+import heapq
+from typing import Callable, Dict, Optional, Set
+
+class TopKLabels:
+    """
+    Bounded label values for a high-cardinality dimension (e.g. TPP client id).
+
+    label(key) returns `key` while it is among the ~k heaviest keys, else `other`,
+    so a metric labelled through it never has more than k + 1 values. Weights are
+    approximate (Space-Saving over `capacity` counters) and halve at every refresh,
+    so the set follows recent traffic. Until the set is full, new keys are
+    admitted straight away; after that, membership is re-evaluated every
+    `refresh_every` observations and `on_evict(key)` is called for keys that
+    dropped out (to remove their series).
+
+    Not thread-safe; meant for one event loop.
+    """
+
+    def __init__(
+        self,
+        k: int,
+        other: str = "other",
+        capacity: Optional[int] = None,
+        refresh_every: int = 1000,
+        on_evict: Optional[Callable[[str], None]] = None,
+    ) -> None:
+        self.k = k
+        self.other = other
+        self.capacity = capacity or max(10 * k, 100)
+        self.refresh_every = refresh_every
+        self._on_evict = on_evict
+        self._counts: Dict[str, int] = {}
+        self._top: Set[str] = set()
+        self._since_refresh = 0
+
+    def label(self, key: str) -> str:
+        counts = self._counts
+        if key in counts:
+            counts[key] += 1
+        elif len(counts) < self.capacity:
+            counts[key] = 1
+        else:
+            # Space-Saving: the newcomer inherits the smallest counter
+            victim = min(counts, key=counts.__getitem__)
+            counts[key] = counts.pop(victim) + 1
+        if key not in self._top and len(self._top) < self.k:
+            self._top.add(key)
+        self._since_refresh += 1
+        if self._since_refresh >= self.refresh_every:
+            self._refresh()
+        return key if key in self._top else self.other
+
+    def _refresh(self) -> None:
+        self._since_refresh = 0
+        counts = self._counts
+        top = set(heapq.nlargest(self.k, counts, key=counts.__getitem__))
+        evicted = self._top - top
+        self._top = top
+        # Decay, forgetting keys that went quiet
+        self._counts = {key: n // 2 for key, n in counts.items() if n > 1}
+        if self._on_evict:
+            for key in evicted:
+                self._on_evict(key)
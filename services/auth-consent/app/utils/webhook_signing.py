@@ -0,0 +1,24 @@
+from __future__ import annotations
+import hashlib, hmac, time
+from typing import Optional
+
+SIGNATURE_HEADER = "X-Webhook-Signature"
+_TOLERANCE_SECONDS = 300
+
+def sign_payload(secret: str, body: bytes, timestamp: Optional[int] = None) -> str:
+    # "t=<unix>,v1=<hex>" where v1 = HMAC-SHA256(secret, "<unix>.<body>")
+    ts = int(time.time()) if timestamp is None else timestamp
+    mac = hmac.new(secret.encode("utf-8"), f"{ts}.".encode("utf-8") + body, hashlib.sha256).hexdigest()
+    return f"t={ts},v1={mac}"
+
+def verify_signature(secret: str, body: bytes, header: str, tolerance: int = _TOLERANCE_SECONDS) -> bool:
+    try:
+        parts = dict(p.split("=", 1) for p in header.split(","))
+        ts = int(parts["t"])
+        given = parts["v1"]
+    except (KeyError, ValueError):
+        return False
+    if abs(time.time() - ts) > tolerance:
+        return False
+    expected = sign_payload(secret, body, ts).split("v1=", 1)[1]
+    return hmac.compare_digest(expected, given)
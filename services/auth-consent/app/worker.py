@@ -0,0 +1,52 @@
+"""
+Lightweight entry point for housekeeping, without the HTTP stack.
+
+    python -m app.worker                      # run all enabled jobs until SIGTERM
+    python -m app.worker --jobs expiry,webhooks
+    python -m app.worker migrate              # alembic upgrade head on every shard (advisory-locked), then exit
+
+Pair with HOUSEKEEPING_IN_API=false on the API pods so the jobs run once per
+deployment rather than once per API replica.
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import logging
+import signal
+
+from app.core.config import settings
+from app.core.logging import setup_logging
+from app.housekeeping.runner import JOB_NAMES, build_jobs, start_jobs, stop_jobs
+
+async def _run(job_names) -> None:
+    jobs = build_jobs(settings, job_names)
+    if not jobs:
+        logging.getLogger("worker").warning("no_jobs_enabled requested=%s", ",".join(job_names))
+        return
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, stop.set)
+
+    await start_jobs(jobs)
+    try:
+        await stop.wait()
+    finally:
+        await stop_jobs(jobs)
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("command", nargs="?", default="run", choices=("run", "migrate"))
+    ap.add_argument("--jobs", default=",".join(JOB_NAMES), help=f"comma-separated subset of {','.join(JOB_NAMES)}")
+    args = ap.parse_args()
+
+    setup_logging()
+    if args.command == "migrate":
+        # Safe to start from every replica: the advisory lock lets one migrate, the rest wait
+        from app.db.migrations import upgrade_all
+        upgrade_all()
+        return
+    asyncio.run(_run([j.strip() for j in args.jobs.split(",") if j.strip()]))
+
+if __name__ == "__main__":
+    main()